@@ -0,0 +1,407 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from detectors import StubFaceDetector, StubPoseDetector
+from people_counter_bckp import PeopleCounter
+
+
+class TimedDetector:
+    """Proxy detector yang mencatat durasi setiap process()"""
+
+    def __init__(self, detector, timings):
+        self.detector = detector
+        self.timings = timings
+
+    def process(self, rgb_frame):
+        start = time.perf_counter()
+        result = self.detector.process(rgb_frame)
+        self.timings.append((time.perf_counter() - start) * 1000)
+        return result
+
+    def close(self):
+        self.detector.close()
+
+
+def synthetic_clip(frame_count=120, width=640, height=480, seed=0):
+    """Clip sintetis deterministik: background bertekstur + blok bergerak"""
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+    frames = []
+    for index in range(frame_count):
+        frame = background.copy()
+        for block in range(3):
+            x = int((index * (3 + block * 2) + block * 150) % (width - 60))
+            y = int(height * (0.2 + 0.25 * block))
+            cv2.rectangle(frame, (x, y), (x + 60, y + 90), (40 + block * 60, 120, 200), -1)
+        frames.append(frame)
+    return frames
+
+
+def load_clip(video_path, max_frames=120):
+    """Baca clip rekaman ke memori supaya waktu decode tidak ikut terukur"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Tidak dapat membuka file video: {video_path}")
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise IOError(f"Tidak ada frame yang bisa dibaca: {video_path}")
+    return frames
+
+
+def percentile_summary(samples):
+    """p50/p95/p99 (ms) dari daftar durasi"""
+    if not samples:
+        return {"calls": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    values = np.asarray(samples, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "calls": len(samples),
+        "mean_ms": round(float(values.mean()), 4),
+        "p50_ms": round(float(p50), 4),
+        "p95_ms": round(float(p95), 4),
+        "p99_ms": round(float(p99), 4)
+    }
+
+
+def build_counter(config, real_models=False, seed=0, timings=None, stub_delay_ms=0.0):
+    """PeopleCounter headless dengan stub detector (default) atau model MediaPipe asli"""
+    settings = dict(config or {})
+    settings.update({"show_window": False, "verbose": False, "threaded_capture": False})
+
+    if real_models:
+        counter = PeopleCounter(settings)
+        face_detector = counter.detector_cascade.get_face_detector()
+        pose_factory = counter.detector_cascade.pose_factory
+    else:
+        face_detector = StubFaceDetector(seed=seed, delay_ms=stub_delay_ms)
+        pose_factory = StubPoseDetector
+        counter = PeopleCounter(settings, detectors=(face_detector, pose_factory))
+        # Worker pipeline lain membuat stub sendiri
+        counter.detector_cascade.face_factory = lambda: StubFaceDetector(seed=seed, delay_ms=stub_delay_ms)
+
+    if timings is not None:
+        # Bungkus detector supaya face dan pose terukur terpisah
+        counter.detector_cascade.face_detector = TimedDetector(face_detector, timings["face"])
+        counter.detector_cascade.pose_factory = lambda: TimedDetector(pose_factory(), timings["pose"])
+    return counter
+
+
+def run_pipeline(counter, frames, frame_count, clip_fps=30.0, report_every=60, timings=None, start_index=0):
+    """
+    Replay clip melalui stage yang sama dengan run(): capture (salinan ke buffer,
+    pengganti decode) atau flip bila preview dicerminkan, cvtColor (hanya bila
+    inference memakai frame penuh; crop/resize ROI ikut terukur di detect), detector,
+    tracking, zona, draw_detections, draw_enhanced_ui, log_data, dan publish snapshot dashboard.
+    Timestamp log_data berasal dari nomor frame supaya interval log deterministik;
+    start_index melanjutkan replay sebelumnya pada counter yang sama.
+    """
+    def timed(stage, func, *args, **kwargs):
+        if timings is None:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[stage].append((time.perf_counter() - start) * 1000)
+        return result
+
+    base_time = counter.session_start_time
+    if start_index == 0:
+        counter.last_log_time = base_time
+
+    for index in range(start_index, start_index + frame_count):
+        frame_start = time.perf_counter()
+        raw = frames[index % len(frames)]
+
+        # Clip di memori tidak boleh ikut digambari: flip atau salin ke buffer seperti hasil cap.read()
+        if counter.should_mirror():
+            frame = timed("flip", counter.frame_buffers.flip if counter.buffer_pool_enabled else cv2.flip, raw, 1)
+        else:
+            frame = timed("capture", counter.frame_buffers.copy if counter.buffer_pool_enabled else np.copy, raw)
+        counter.calculate_fps()
+        rgb_frame = None
+        if counter.inference_regions.is_identity:
+            rgb_frame = timed("cvtColor", counter.inference_regions.prepare, frame)[0][0]
+        person_count, detected_faces, face_scores, pose_landmarks = timed(
+            "detect", counter.detect_people, frame, rgb_frame)
+        timed("tracking", counter.update_tracking, detected_faces, frame.shape[0])
+        if counter.zone_map is not None:
+            timed("zones", counter.update_zones, detected_faces, frame.shape, base_time + index / clip_fps)
+        timed("draw_detections", counter.draw_detections, frame, detected_faces, face_scores, pose_landmarks)
+        stable_count = timed("overlay", counter.draw_enhanced_ui, frame, person_count, detected_faces)
+        timed("log_data", counter.log_data, stable_count, base_time + index / clip_fps)
+
+        if report_every and index % report_every == report_every - 1:
+            timed("web_publish", counter.publish_dashboard)
+
+        if counter.quality_controller is not None:
+            level = counter.quality_controller.observe((time.perf_counter() - frame_start) * 1000)
+            if level is not None:
+                counter.apply_quality_level(level)
+
+        if timings is not None:
+            timings["end_to_end"].append((time.perf_counter() - frame_start) * 1000)
+
+
+def check_allocations(frames, config=None, frame_count=600, warmup_frames=300, seed=0,
+                      max_growth_kb=8, max_peak_kb=64, metrics_window=30):
+    """
+    Tes alokasi steady state (exit code 1 di CLI bila gagal). Setelah warm-up,
+    selama frame_count frame:
+    - memori yang tertahan (tracemalloc current sesudah gc) tidak boleh naik
+      lebih dari max_growth_kb: leak satu float per frame sudah ~14 KB/600 frame
+    - peak di atas baseline tidak boleh lebih dari max_peak_kb, jauh di bawah
+      satu frame (640x480x3 = 900 KB), jadi alokasi seukuran frame per frame gagal
+    Kedua batas adalah konstanta tetap, tidak ikut ukuran frame.
+
+    Struktur yang memang dibatasi (window quantile StageTimer, bucket rollup)
+    baru berhenti tumbuh setelah penuh; window diperkecil ke metrics_window
+    sampel dan warm-up dijalankan dengan tracemalloc aktif supaya semuanya
+    sudah penuh dan ter-trace sebelum pengukuran. Return dict dengan key "passed".
+    """
+    counter = build_counter(config, seed=seed)
+    counter.metrics.window_size = metrics_window
+    for timer in counter.metrics.stages.values():
+        timer.window = deque(timer.window, maxlen=metrics_window)
+
+    tracemalloc.start()
+    run_pipeline(counter, frames, warmup_frames, report_every=0)
+    gc.collect()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    run_pipeline(counter, frames, frame_count, report_every=0, start_index=warmup_frames)
+    _, peak = tracemalloc.get_traced_memory()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    counter.detector_cascade.close()
+
+    growth = current - baseline
+    peak_growth = peak - baseline
+    return {
+        "buffer_pool": counter.buffer_pool_enabled,
+        "frames": frame_count,
+        "growth_kb": round(growth / 1024, 1),
+        "peak_growth_kb": round(peak_growth / 1024, 1),
+        "max_growth_kb": max_growth_kb,
+        "max_peak_kb": max_peak_kb,
+        "passed": growth <= max_growth_kb * 1024 and peak_growth <= max_peak_kb * 1024
+    }
+
+
+def compare_pipeline(frames, workers_list=(0, 1, 2, 4), frame_count=300, config=None, real_models=False,
+                     seed=0, stub_delay_ms=0.0, depth=None):
+    """
+    Throughput vs latency loop frame untuk beberapa jumlah worker pipeline
+    (0 = sekuensial). Frame dari clip di memori tersedia secepat pipeline
+    mampu mengambilnya; latency = capture -> frame selesai digambar/di-log.
+    """
+    work_dir = tempfile.mkdtemp(prefix="people_counter_bench_")
+    original_dir = os.getcwd()
+    os.chdir(work_dir)
+    results = []
+    try:
+        for workers in workers_list:
+            settings = dict(config or {}, pipeline_workers=workers, pipeline_depth=depth)
+            counter = build_counter(settings, real_models, seed, stub_delay_ms=stub_delay_ms)
+            counter.startup_timings = {"first_count": 0.0}  # Startup tidak diukur di sini
+            counter.start_pipeline()
+            start = time.perf_counter()
+            for index in range(frame_count):
+                raw = frames[index % len(frames)]
+                capture_time = time.time()
+                if counter.pipeline is not None:
+                    counter.submit_pipelined(raw, capture_time)
+                    continue
+                frame = counter.frame_buffers.flip(raw) if counter.should_mirror() else counter.frame_buffers.copy(raw)
+                counter.finish_frame(frame, counter.detect_people(frame), capture_time, time.perf_counter())
+            while counter.pipeline is not None and counter.pipeline.pending:
+                counter.finish_pipelined(*counter.pipeline.pop())
+            elapsed = time.perf_counter() - start
+            counter.stop_pipeline()
+            counter.detector_cascade.close()
+            results.append({
+                "workers": workers,
+                "depth": counter.pipeline.depth if counter.pipeline is not None else 1,
+                "fps": round(frame_count / elapsed, 2),
+                "avg_latency_ms": round(counter.avg_latency_ms, 1),
+                "max_latency_ms": round(counter.max_latency_ms, 1)
+            })
+    finally:
+        os.chdir(original_dir)
+    return results
+
+
+def run_benchmark(frames, frame_count=600, config=None, real_models=False, seed=0,
+                  report_every=60, memory_frames=100, warmup_frames=10):
+    """Jalankan benchmark lengkap, return dict hasil (siap disimpan sebagai JSON)"""
+    stages = ["capture", "flip", "cvtColor", "face", "pose", "detect", "tracking", "zones", "draw_detections",
+              "overlay", "log_data", "web_publish", "end_to_end"]
+    work_dir = tempfile.mkdtemp(prefix="people_counter_bench_")
+    original_dir = os.getcwd()
+    os.chdir(work_dir)  # Isolasi file yang mungkin ditulis pipeline ke cwd
+
+    try:
+        # Warm-up (model loading, cache) tanpa dicatat
+        warmup = build_counter(config, real_models, seed)
+        run_pipeline(warmup, frames, warmup_frames, report_every=0)
+        warmup.detector_cascade.close()
+
+        # Pass timing (tanpa tracemalloc supaya overhead tidak ikut terukur)
+        timings = {stage: [] for stage in stages}
+        counter = build_counter(config, real_models, seed, timings)
+        wall_start = time.perf_counter()
+        run_pipeline(counter, frames, frame_count, report_every=report_every, timings=timings)
+        wall_seconds = time.perf_counter() - wall_start
+        detector_stats = counter.detector_cascade.get_stats()
+        counter.detector_cascade.close()
+
+        # Pass memori terpisah dengan tracemalloc
+        memory_counter = build_counter(config, real_models, seed)
+        tracemalloc.start()
+        run_pipeline(memory_counter, frames, memory_frames, report_every=report_every)
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory_counter.detector_cascade.close()
+    finally:
+        os.chdir(original_dir)
+
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    height, width = frames[0].shape[:2]
+    return {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "detector": "mediapipe" if real_models else "stub",
+            "seed": seed,
+            "frames": frame_count,
+            "clip_frames": len(frames),
+            "resolution": f"{width}x{height}",
+            "report_every": report_every,
+            "config": config or {},
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count()
+        },
+        "stages": {stage: percentile_summary(timings[stage]) for stage in stages if stage != "end_to_end"},
+        "end_to_end": dict(percentile_summary(timings["end_to_end"]),
+                           fps=round(frame_count / wall_seconds, 2) if wall_seconds > 0 else 0.0),
+        "memory": {
+            "tracemalloc_peak_mb": round(traced_peak / 1024 / 1024, 2),
+            "max_rss_mb": round(max_rss_kb / 1024, 2)
+        },
+        "detector_stats": detector_stats
+    }
+
+
+def print_results(results, baseline=None):
+    """Tabel hasil benchmark, opsional dengan perbandingan p50 terhadap baseline"""
+    meta = results["meta"]
+    print(f"\n=== BENCHMARK ({meta['detector']}, {meta['frames']} frame @ {meta['resolution']}) ===")
+    header = f"{'Stage':<16}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'Δp50':>10}"
+    print(header)
+
+    rows = dict(results["stages"], end_to_end=results["end_to_end"])
+    for stage, stats in rows.items():
+        line = f"{stage:<16}{stats['calls']:>7}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}"
+        if baseline:
+            base_rows = dict(baseline["stages"], end_to_end=baseline["end_to_end"])
+            if stage in base_rows and base_rows[stage]["p50_ms"] > 0:
+                change = (stats["p50_ms"] / base_rows[stage]["p50_ms"] - 1) * 100
+                line += f"{change:>+9.1f}%"
+        print(line)
+
+    fps_line = f"FPS end-to-end: {results['end_to_end']['fps']}"
+    if baseline:
+        fps_line += f" (baseline {baseline['end_to_end']['fps']})"
+    print(fps_line)
+    print(f"Memori: tracemalloc peak {results['memory']['tracemalloc_peak_mb']} MB | "
+          f"max RSS {results['memory']['max_rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline per-frame People Counter")
+    parser.add_argument("--video", help="Clip rekaman (default: clip sintetis)")
+    parser.add_argument("--frames", type=int, default=600, help="Jumlah frame yang diproses")
+    parser.add_argument("--clip-frames", type=int, default=120, help="Jumlah frame clip di memori (diulang)")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--real-models", action="store_true", help="Pakai model MediaPipe asli, bukan stub")
+    parser.add_argument("--report-every", type=int, default=60, help="Publish snapshot dashboard tiap N frame (0 = mati)")
+    parser.add_argument("--config", help="File config JSON (override atribut PeopleCounter)")
+    parser.add_argument("--output", help="Simpan hasil ke file JSON")
+    parser.add_argument("--compare", help="File JSON hasil benchmark sebelumnya untuk dibandingkan")
+    parser.add_argument("--pipeline-workers", help="Bandingkan throughput/latency mode pipeline, misal '0,1,2,4'")
+    parser.add_argument("--pipeline-depth", type=int, default=None, help="Frame in-flight mode pipeline (default workers + 1)")
+    parser.add_argument("--stub-delay-ms", type=float, default=0.0,
+                        help="Waktu inference simulasi stub detector (melepas GIL seperti model asli)")
+    parser.add_argument("--check-allocations", action="store_true",
+                        help="Hanya tes alokasi steady state per frame (exit 1 bila gagal)")
+    parser.add_argument("--max-growth-kb", type=float, default=8,
+                        help="--check-allocations: batas memori tertahan selama --frames frame")
+    parser.add_argument("--max-peak-kb", type=float, default=64,
+                        help="--check-allocations: batas peak di atas baseline")
+    args = parser.parse_args()
+
+    config = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+    if args.video:
+        clip = load_clip(args.video, args.clip_frames)
+    else:
+        clip = synthetic_clip(args.clip_frames, args.width, args.height, args.seed)
+
+    if args.check_allocations:
+        check = check_allocations(clip, config, args.frames, seed=args.seed,
+                                  max_growth_kb=args.max_growth_kb, max_peak_kb=args.max_peak_kb)
+        status = "✓ Lolos" if check["passed"] else "❌ Gagal"
+        print(f"{status}: selama {check['frames']} frame memori tertahan naik {check['growth_kb']} KB "
+              f"(batas {check['max_growth_kb']} KB), peak {check['peak_growth_kb']} KB "
+              f"(batas {check['max_peak_kb']} KB), buffer_pool={check['buffer_pool']}")
+        raise SystemExit(0 if check["passed"] else 1)
+
+    if args.pipeline_workers:
+        workers_list = [int(value) for value in args.pipeline_workers.split(",")]
+        rows = compare_pipeline(clip, workers_list, args.frames, config, args.real_models, args.seed,
+                                args.stub_delay_ms, args.pipeline_depth)
+        print(f"\n=== PIPELINE ({'mediapipe' if args.real_models else 'stub'}, {args.frames} frame, "
+              f"{os.cpu_count()} CPU) ===")
+        print(f"{'workers':>8}{'depth':>7}{'FPS':>9}{'avg lat ms':>12}{'max lat ms':>12}")
+        for row in rows:
+            print(f"{row['workers']:>8}{row['depth']:>7}{row['fps']:>9.1f}{row['avg_latency_ms']:>12.1f}"
+                  f"{row['max_latency_ms']:>12.1f}")
+        raise SystemExit(0)
+
+    results = run_benchmark(clip, args.frames, config, args.real_models, args.seed, args.report_every)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Hasil benchmark disimpan ke: {args.output}")
@@ -0,0 +1,469 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import parse_qs
+
+try:
+    import brotli  # Opsional: pip install brotli
+except ImportError:
+    brotli = None
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+COMPRESS_MIN_BYTES = 512  # Body lebih kecil dikirim apa adanya
+MAX_SAMPLES_PER_REQUEST = 1000
+
+STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+    503: "Service Unavailable"
+}
+
+
+def compress_variants(body):
+    """Versi terkompresi body {encoding: bytes}, hanya yang lebih kecil dari aslinya"""
+    variants = {}
+    if len(body) < COMPRESS_MIN_BYTES:
+        return variants
+    compressed = gzip.compress(body, compresslevel=6)
+    if len(compressed) < len(body):
+        variants["gzip"] = compressed
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=5)
+        if len(compressed) < len(body):
+            variants["br"] = compressed
+    return variants
+
+
+def accepted_encodings(header):
+    """Encoding dari header Accept-Encoding (yang q=0 diabaikan)"""
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name.strip():
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+class DashboardHub:
+    """
+    Snapshot dashboard terbaru di memori. Loop proses memanggil publish();
+    server hanya membaca bytes JSON yang sudah di-encode, sehingga jumlah
+    client tidak menambah kerja di thread frame.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = 0
+        self.payload = b"{}"
+        self.listeners = []  # Callable tanpa argumen, dipanggil setiap publish
+
+    def publish(self, snapshot):
+        """Encode snapshot sekali lalu beri tahu listener (server dashboard)"""
+        payload = json.dumps(snapshot, separators=(",", ":")).encode("utf-8")
+        with self.lock:
+            self.version += 1
+            self.payload = payload
+            listeners = list(self.listeners)
+        for listener in listeners:
+            listener()
+
+    def latest(self):
+        """(version, payload) saat ini"""
+        with self.lock:
+            return self.version, self.payload
+
+    def add_listener(self, listener):
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+
+class DashboardServer:
+    """
+    Server HTTP asyncio untuk dashboard di thread daemon sendiri.
+    Route: / dan /static/* (file statis lokal), /api/snapshot, /api/stream (SSE),
+    /api/samples?since=N (sampel data log baru saja), /api/history (agregat
+    riwayat lintas session), /metrics.
+
+    Backpressure per client: buffer tulis tiap koneksi (buffer transport
+    asyncio dan SO_SNDBUF kernel, yang tanpa batas bisa tumbuh sampai
+    beberapa MB) dibatasi write_buffer_limit; selama client lambat belum menguras buffer, publish
+    baru tidak di-antre melainkan digabung, dan client hanya menerima
+    snapshot terbaru setelah buffer-nya kosong. Client yang tidak menguras
+    buffer dalam send_timeout detik diputus.
+
+    history_source (query SQLite) dan metrics_source (membaca state counter)
+    dijalankan di thread pool kecil, bukan di event loop, sehingga query
+    riwayat yang lambat tidak menahan stream SSE maupun snapshot client lain.
+    """
+
+    def __init__(self, hub, host='localhost', port=8080, metrics_source=None, samples_source=None,
+                 history_source=None,
+                 max_clients=500, send_timeout=10.0, heartbeat_interval=15.0,
+                 write_buffer_limit=64 * 1024):
+        self.hub = hub
+        self.host = host
+        self.port = port
+        self.metrics_source = metrics_source  # Callable -> teks Prometheus
+        self.samples_source = samples_source  # Callable (since, limit) -> {"latest_seq", "samples"}
+        self.history_source = history_source  # Callable (endpoint, params) -> dict riwayat
+        self.max_clients = max_clients
+        self.send_timeout = send_timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.write_buffer_limit = write_buffer_limit
+        self.request_timeout = 10.0
+        self.source_workers = 2  # Thread untuk history_source/metrics_source
+
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.start_error = None
+        self.update_event = None  # asyncio.Event, diganti setiap publish
+        self.writers = set()  # Koneksi aktif, ditutup saat shutdown
+        self.closing = False
+        self.static_assets = {}  # path -> body, ETag, Last-Modified, varian terkompresi
+        self.snapshot_variants = (0, {})  # (version, varian terkompresi snapshot)
+
+        # Statistik (hanya diubah dari thread event loop)
+        self.clients = 0
+        self.stream_clients = 0
+        self.requests_total = 0
+        self.events_sent = 0
+        self.events_coalesced = 0  # Versi yang dilewati client lambat
+        self.clients_rejected = 0
+        self.slow_clients_dropped = 0
+        self.server_errors = 0  # Request yang dibalas 500 karena exception tak terduga
+
+    def start(self):
+        """Jalankan event loop di thread daemon; raise OSError bila port gagal di-bind"""
+        self._load_static()
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.start_error is not None:
+            raise self.start_error
+        return self
+
+    def _load_static(self):
+        """
+        Muat semua file di static/ ke memori sekali saat start: ETag dari hash
+        isi, Last-Modified dari mtime, dan varian gzip/brotli dihitung di sini
+        sehingga request berikutnya hanya memilih bytes yang sudah jadi.
+        """
+        for name in sorted(os.listdir(STATIC_DIR)):
+            path = os.path.join(STATIC_DIR, name)
+            if not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                body = f.read()
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type == "application/javascript":
+                content_type += "; charset=utf-8"
+            mtime = int(os.path.getmtime(path))
+            self.static_assets[f"/static/{name}"] = {
+                "body": body,
+                "content_type": content_type,
+                "etag": 'W/"%s"' % hashlib.sha1(body).hexdigest()[:16],
+                "mtime": mtime,
+                "variants": compress_variants(body)
+            }
+        self.static_assets["/"] = self.static_assets["/dashboard.html"] = self.static_assets["/static/dashboard.html"]
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        executor = ThreadPoolExecutor(max_workers=self.source_workers, thread_name_prefix="dashboard-source")
+        loop.set_default_executor(executor)
+        self.loop = loop
+        try:
+            self.server = loop.run_until_complete(asyncio.start_server(
+                self._handle_client, self.host, self.port, reuse_address=True, backlog=1024))
+        except OSError as e:
+            self.start_error = e
+            self.ready.set()
+            loop.close()
+            executor.shutdown(wait=False)
+            return
+
+        self.update_event = asyncio.Event()
+        self.hub.add_listener(self._notify_threadsafe)
+        self.ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self.hub.remove_listener(self._notify_threadsafe)
+            self.server.close()
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(self.server.wait_closed())
+            loop.close()
+            executor.shutdown(wait=False)
+
+    def shutdown(self):
+        """Tutup semua koneksi lalu hentikan event loop"""
+        if self.loop is not None and self.thread is not None and self.thread.is_alive():
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_all(), self.loop).result(timeout=5.0)
+            except Exception:
+                pass  # Sisa task dibatalkan di _run()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=5.0)
+
+    async def _close_all(self):
+        self.closing = True
+        self.server.close()
+        for writer in list(self.writers):
+            writer.transport.abort()
+        self._on_publish()  # Bangunkan stream yang sedang menunggu
+        for _ in range(100):
+            if not self.clients:
+                break
+            await asyncio.sleep(0.02)
+
+    def _notify_threadsafe(self):
+        # Dipanggil dari thread frame: cukup jadwalkan, tidak menunggu client
+        try:
+            self.loop.call_soon_threadsafe(self._on_publish)
+        except RuntimeError:
+            pass  # Loop sudah ditutup
+
+    def _on_publish(self):
+        event = self.update_event
+        self.update_event = asyncio.Event()
+        event.set()
+
+    async def _handle_client(self, reader, writer):
+        writer.transport.set_write_buffer_limits(high=self.write_buffer_limit)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            # Tanpa batas, autotuning kernel menampung MB snapshot basi untuk client lambat
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.write_buffer_limit)
+        if self.clients >= self.max_clients:
+            self.clients_rejected += 1
+            writer.write(self._response(503, b"Too many clients\n", "text/plain; charset=utf-8"))
+            await self._close(writer)
+            return
+
+        self.clients += 1
+        self.writers.add(writer)
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.request_timeout)
+            self.requests_total += 1
+            method, path, query, headers = self._parse_request(request)
+            if method not in ("GET", "HEAD"):
+                writer.write(self._response(405, b"", "text/plain"))
+            elif path == "/api/stream":
+                await self._stream(writer)
+            else:
+                try:
+                    response = await self._route(method, path, query, headers)
+                except Exception as e:
+                    self.server_errors += 1
+                    print(f"⚠️ Dashboard: error pada {path}: {e!r}")
+                    response = self._response(500, b"Internal Server Error\n", "text/plain; charset=utf-8")
+                writer.write(response)
+            await asyncio.wait_for(writer.drain(), self.send_timeout)
+        except asyncio.TimeoutError:
+            self.slow_clients_dropped += 1
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass  # Request rusak atau client menutup koneksi
+        finally:
+            self.clients -= 1
+            self.writers.discard(writer)
+            await self._close(writer)
+
+    @staticmethod
+    def _parse_request(request):
+        """(method, path, query dict, header dict huruf kecil) dari request HTTP mentah"""
+        lines = request.decode("latin-1").split("\r\n")
+        method, target, _ = lines[0].split(" ", 2)
+        path, _, query_string = target.partition("?")
+        headers = {}
+        for line in lines[1:]:
+            name, separator, value = line.partition(":")
+            if separator:
+                headers[name.strip().lower()] = value.strip()
+        return method, path, parse_qs(query_string), headers
+
+    async def _route(self, method, path, query, headers):
+        """Response lengkap (bytes) untuk request non-stream"""
+        head_only = method == "HEAD"
+        asset = self.static_assets.get(path)
+        if asset is not None:
+            return self._response(200, asset["body"], asset["content_type"], headers=headers,
+                                  etag=asset["etag"], mtime=asset["mtime"],
+                                  variants=asset["variants"], head_only=head_only)
+
+        if path == "/api/snapshot":
+            version, payload = self.hub.latest()
+            if self.snapshot_variants[0] != version:
+                self.snapshot_variants = (version, compress_variants(payload))
+            return self._response(200, payload, "application/json", headers=headers,
+                                  etag='W/"v%d"' % version, variants=self.snapshot_variants[1],
+                                  head_only=head_only)
+
+        if path == "/api/samples" and self.samples_source is not None:
+            try:
+                since = max(0, int(query.get("since", ["0"])[0]))
+                limit = min(int(query.get("limit", [MAX_SAMPLES_PER_REQUEST])[0]), MAX_SAMPLES_PER_REQUEST)
+            except ValueError:
+                return self._response(400, b"since/limit harus bilangan bulat\n", "text/plain; charset=utf-8")
+            result = self.samples_source(since, max(0, limit))
+            etag = 'W/"s%d-%d-%d"' % (result["latest_seq"], since, limit)
+            if self._not_modified(headers, etag):
+                return self._response(304, b"", "application/json", etag=etag)
+            body = json.dumps(result, separators=(",", ":")).encode("utf-8")
+            return self._response(200, body, "application/json", headers=headers, etag=etag,
+                                  variants=compress_variants(body), head_only=head_only)
+
+        if path in ("/api/history", "/api/history/cameras") and self.history_source is not None:
+            params = {key: values[0] for key, values in query.items()}
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    None, self.history_source, "cameras" if path.endswith("/cameras") else "query", params)
+            except ValueError as e:
+                return self._response(400, f"{e}\n".encode("utf-8"), "text/plain; charset=utf-8")
+            except LookupError:
+                return self._response(404, b"Riwayat tidak aktif\n", "text/plain; charset=utf-8")
+            body = json.dumps(result, separators=(",", ":")).encode("utf-8")
+            return self._response(200, body, "application/json", headers=headers,
+                                  variants=compress_variants(body), head_only=head_only)
+
+        if path == "/metrics" and self.metrics_source is not None:
+            text = await asyncio.get_running_loop().run_in_executor(None, self.metrics_source)
+            body = text.encode("utf-8")
+            return self._response(200, body, "text/plain; version=0.0.4; charset=utf-8", headers=headers,
+                                  variants=compress_variants(body), head_only=head_only)
+
+        return self._response(404, b"Not Found\n", "text/plain; charset=utf-8")
+
+    @staticmethod
+    def _etag_matches(header, etag):
+        """Perbandingan weak (RFC 9110) antara If-None-Match dan ETag"""
+        if header.strip() == "*":
+            return True
+        opaque = etag[2:] if etag.startswith("W/") else etag
+        for candidate in header.split(","):
+            candidate = candidate.strip()
+            if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+                return True
+        return False
+
+    @classmethod
+    def _not_modified(cls, headers, etag=None, mtime=None):
+        """True bila salinan di cache client masih valid (If-None-Match / If-Modified-Since)"""
+        if etag is not None and "if-none-match" in headers:
+            return cls._etag_matches(headers["if-none-match"], etag)
+        if mtime is not None and "if-modified-since" in headers:
+            try:
+                return mtime <= parsedate_to_datetime(headers["if-modified-since"]).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @classmethod
+    def _response(cls, status, body, content_type, headers=None, etag=None, mtime=None,
+                  variants=None, head_only=False):
+        """
+        Bangun response HTTP. headers = header request: dipakai untuk 304
+        (ETag / Last-Modified) dan memilih varian br/gzip dari Accept-Encoding.
+        """
+        extra = []
+        if etag is not None:
+            extra.append(f"ETag: {etag}\r\n")
+        if mtime is not None:
+            extra.append(f"Last-Modified: {formatdate(mtime, usegmt=True)}\r\n")
+
+        if headers is not None and status == 200 and cls._not_modified(headers, etag, mtime):
+            status, body = 304, b""
+        elif variants:
+            extra.append("Vary: Accept-Encoding\r\n")
+            accepted = accepted_encodings(headers.get("accept-encoding", "")) if headers else set()
+            for encoding in ("br", "gzip"):
+                if encoding in accepted and encoding in variants:
+                    body = variants[encoding]
+                    extra.append(f"Content-Encoding: {encoding}\r\n")
+                    break
+
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Cache-Control: no-cache\r\n"
+                + "".join(extra) +
+                "Connection: close\r\n\r\n")
+        return head.encode("latin-1") + (b"" if head_only else body)
+
+    async def _stream(self, writer):
+        """Server-Sent Events: kirim snapshot terbaru, versi antara digabung bila client lambat"""
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\n"
+                     b"Connection: keep-alive\r\n\r\n"
+                     b"retry: 2000\n\n")
+        self.stream_clients += 1
+        sent_version = 0
+        try:
+            while not self.closing:
+                version, payload = self.hub.latest()
+                if version > sent_version:
+                    if sent_version:
+                        self.events_coalesced += version - sent_version - 1
+                    writer.write(b"id: %d\ndata: " % version + payload + b"\n\n")
+                    sent_version = version
+                    # Menunggu di sini selama buffer client penuh; publish yang masuk
+                    # sementara itu hanya menaikkan version (tidak di-antre)
+                    await asyncio.wait_for(writer.drain(), self.send_timeout)
+                    self.events_sent += 1
+                    continue
+
+                try:
+                    await asyncio.wait_for(self.update_event.wait(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    writer.write(b": heartbeat\n\n")  # Jaga koneksi tetap hidup lewat proxy
+                    await asyncio.wait_for(writer.drain(), self.send_timeout)
+        finally:
+            self.stream_clients -= 1
+
+    @staticmethod
+    async def _close(writer):
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    def get_stats(self):
+        """Statistik koneksi untuk /metrics dan load test"""
+        return {
+            "clients": self.clients,
+            "stream_clients": self.stream_clients,
+            "requests_total": self.requests_total,
+            "events_sent": self.events_sent,
+            "events_coalesced": self.events_coalesced,
+            "clients_rejected": self.clients_rejected,
+            "slow_clients_dropped": self.slow_clients_dropped,
+            "server_errors": self.server_errors
+        }
@@ -0,0 +1,173 @@
+import random
+import time
+from types import SimpleNamespace
+
+
+class DetectorCascade:
+    """
+    Penjadwalan detector bertingkat: face detection selalu jalan, pose
+    detection (model paling mahal) hanya dipanggil saat face kosong.
+
+    Policy:
+    - "lazy_fallback"    : pose dipanggil setiap frame yang tidak ada wajah
+    - "fallback_every_n" : pose dipanggil tiap N frame tanpa wajah, di antaranya
+                           hasil pose terakhir dipakai ulang
+    - "face_only"        : pose tidak pernah dipanggil
+    """
+
+    POLICIES = ("lazy_fallback", "fallback_every_n", "face_only")
+
+    def __init__(self, face_detector, pose_factory, policy="lazy_fallback", fallback_every_n=5, metrics=None,
+                 face_factory=None):
+        self.face_detector = face_detector  # None -> dibuat lazy oleh face_factory
+        self.face_factory = face_factory
+        self.pose_factory = pose_factory  # Pose detector dibuat saat pertama kali dibutuhkan
+        self.pose_detector = None
+        self.policy = None
+        self.fallback_every_n = 1
+        self.set_policy(policy, fallback_every_n)
+
+        self.empty_face_frames = 0  # Frame berturut-turut tanpa wajah
+        self.last_pose_results = None
+
+        # Statistik pemanggilan model
+        self.face_calls = 0
+        self.pose_calls = 0
+        self.pose_skipped = 0
+
+        # Timer per detector (opsional, lihat metrics.PipelineMetrics)
+        self.face_timer = metrics.stage("face") if metrics is not None else None
+        self.pose_timer = metrics.stage("pose") if metrics is not None else None
+
+    def set_policy(self, policy, fallback_every_n=None):
+        """Ganti policy cascade (bisa saat runtime)"""
+        if policy not in self.POLICIES:
+            raise ValueError(f"Policy cascade tidak dikenal: {policy} (pilihan: {', '.join(self.POLICIES)})")
+        self.policy = policy
+        if fallback_every_n is not None:
+            self.fallback_every_n = max(1, int(fallback_every_n))
+
+    def get_face_detector(self):
+        """Face detector, dibuat saat pertama kali dibutuhkan bila belum ada"""
+        if self.face_detector is None:
+            self.face_detector = self.face_factory()
+        return self.face_detector
+
+    def get_pose_detector(self):
+        """Buat pose detector secara lazy"""
+        if self.pose_detector is None:
+            self.pose_detector = self.pose_factory()
+        return self.pose_detector
+
+    def reset_pose(self):
+        """Tutup pose detector supaya dibuat ulang oleh factory (misal setelah model_complexity diubah)"""
+        if self.pose_detector is not None:
+            self.pose_detector.close()
+            self.pose_detector = None
+        self.last_pose_results = None
+
+    def process(self, rgb_frame):
+        """Jalankan cascade, return (face_results, pose_results). pose_results bisa None"""
+        face_detector = self.get_face_detector()
+        start = time.perf_counter()
+        face_results = face_detector.process(rgb_frame)
+        if self.face_timer is not None:
+            self.face_timer.observe(time.perf_counter() - start)
+        self.face_calls += 1
+
+        if face_results.detections:
+            self.empty_face_frames = 0
+            self.last_pose_results = None
+            return face_results, None
+
+        if self.policy == "face_only":
+            return face_results, None
+
+        self.empty_face_frames += 1
+        if self.policy == "fallback_every_n" and (self.empty_face_frames - 1) % self.fallback_every_n != 0:
+            self.pose_skipped += 1
+            return face_results, self.last_pose_results
+
+        pose_detector = self.get_pose_detector()
+        start = time.perf_counter()
+        pose_results = pose_detector.process(rgb_frame)
+        if self.pose_timer is not None:
+            self.pose_timer.observe(time.perf_counter() - start)
+        self.pose_calls += 1
+        self.last_pose_results = pose_results
+        return face_results, pose_results
+
+    def get_stats(self):
+        """Jumlah pemanggilan tiap model"""
+        return {
+            "policy": self.policy,
+            "face_calls": self.face_calls,
+            "pose_calls": self.pose_calls,
+            "pose_skipped": self.pose_skipped,
+            "face_loaded": self.face_detector is not None,
+            "pose_loaded": self.pose_detector is not None
+        }
+
+    def close(self):
+        """Tutup semua detector yang sudah dibuat"""
+        if self.face_detector is not None:
+            self.face_detector.close()
+            self.face_detector = None
+        if self.pose_detector is not None:
+            self.pose_detector.close()
+            self.pose_detector = None
+
+
+class StubFaceDetector:
+    """
+    Pengganti FaceDetection MediaPipe yang deterministik (tanpa model), untuk
+    benchmark dan pengujian pipeline. Jumlah wajah mengikuti pola tetap per
+    frame, posisi box diturunkan dari seed + nomor frame.
+    delay_ms: simulasi waktu inference model (sleep melepas GIL seperti
+    inference MediaPipe di C++), untuk mengukur overlap mode pipeline.
+    """
+
+    DEFAULT_PATTERN = (0, 1, 2, 3, 5, 8, 5, 3, 2, 1)
+
+    def __init__(self, seed=0, pattern=DEFAULT_PATTERN, frames_per_step=15, delay_ms=0.0):
+        self.seed = seed
+        self.pattern = pattern
+        self.frames_per_step = frames_per_step
+        self.delay_ms = delay_ms
+        self.frame_index = 0
+
+    def process(self, rgb_frame):
+        """Return objek dengan struktur seperti hasil FaceDetection.process()"""
+        face_count = self.pattern[(self.frame_index // self.frames_per_step) % len(self.pattern)]
+        rng = random.Random(self.seed * 1000003 + self.frame_index)
+        self.frame_index += 1
+        if self.delay_ms:
+            time.sleep(self.delay_ms / 1000)
+
+        detections = []
+        for _ in range(face_count):
+            size = rng.uniform(0.08, 0.2)
+            bbox = SimpleNamespace(
+                xmin=rng.uniform(0.0, 1.0 - size),
+                ymin=rng.uniform(0.0, 1.0 - size),
+                width=size,
+                height=size
+            )
+            detections.append(SimpleNamespace(
+                location_data=SimpleNamespace(relative_bounding_box=bbox),
+                score=[round(rng.uniform(0.5, 0.99), 2)]
+            ))
+        return SimpleNamespace(detections=detections or None)
+
+    def close(self):
+        pass
+
+
+class StubPoseDetector:
+    """Pengganti Pose MediaPipe: tidak pernah menemukan landmark"""
+
+    def process(self, rgb_frame):
+        return SimpleNamespace(pose_landmarks=None)
+
+    def close(self):
+        pass
@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+
+
+class FrameBufferPool:
+    """
+    Buffer frame per kamera yang dipakai ulang antar frame: slot capture
+    (diisi lewat cap.read(image=...)), buffer flip, dan buffer salinan. Buffer
+    baru hanya dialokasikan saat resolusi berubah, sehingga loop frame dalam
+    kondisi stabil tidak mengalokasikan array baru.
+    """
+
+    def __init__(self, capture_slots=3):
+        # 3 slot: satu sedang ditulis thread capture, satu frame terbaru, satu sedang diproses
+        self.capture_slots = capture_slots
+        self.buffers = {}
+        self.allocations = 0  # Jumlah alokasi buffer (naik hanya saat resolusi berubah)
+
+    def buffer(self, name, shape, dtype=np.uint8):
+        """Buffer bernama dengan shape tertentu, dialokasikan ulang hanya bila shape berubah"""
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self.buffers[name] = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+        return buffer
+
+    def read(self, cap, slot=0):
+        """
+        cap.read() ke slot capture. Frame pertama (shape belum diketahui) dan
+        frame setelah resolusi berubah disalin ke slot baru; sisanya di-decode
+        langsung ke buffer slot.
+        """
+        name = f"capture{slot}"
+        buffer = self.buffers.get(name)
+        if buffer is None:
+            ret, frame = cap.read()
+        else:
+            ret, frame = cap.read(image=buffer)
+        if not ret:
+            return False, None
+        if frame is not buffer:
+            buffer = self.buffer(name, frame.shape, frame.dtype)
+            np.copyto(buffer, frame)
+        return True, buffer
+
+    def copy(self, frame, name="copy"):
+        """Salin frame ke buffer (misal frame dari clip di memori yang tidak boleh ikut digambari)"""
+        buffer = self.buffer(name, frame.shape, frame.dtype)
+        np.copyto(buffer, frame)
+        return buffer
+
+    def flip(self, frame, flip_code=1):
+        """cv2.flip ke buffer flip (default mirror horizontal)"""
+        return cv2.flip(frame, flip_code, dst=self.buffer("flip", frame.shape, frame.dtype))
+
+    def get_stats(self):
+        return {
+            "buffers": len(self.buffers),
+            "allocations": self.allocations,
+            "bytes": sum(buffer.nbytes for buffer in self.buffers.values())
+        }
@@ -0,0 +1,122 @@
+import threading
+import time
+
+
+class LatestFrameCapture:
+    """
+    Thread capture terpisah: terus decode dari cv2.VideoCapture dan hanya
+    menyimpan frame terbaru (latest-frame slot). Frame lama yang belum sempat
+    diproses akan dibuang supaya count tidak tertinggal dari kondisi nyata.
+
+    Dengan buffer_pool (FrameBufferPool), frame di-decode langsung ke salah
+    satu slot yang dipakai ulang: slot yang sedang ditulis tidak pernah sama
+    dengan frame terbaru maupun frame yang sedang diproses loop utama. Frame
+    dari read() berlaku sampai read() berikutnya.
+    """
+
+    def __init__(self, cap, metrics=None, buffer_pool=None):
+        self.cap = cap
+        self.capture_timer = metrics.stage("capture") if metrics is not None else None
+        self.buffer_pool = buffer_pool
+
+        # Latest-frame slot
+        self.condition = threading.Condition()
+        self.frame = None
+        self.frame_slot = None  # Slot buffer frame terbaru (mode buffer_pool)
+        self.held_slot = None  # Slot buffer yang sedang dipakai loop proses
+        self.frame_time = 0.0
+        self.frame_seq = 0       # Nomor urut frame terakhir yang di-decode
+        self.consumed_seq = 0    # Nomor urut frame terakhir yang diambil loop proses
+
+        # Thread state
+        self.thread = None
+        self.running = False
+        self.ended = False
+
+        # Statistik per-stage
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.frames_delivered = 0
+        self.read_failures = 0
+
+    def start(self):
+        """Mulai thread capture"""
+        if self.running:
+            return self
+        self.running = True
+        self.ended = False
+        self.thread = threading.Thread(target=self._capture_loop, name="frame-capture", daemon=True)
+        self.thread.start()
+        return self
+
+    def _capture_loop(self):
+        """Loop decode: selalu timpa slot dengan frame terbaru"""
+        while self.running:
+            read_start = time.perf_counter()
+            if self.buffer_pool is not None:
+                with self.condition:
+                    slot = next(index for index in range(self.buffer_pool.capture_slots)
+                                if index not in (self.frame_slot, self.held_slot))
+                ret, frame = self.buffer_pool.read(self.cap, slot)
+            else:
+                slot = None
+                ret, frame = self.cap.read()
+            capture_time = time.time()
+            if self.capture_timer is not None:
+                self.capture_timer.observe(time.perf_counter() - read_start)
+
+            with self.condition:
+                if not ret:
+                    self.read_failures += 1
+                    self.ended = True
+                    self.running = False
+                    self.condition.notify_all()
+                    break
+
+                # Frame sebelumnya belum diambil -> dianggap drop
+                if self.frame_seq > self.consumed_seq:
+                    self.frames_dropped += 1
+
+                self.frame = frame
+                self.frame_slot = slot
+                self.frame_time = capture_time
+                self.frame_seq += 1
+                self.frames_captured += 1
+                self.condition.notify_all()
+
+    def read(self, timeout=5.0):
+        """
+        Ambil frame terbaru yang belum pernah diproses.
+        Return (ret, frame, capture_time) seperti cap.read() plus waktu capture.
+        """
+        with self.condition:
+            has_new = self.condition.wait_for(
+                lambda: self.frame_seq > self.consumed_seq or self.ended,
+                timeout
+            )
+            if not has_new or self.frame_seq == self.consumed_seq:
+                return False, None, None
+
+            self.consumed_seq = self.frame_seq
+            self.held_slot = self.frame_slot
+            self.frames_delivered += 1
+            return True, self.frame, self.frame_time
+
+    def stop(self):
+        """Hentikan thread capture"""
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    def get_stats(self):
+        """Counter capture untuk analytics"""
+        with self.condition:
+            return {
+                "frames_captured": self.frames_captured,
+                "frames_dropped": self.frames_dropped,
+                "frames_delivered": self.frames_delivered,
+                "read_failures": self.read_failures
+            }
@@ -0,0 +1,266 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from session_store import SessionStore
+
+
+RESOLUTIONS = ("minute", "hour", "day")
+DEFAULT_CAMERA = "default"
+MAX_QUERY_BUCKETS = 100000
+
+SESSION_FILE_PATTERN = re.compile(r"^people_counter_log_(?:(.+)_)?\d{8}_\d{6}\.json$")
+
+
+def bucket_starts(timestamp):
+    """Awal bucket menit/jam/hari (waktu lokal) untuk satu timestamp"""
+    moment = datetime.fromtimestamp(timestamp)
+    hour = moment.replace(minute=0, second=0, microsecond=0)
+    return {
+        "minute": int(timestamp // 60 * 60),
+        "hour": int(hour.timestamp()),
+        "day": int(hour.replace(hour=0).timestamp())
+    }
+
+
+def parse_time(value):
+    """Epoch detik dari angka epoch atau 'YYYY-MM-DD[ HH:MM[:SS]]'"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"Format waktu tidak dikenali: {value}")
+
+
+class HistoryStore:
+    """
+    Riwayat count lintas session di SQLite (mode WAL): agregat per bucket
+    menit/jam/hari per kamera dengan primary key (camera, resolution,
+    bucket_start), sehingga query rentang berapa pun hanya membaca bucket
+    di rentang itu (range scan index), bukan sampel mentah.
+    """
+
+    def __init__(self, path="sessions/history.db"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Satu koneksi dipakai thread writer session dan thread server, dijaga lock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    camera TEXT NOT NULL,
+                    resolution TEXT NOT NULL,
+                    bucket_start INTEGER NOT NULL,
+                    samples INTEGER NOT NULL,
+                    total INTEGER NOT NULL,
+                    max_count INTEGER NOT NULL,
+                    min_count INTEGER NOT NULL,
+                    PRIMARY KEY (camera, resolution, bucket_start)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS imported_files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    samples INTEGER NOT NULL
+                );
+            """)
+            self.connection.commit()
+
+    def add_samples(self, camera, samples):
+        """
+        Tambah sampel (iterable (timestamp, count)) ke bucket menit/jam/hari.
+        Sampel di-agregasi dulu di memori, lalu satu upsert per bucket.
+        """
+        camera = camera or DEFAULT_CAMERA
+        aggregates = {}
+        added = 0
+        for timestamp, count in samples:
+            for resolution, start in bucket_starts(timestamp).items():
+                bucket = aggregates.get((resolution, start))
+                if bucket is None:
+                    aggregates[(resolution, start)] = [1, count, count, count]
+                else:
+                    bucket[0] += 1
+                    bucket[1] += count
+                    bucket[2] = max(bucket[2], count)
+                    bucket[3] = min(bucket[3], count)
+            added += 1
+        if not aggregates:
+            return 0
+
+        rows = [(camera, resolution, start, n, total, maximum, minimum)
+                for (resolution, start), (n, total, maximum, minimum) in aggregates.items()]
+        with self.lock:
+            self.connection.executemany("""
+                INSERT INTO buckets (camera, resolution, bucket_start, samples, total, max_count, min_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (camera, resolution, bucket_start) DO UPDATE SET
+                    samples = samples + excluded.samples,
+                    total = total + excluded.total,
+                    max_count = MAX(max_count, excluded.max_count),
+                    min_count = MIN(min_count, excluded.min_count)
+            """, rows)
+            self.connection.commit()
+        return added
+
+    def query(self, camera=None, resolution="hour", start=None, end=None):
+        """
+        Bucket di rentang [start, end) (epoch detik; bucket dipilih berdasarkan
+        awal bucket) plus ringkasan seluruh rentang: max, min, rata-rata
+        tertimbang jumlah sampel, dan bucket puncak.
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution harus salah satu dari {', '.join(RESOLUTIONS)}")
+        camera = camera or DEFAULT_CAMERA
+        start = int(start) if start is not None else 0
+        end = int(end) if end is not None else 2 ** 62
+
+        started = time.perf_counter()
+        with self.lock:
+            rows = self.connection.execute("""
+                SELECT bucket_start, samples, total, max_count, min_count FROM buckets
+                WHERE camera = ? AND resolution = ? AND bucket_start >= ? AND bucket_start < ?
+                ORDER BY bucket_start LIMIT ?
+            """, (camera, resolution, start, end, MAX_QUERY_BUCKETS)).fetchall()
+
+        buckets = [{
+            "start": datetime.fromtimestamp(bucket_start).strftime("%Y-%m-%d %H:%M:%S"),
+            "avg": round(total / samples, 2),
+            "max": maximum,
+            "min": minimum,
+            "samples": samples
+        } for bucket_start, samples, total, maximum, minimum in rows]
+
+        summary = {"buckets": len(rows), "samples": 0, "avg": 0.0, "max": 0, "min": 0, "peak_bucket": None}
+        if rows:
+            samples = sum(row[1] for row in rows)
+            peak = max(rows, key=lambda row: row[3])
+            summary.update({
+                "samples": samples,
+                "avg": round(sum(row[2] for row in rows) / samples, 2),
+                "max": peak[3],
+                "min": min(row[4] for row in rows),
+                "peak_bucket": datetime.fromtimestamp(peak[0]).strftime("%Y-%m-%d %H:%M:%S")
+            })
+        return {
+            "camera": camera,
+            "resolution": resolution,
+            "summary": summary,
+            "buckets": buckets,
+            "truncated": len(rows) == MAX_QUERY_BUCKETS,
+            "query_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def cameras(self):
+        """Kamera yang punya riwayat + rentang waktunya"""
+        with self.lock:
+            rows = self.connection.execute("""
+                SELECT camera, MIN(bucket_start), MAX(bucket_start), SUM(samples) FROM buckets
+                WHERE resolution = 'day' GROUP BY camera ORDER BY camera
+            """).fetchall()
+        return [{
+            "camera": camera,
+            "first_day": datetime.fromtimestamp(first).strftime("%Y-%m-%d"),
+            "last_day": datetime.fromtimestamp(last).strftime("%Y-%m-%d"),
+            "samples": samples
+        } for camera, first, last, samples in rows]
+
+    def import_file(self, path, camera=None):
+        """
+        Import satu file session lama (people_counter_log_*.json) atau segmen
+        JSONL. File yang sudah diimport (ukuran + mtime sama) dilewati;
+        session JSON yang sampelnya sudah tercatat live juga dilewati.
+        Return jumlah sampel yang ditambahkan.
+        """
+        size = os.path.getsize(path)
+        mtime = os.path.getmtime(path)
+        key = os.path.abspath(path)
+        with self.lock:
+            row = self.connection.execute("SELECT size, mtime FROM imported_files WHERE path = ?", (key,)).fetchone()
+        if row is not None and row[0] == size and row[1] == mtime:
+            return 0
+
+        if path.endswith(".jsonl"):
+            header, records = SessionStore.read_segment(path)
+            header = header or {}
+            camera = camera or header.get("camera_id")
+            samples = [] if header.get("history_recorded") else [(record["ts"], record["count"]) for record in records]
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                session = json.load(f)
+            if session.get("history_recorded"):
+                samples = []
+            else:
+                match = SESSION_FILE_PATTERN.match(os.path.basename(path))
+                camera = camera or (match.group(1) if match else None)
+                samples = [(parse_time(point["timestamp"]), point["count"])
+                           for point in session.get("data_points", [])]
+
+        added = self.add_samples(camera, samples)
+        with self.lock:
+            self.connection.execute("""
+                INSERT OR REPLACE INTO imported_files (path, size, mtime, samples) VALUES (?, ?, ?, ?)
+            """, (key, size, mtime, added))
+            self.connection.commit()
+        return added
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Riwayat count lintas session (import + query)")
+    parser.add_argument("--db", default="sessions/history.db", help="File database riwayat")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Import file session JSON lama / segmen JSONL")
+    import_parser.add_argument("files", nargs="+", help="File atau pola glob, misal people_counter_log_*.json")
+    import_parser.add_argument("--camera", help="ID kamera (default: dari nama file / header segmen)")
+
+    query_parser = subparsers.add_parser("query", help="Agregat per bucket pada rentang waktu")
+    query_parser.add_argument("--camera", default=DEFAULT_CAMERA)
+    query_parser.add_argument("--resolution", choices=RESOLUTIONS, default="hour")
+    query_parser.add_argument("--start", help="'YYYY-MM-DD[ HH:MM[:SS]]' atau epoch")
+    query_parser.add_argument("--end", help="'YYYY-MM-DD[ HH:MM[:SS]]' atau epoch (eksklusif)")
+
+    subparsers.add_parser("cameras", help="Daftar kamera yang punya riwayat")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.db)
+    if args.command == "import":
+        total = 0
+        for pattern in args.files:
+            for path in sorted(glob.glob(pattern)) or [pattern]:
+                try:
+                    added = store.import_file(path, args.camera)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"⚠️ Gagal import {path}: {e}")
+                    continue
+                total += added
+                print(f"✓ {path}: {added} sampel")
+        print(f"📥 Total {total} sampel diimport ke {args.db}")
+    elif args.command == "query":
+        result = store.query(args.camera, args.resolution, parse_time(args.start), parse_time(args.end))
+        print(json.dumps(result, indent=2))
+    else:
+        print(json.dumps(store.cameras(), indent=2))
+    store.close()
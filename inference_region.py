@@ -0,0 +1,227 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+
+DEFAULT_CANDIDATE_WIDTHS = (960, 640, 480, 384, 320, 256, 192)
+
+
+class InferenceRegions:
+    """
+    Menyiapkan input detector: crop ROI (misal area pintu) lalu downscale ke
+    inference_width sebelum konversi warna, sehingga detector dan cvtColor
+    hanya memproses piksel yang dibutuhkan. Setiap input membawa rect ROI di
+    koordinat frame penuh untuk memetakan box relatif kembali (map_box).
+
+    rois: list [x, y, w, h] dalam fraksi 0..1 dari frame penuh; kosong = seluruh frame
+    inference_width: lebar maksimum input detector (piksel), None = resolusi asli
+    reuse_buffers: hasil resize/RGB ditulis ke buffer per ROI yang dipakai ulang
+                   (input hanya berlaku sampai prepare() berikutnya)
+    """
+
+    def __init__(self, inference_width=None, rois=None, reuse_buffers=False):
+        self.inference_width = int(inference_width) if inference_width else None
+        self.rois = [tuple(float(v) for v in roi) for roi in (rois or [])]
+        for x, y, w, h in self.rois:
+            if w <= 0 or h <= 0 or x < 0 or y < 0 or x + w > 1.0001 or y + h > 1.0001:
+                raise ValueError(f"ROI harus berupa fraksi [x, y, w, h] di dalam frame: {[x, y, w, h]}")
+        self.reuse_buffers = reuse_buffers
+        self.frame_size = None
+        self.regions = []  # (rect piksel, ukuran input, interpolasi), dihitung ulang bila ukuran frame berubah
+        self.buffers = []  # (buffer resize, buffer RGB) per ROI bila reuse_buffers
+
+    @property
+    def is_identity(self):
+        """True bila input detector = frame penuh tanpa crop maupun resize"""
+        return not self.rois and self.inference_width is None
+
+    def _plan(self, width, height):
+        """Hitung rect piksel tiap ROI dan ukuran input detector untuk ukuran frame ini"""
+        self.frame_size = (width, height)
+        self.regions = []
+        for x, y, w, h in (self.rois or [(0.0, 0.0, 1.0, 1.0)]):
+            left = int(round(x * width))
+            top = int(round(y * height))
+            right = min(width, int(round((x + w) * width)))
+            bottom = min(height, int(round((y + h) * height)))
+            roi_width, roi_height = max(1, right - left), max(1, bottom - top)
+            scale = min(1.0, self.inference_width / roi_width) if self.inference_width else 1.0
+            input_size = (max(1, int(round(roi_width * scale))), max(1, int(round(roi_height * scale))))
+            # INTER_AREA cepat hanya untuk faktor bulat (2x, 3x, ...); faktor pecahan pakai INTER_LINEAR
+            factor = roi_width / input_size[0]
+            interpolation = cv2.INTER_AREA if abs(factor - round(factor)) < 1e-6 else cv2.INTER_LINEAR
+            self.regions.append(((left, top, roi_width, roi_height), input_size, interpolation))
+        if self.reuse_buffers:
+            self.buffers = [(np.empty((size[1], size[0], 3), dtype=np.uint8),
+                             np.empty((size[1], size[0], 3), dtype=np.uint8)) for _, size, _ in self.regions]
+
+    def plan(self, frame_shape):
+        """Rencanakan ROI untuk ukuran frame ini (hanya dihitung ulang bila ukurannya berubah)"""
+        height, width = frame_shape[:2]
+        if self.frame_size != (width, height):
+            self._plan(width, height)
+
+    def prepare(self, frame, rgb_frame=None):
+        """
+        List (rgb_input, rect) untuk detector. rgb_frame (frame penuh yang sudah
+        RGB) dipakai langsung bila tidak ada crop/resize.
+        """
+        self.plan(frame.shape)
+
+        inputs = []
+        for index, ((left, top, roi_width, roi_height), input_size, interpolation) in enumerate(self.regions):
+            if rgb_frame is not None and self.is_identity:
+                inputs.append((rgb_frame, (left, top, roi_width, roi_height)))
+                continue
+            resized, rgb = self.buffers[index] if self.reuse_buffers else (None, None)
+            crop = frame[top:top + roi_height, left:left + roi_width]
+            if input_size != (roi_width, roi_height):
+                crop = cv2.resize(crop, input_size, dst=resized, interpolation=interpolation)
+            inputs.append((cv2.cvtColor(crop, cv2.COLOR_BGR2RGB, dst=rgb), (left, top, roi_width, roi_height)))
+        return inputs
+
+    @staticmethod
+    def map_box(bbox, rect, frame_width, frame_height):
+        """Box relatif (terhadap input detector) -> (x, y, w, h) piksel frame penuh, di-clip ke frame"""
+        left, top, roi_width, roi_height = rect
+        x = max(0, int(left + bbox.xmin * roi_width))
+        y = max(0, int(top + bbox.ymin * roi_height))
+        w = min(frame_width - x, int(bbox.width * roi_width))
+        h = min(frame_height - y, int(bbox.height * roi_height))
+        return x, y, w, h
+
+    @staticmethod
+    def map_landmarks(landmarks, rect, frame_width, frame_height):
+        """Landmark pose relatif crop -> relatif frame penuh (salinan, aslinya tidak diubah)"""
+        left, top, roi_width, roi_height = rect
+        if (left, top, roi_width, roi_height) == (0, 0, frame_width, frame_height):
+            return landmarks
+        mapped = type(landmarks)()
+        mapped.CopyFrom(landmarks)
+        for landmark in mapped.landmark:
+            landmark.x = (left + landmark.x * roi_width) / frame_width
+            landmark.y = (top + landmark.y * roi_height) / frame_height
+        return mapped
+
+    def pixel_rects(self):
+        """Rect ROI di koordinat frame penuh (untuk digambar di UI)"""
+        return [region[0] for region in self.regions] if self.rois else []
+
+
+def box_iou(a, b):
+    """IoU dua box (x, y, w, h)"""
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    union = a[2] * a[3] + b[2] * b[3] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def merge_overlapping(boxes, scores, iou_threshold=0.5):
+    """Buang deteksi ganda dari ROI yang saling tumpang tindih (simpan skor tertinggi)"""
+    order = sorted(range(len(boxes)), key=lambda i: scores[i], reverse=True)
+    kept = []
+    for i in order:
+        if all(box_iou(boxes[i], boxes[j]) < iou_threshold for j in kept):
+            kept.append(i)
+    kept.sort()
+    return [boxes[i] for i in kept], [scores[i] for i in kept]
+
+
+def detect_boxes(face_detector, regions, frame):
+    """Box wajah (koordinat frame penuh) dari satu frame dengan konfigurasi regions"""
+    height, width = frame.shape[:2]
+    boxes, scores = [], []
+    for rgb_input, rect in regions.prepare(frame):
+        results = face_detector.process(rgb_input)
+        for detection in results.detections or []:
+            boxes.append(regions.map_box(detection.location_data.relative_bounding_box, rect, width, height))
+            scores.append(detection.score[0] if detection.score else 0.0)
+    return merge_overlapping(boxes, scores) if len(regions.regions) > 1 else (boxes, scores)
+
+
+def calibrate_inference_width(face_detector, frames, rois=None, candidates=DEFAULT_CANDIDATE_WIDTHS,
+                              tolerance=0.05, iou_threshold=0.3):
+    """
+    Pilih inference_width terkecil yang recall-nya (terhadap deteksi pada
+    resolusi penuh) masih >= 1 - tolerance pada clip kalibrasi. Box dianggap
+    cocok bila IoU >= iou_threshold dengan box referensi.
+    Return (lebar terpilih atau None = resolusi penuh, hasil per kandidat).
+    Clip tanpa wajah sama sekali tidak bisa dipakai mengukur recall -> None.
+    """
+    reference_regions = InferenceRegions(None, rois)
+    reference = [detect_boxes(face_detector, reference_regions, frame)[0] for frame in frames]
+    reference_total = sum(len(boxes) for boxes in reference)
+    frame_width = frames[0].shape[1]
+
+    results = []
+    chosen = None
+    if reference_total == 0:
+        return None, {"reference_boxes": 0, "candidates": results}
+    for width in sorted(set(candidates), reverse=True):
+        if width >= frame_width:
+            continue
+        regions = InferenceRegions(width, rois)
+        matched = 0
+        started = time.perf_counter()
+        for frame, expected in zip(frames, reference):
+            found, _ = detect_boxes(face_detector, regions, frame)
+            unused = list(found)
+            for box in expected:
+                best = max(unused, key=lambda candidate: box_iou(box, candidate), default=None)
+                if best is not None and box_iou(box, best) >= iou_threshold:
+                    matched += 1
+                    unused.remove(best)
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(frames)
+        recall = matched / reference_total
+        results.append({"width": width, "recall": round(recall, 4), "ms_per_frame": round(elapsed_ms, 2)})
+        if recall >= 1.0 - tolerance:
+            chosen = width
+        else:
+            break  # Lebar lebih kecil hampir pasti lebih buruk
+    return chosen, {"reference_boxes": reference_total, "candidates": results}
+
+
+def load_calibration_frames(video_path, max_frames=300, stride=5):
+    """Ambil frame tiap `stride` dari clip kalibrasi"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Tidak dapat membuka clip kalibrasi: {video_path}")
+    frames = []
+    index = 0
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % stride == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    if not frames:
+        raise IOError(f"Clip kalibrasi kosong: {video_path}")
+    return frames
+
+
+if __name__ == "__main__":
+    import json
+    import mediapipe as mp
+
+    parser = argparse.ArgumentParser(description="Kalibrasi inference_width terkecil dengan recall dalam toleransi")
+    parser.add_argument("video", help="Clip kalibrasi (rekaman dari kamera yang sama)")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="Penurunan recall maksimum (0.05 = 5%%)")
+    parser.add_argument("--roi", action="append", default=[], help="ROI 'x,y,w,h' (fraksi 0..1), bisa berulang")
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--stride", type=int, default=5, help="Ambil setiap N frame")
+    args = parser.parse_args()
+
+    rois = [[float(v) for v in roi.split(",")] for roi in args.roi]
+    clip = load_calibration_frames(args.video, args.max_frames, args.stride)
+    detector = mp.solutions.face_detection.FaceDetection(model_selection=0, min_detection_confidence=0.4)
+    width, report = calibrate_inference_width(detector, clip, rois, tolerance=args.tolerance)
+    detector.close()
+    print(json.dumps(report, indent=2))
+    if not report["reference_boxes"]:
+        print("⚠️ Tidak ada wajah terdeteksi di clip kalibrasi, recall tidak bisa diukur")
+    print(f"✓ inference_width yang disarankan: {width if width else 'resolusi penuh (None)'}")
@@ -0,0 +1,174 @@
+import warnings
+
+import cv2
+import numpy as np
+
+
+class KeyframeTracker:
+    """
+    Keyframe inference: detector hanya dijalankan setiap K frame, di antaranya
+    box wajah dibawa maju dengan sparse optical flow (Lucas-Kanade) pada titik
+    di dalam box. Bila titik gagal di-track, box bergerak dengan model
+    constant-velocity. K menyesuaikan diri dengan besarnya gerakan di scene.
+    """
+
+    def __init__(self, min_interval=1, max_interval=5, motion_low=0.5, motion_high=3.0, track_width=320):
+        self.min_interval = max(1, int(min_interval))
+        self.max_interval = max(self.min_interval, int(max_interval))
+        self.motion_low = motion_low    # px/frame (resolusi tracking) -> scene tenang, K naik
+        self.motion_high = motion_high  # px/frame (resolusi tracking) -> scene ramai, K turun
+        self.track_width = track_width
+
+        self.interval = self.min_interval
+        self.motion = 0.0  # Estimasi gerakan scene (EMA, px/frame)
+
+        # State tracking
+        self.prev_gray = None
+        self.boxes = np.empty((0, 4), dtype=np.float32)      # x, y, w, h (resolusi penuh)
+        self.velocity = np.empty((0, 2), dtype=np.float32)   # dx, dy per frame
+        self.person_count = 0
+        self.frames_since_keyframe = 0
+        self.frame_size = None
+
+        # Grid titik global untuk estimasi gerakan scene
+        self.grid_points = None
+        self.grid_shape = None
+
+        # Statistik
+        self.keyframes = 0
+        self.tracked_frames = 0
+
+    def _prepare_gray(self, frame):
+        """Downscale + grayscale untuk optical flow"""
+        height, width = frame.shape[:2]
+        self.frame_size = (width, height)
+        scale = min(1.0, self.track_width / float(width))
+        if scale < 1.0:
+            small = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        else:
+            small = frame
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        if self.grid_shape != gray.shape:
+            gh, gw = gray.shape
+            xs, ys = np.meshgrid(np.linspace(gw * 0.1, gw * 0.9, 8), np.linspace(gh * 0.1, gh * 0.9, 6))
+            self.grid_points = np.stack([xs.ravel(), ys.ravel()], axis=1).astype(np.float32)
+            self.grid_shape = gray.shape
+            self.prev_gray = None  # Resolusi berubah -> mulai ulang
+
+        return gray, scale
+
+    def _box_points(self, scale):
+        """3x3 titik di dalam setiap box, shape (n, 9, 2) pada resolusi tracking"""
+        fractions = np.array([0.25, 0.5, 0.75], dtype=np.float32)
+        fx, fy = np.meshgrid(fractions, fractions)
+        fx, fy = fx.ravel(), fy.ravel()
+        b = self.boxes * scale
+        px = b[:, 0:1] + b[:, 2:3] * fx
+        py = b[:, 1:2] + b[:, 3:4] * fy
+        return np.stack([px, py], axis=2)
+
+    def _flow(self, gray, points):
+        """Lucas-Kanade dari prev_gray ke gray, return (displacement, valid)"""
+        new_points, status, _ = cv2.calcOpticalFlowPyrLK(
+            self.prev_gray, gray, points.reshape(-1, 1, 2), None,
+            winSize=(15, 15), maxLevel=2
+        )
+        displacement = new_points.reshape(-1, 2) - points.reshape(-1, 2)
+        return displacement, status.ravel() == 1
+
+    def _update_motion(self, displacement, valid):
+        """Update estimasi gerakan scene dari titik grid"""
+        if not np.any(valid):
+            return
+        magnitude = np.hypot(displacement[valid, 0], displacement[valid, 1])
+        self.motion = 0.5 * self.motion + 0.5 * float(np.percentile(magnitude, 90))
+
+    def _adapt_interval(self):
+        """Scene ramai -> K turun cepat (setengah), scene tenang -> K naik perlahan"""
+        if self.motion > self.motion_high:
+            self.interval = max(self.min_interval, self.interval // 2)
+        elif self.motion < self.motion_low:
+            self.interval = min(self.max_interval, self.interval + 1)
+
+    def needs_detection(self):
+        """True jika frame berikutnya harus menjalankan detector (keyframe)"""
+        return self.prev_gray is None or self.frames_since_keyframe >= self.interval - 1
+
+    def update_detections(self, frame, detected_faces, person_count):
+        """Simpan hasil detector dari keyframe sebagai titik awal tracking"""
+        gray, _ = self._prepare_gray(frame)
+
+        # Tetap ukur gerakan scene supaya K bisa naik dari nilai minimum
+        if self.prev_gray is not None:
+            displacement, valid = self._flow(gray, self.grid_points)
+            self._update_motion(displacement, valid)
+
+        self.boxes = np.array(detected_faces, dtype=np.float32).reshape(-1, 4)
+        self.velocity = np.zeros((len(self.boxes), 2), dtype=np.float32)
+        self.person_count = person_count
+        self.prev_gray = gray
+        self.frames_since_keyframe = 0
+        self.keyframes += 1
+        self._adapt_interval()
+
+    def track(self, frame):
+        """Bawa box maju ke frame sekarang tanpa detector, return (person_count, detected_faces)"""
+        gray, scale = self._prepare_gray(frame)
+        if self.prev_gray is None:
+            # Resolusi berubah di tengah jalan, tidak bisa di-track
+            self.prev_gray = gray
+            return self.person_count, self._boxes_as_tuples()
+
+        n_boxes = len(self.boxes)
+        n_grid = len(self.grid_points)
+        points = self.grid_points
+        if n_boxes:
+            points = np.concatenate([points, self._box_points(scale).reshape(-1, 2)])
+
+        displacement, valid = self._flow(gray, points)
+        self._update_motion(displacement[:n_grid], valid[:n_grid])
+
+        if n_boxes:
+            box_disp = displacement[n_grid:].reshape(n_boxes, 9, 2)
+            box_valid = valid[n_grid:].reshape(n_boxes, 9)
+            masked = np.where(box_valid[:, :, None], box_disp, np.nan)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                median_disp = np.nanmedian(masked, axis=1) / scale
+
+            # Box tanpa titik valid -> constant velocity
+            lost = np.isnan(median_disp[:, 0])
+            median_disp[lost] = self.velocity[lost]
+            self.velocity = median_disp.astype(np.float32)
+            self.boxes[:, 0:2] += self.velocity
+
+            width, height = self.frame_size
+            self.boxes[:, 0] = np.clip(self.boxes[:, 0], 0, width - 1)
+            self.boxes[:, 1] = np.clip(self.boxes[:, 1], 0, height - 1)
+
+        self.prev_gray = gray
+        self.frames_since_keyframe += 1
+        self.tracked_frames += 1
+        self._adapt_interval()
+
+        return self.person_count, self._boxes_as_tuples()
+
+    def _boxes_as_tuples(self):
+        """Box (x, y, w, h) integer, di-clamp ke ukuran frame seperti hasil detector"""
+        width, height = self.frame_size
+        faces = []
+        for x, y, w, h in self.boxes.astype(int):
+            faces.append((int(x), int(y), int(min(width - x, w)), int(min(height - y, h))))
+        return faces
+
+    def get_stats(self):
+        """Statistik keyframe vs frame hasil tracking"""
+        total = self.keyframes + self.tracked_frames
+        return {
+            "interval": self.interval,
+            "scene_motion": round(self.motion, 2),
+            "keyframes": self.keyframes,
+            "tracked_frames": self.tracked_frames,
+            "inference_ratio": round(self.keyframes / total, 3) if total else 1.0
+        }
@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import socket
+import time
+
+from benchmark import build_counter, synthetic_clip
+
+
+async def sse_client(host, port, stats, slow=False, read_delay=0.0):
+    """
+    Satu viewer SSE (uji backpressure dengan buffer terima kecil):
+    - slow=True: tidak pernah membaca -> buffer server penuh, client diputus setelah send_timeout
+    - read_delay > 0: membaca 4 KB lalu tidur read_delay detik -> lebih lambat dari publish,
+      sehingga server menggabungkan versi yang terlewat
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if slow or read_delay:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    try:
+        await asyncio.get_running_loop().sock_connect(sock, (host, port))
+        # StreamReader menampung sampai 2x limit sebelum berhenti membaca socket (default 128 KB)
+        reader, writer = await asyncio.open_connection(sock=sock, limit=4096 if slow or read_delay else 2 ** 16)
+        writer.write(f"GET /api/stream HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+        await writer.drain()
+        status = await reader.readline()
+    except OSError:
+        stats["errors"] += 1
+        return
+    if b" 200 " not in status:
+        stats["rejected"] += 1
+        return
+
+    stats["connected"] += 1
+    if slow:
+        await asyncio.Event().wait()  # Diam sampai task dibatalkan
+    events = 0
+    while True:
+        if read_delay:
+            chunk = await reader.read(4096)
+            if not chunk:
+                stats["disconnected"] += 1
+                break
+            await asyncio.sleep(read_delay)
+            continue
+        line = await reader.readline()
+        if not line:
+            stats["disconnected"] += 1
+            break
+        if line.startswith(b"id: "):
+            events += 1
+            stats["events"] += 1
+            stats["max_events_per_client"] = max(stats["max_events_per_client"], events)
+
+
+async def snapshot_poller(host, port, stats, interval):
+    """Client yang polling /api/snapshot seperti dashboard tanpa SSE"""
+    while True:
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(f"GET /api/snapshot HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            if b" 200 " in response.split(b"\r\n", 1)[0]:
+                stats["polls"] += 1
+                stats["poll_ms"].append((time.perf_counter() - started) * 1000)
+            else:
+                stats["rejected"] += 1
+        except OSError:
+            stats["errors"] += 1
+        await asyncio.sleep(interval)
+
+
+async def run_clients(host, port, sse_clients, slow_clients, pollers, poll_interval, duration, ready=None,
+                      lagging_clients=0, read_delay=0.2):
+    stats = {"connected": 0, "rejected": 0, "errors": 0, "disconnected": 0, "events": 0,
+             "max_events_per_client": 0, "polls": 0, "poll_ms": []}
+    tasks = [asyncio.create_task(sse_client(host, port, stats)) for _ in range(sse_clients)]
+    tasks += [asyncio.create_task(sse_client(host, port, stats, slow=True)) for _ in range(slow_clients)]
+    tasks += [asyncio.create_task(sse_client(host, port, stats, read_delay=read_delay))
+              for _ in range(lagging_clients)]
+    tasks += [asyncio.create_task(snapshot_poller(host, port, stats, poll_interval)) for _ in range(pollers)]
+
+    # Tunggu semua stream tersambung (atau ditolak) sebelum mulai mengukur
+    streams = sse_clients + slow_clients + lagging_clients
+    deadline = time.time() + 10
+    while (stats["connected"] + stats["rejected"] + stats["errors"] < streams
+           and time.time() < deadline):
+        await asyncio.sleep(0.05)
+    if ready is not None:
+        ready.set()
+
+    await asyncio.sleep(duration)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    poll_ms = sorted(stats.pop("poll_ms"))
+    stats["poll_p50_ms"] = round(poll_ms[len(poll_ms) // 2], 2) if poll_ms else 0.0
+    stats["poll_p95_ms"] = round(poll_ms[int(len(poll_ms) * 0.95)], 2) if poll_ms else 0.0
+    return stats
+
+
+def client_process(host, port, sse_clients, slow_clients, pollers, poll_interval, duration, ready, results,
+                   lagging_clients=0, read_delay=0.2):
+    """Entry point proses client (terpisah supaya tidak berebut GIL dengan loop frame)"""
+    results.put(asyncio.run(run_clients(host, port, sse_clients, slow_clients, pollers,
+                                        poll_interval, duration, ready, lagging_clients, read_delay)))
+
+
+def run_frame_loop(counter, frames, duration, publish_interval):
+    """Replay clip lewat stage run() + publish dashboard selama `duration` detik, return FPS"""
+    processed = 0
+    last_publish = 0.0
+    started = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        frame = frames[processed % len(frames)].copy()
+        counter.calculate_fps()
+        person_count, faces, scores, landmarks = counter.detect_people(frame)
+        counter.draw_detections(frame, faces, scores, landmarks)
+        stable_count = counter.draw_enhanced_ui(frame, person_count, faces)
+        counter.log_data(stable_count)
+        counter.metrics.mark_frame()
+        now = time.perf_counter()
+        if now - last_publish >= publish_interval:
+            counter.publish_dashboard()
+            last_publish = now
+        processed += 1
+    return processed / (time.perf_counter() - started)
+
+
+def pad_snapshots(counter, payload_kb):
+    """
+    Snapshot stub hanya ~0.3 KB, terlalu kecil untuk mengisi buffer socket
+    viewer lambat dalam satu fase. Tambah field padding supaya payload sekitar
+    payload_kb (seperti snapshot kamera sibuk dengan banyak zona/debug info).
+    """
+    if payload_kb <= 0:
+        return
+    build = counter.build_dashboard_snapshot
+    padding = "x" * int(payload_kb * 1024)
+    counter.build_dashboard_snapshot = lambda: dict(build(), padding=padding)
+
+
+def check_backpressure(results, slow_clients, lagging_clients):
+    """Viewer lambat harus memicu penggabungan update atau pemutusan; list pesan kegagalan"""
+    server = results["server"]
+    failures = []
+    if slow_clients and not server["slow_clients_dropped"]:
+        failures.append(f"{slow_clients} viewer yang tidak membaca tidak ada yang diputus")
+    if lagging_clients and not (server["events_coalesced"] or server["slow_clients_dropped"]):
+        failures.append(f"{lagging_clients} viewer lambat tidak memicu penggabungan update")
+    return failures
+
+
+def run_loadtest(args):
+    counter = build_counter({"web_host": args.host, "web_port": args.port, "log_interval": 0.5,
+                             "web_write_buffer_limit": int(args.write_buffer_kb * 1024),
+                             "web_send_timeout": args.send_timeout})
+    pad_snapshots(counter, args.payload_kb)
+    frames = synthetic_clip(60, 640, 480)
+    if not counter.start_web_server():
+        return None
+
+    try:
+        baseline_fps = run_frame_loop(counter, frames, args.duration, args.publish_interval)
+
+        ctx = mp.get_context("spawn")
+        ready = ctx.Event()
+        results = ctx.Queue()
+        clients = ctx.Process(target=client_process, args=(
+            args.host, args.port, args.clients, args.slow_clients, args.pollers,
+            args.poll_interval, args.duration, ready, results, args.lagging_clients, args.read_delay))
+        clients.start()
+        ready.wait(timeout=30)
+        loaded_fps = run_frame_loop(counter, frames, args.duration, args.publish_interval)
+        client_stats = results.get(timeout=60)
+        clients.join()
+        server_stats = counter.web_server.get_stats()
+    finally:
+        counter.stop_web_server()
+        counter.detector_cascade.close()
+
+    return {
+        "frame_loop": {
+            "baseline_fps": round(baseline_fps, 1),
+            "loaded_fps": round(loaded_fps, 1),
+            "fps_change_percent": round((loaded_fps / baseline_fps - 1) * 100, 1) if baseline_fps else 0.0
+        },
+        "clients": client_stats,
+        "server": server_stats
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test server dashboard (SSE + polling) terhadap FPS loop frame")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--clients", type=int, default=300, help="Jumlah viewer SSE")
+    parser.add_argument("--slow-clients", type=int, default=20, help="Viewer SSE yang tidak pernah membaca")
+    parser.add_argument("--lagging-clients", type=int, default=20, help="Viewer SSE yang membaca lebih lambat dari publish")
+    parser.add_argument("--read-delay", type=float, default=0.2, help="Jeda viewer lambat per 4 KB yang dibaca (detik)")
+    parser.add_argument("--payload-kb", type=float, default=16, help="Ukuran snapshot (dipadding) agar buffer viewer lambat penuh")
+    parser.add_argument("--write-buffer-kb", type=float, default=16, help="web_write_buffer_limit server saat load test")
+    parser.add_argument("--send-timeout", type=float, default=3.0, help="web_send_timeout server saat load test (< --duration)")
+    parser.add_argument("--pollers", type=int, default=20, help="Client polling /api/snapshot")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--publish-interval", type=float, default=0.5, help="Interval publish snapshot (detik)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Durasi tiap fase (detik)")
+    parser.add_argument("--url", help="Hanya jalankan client terhadap server yang sudah berjalan (host:port)")
+    parser.add_argument("--output", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    if args.url:
+        host, _, port = args.url.rpartition(":")
+        results = {"clients": asyncio.run(run_clients(host, int(port), args.clients, args.slow_clients,
+                                                      args.pollers, args.poll_interval, args.duration,
+                                                      lagging_clients=args.lagging_clients,
+                                                      read_delay=args.read_delay))}
+    else:
+        results = run_loadtest(args)
+
+    if results is None:
+        raise SystemExit(1)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Hasil load test disimpan ke: {args.output}")
+
+    # Statistik server hanya tersedia bila server dijalankan oleh load test ini
+    if "server" in results:
+        failures = check_backpressure(results, args.slow_clients, args.lagging_clients)
+        for failure in failures:
+            print(f"❌ Backpressure: {failure}")
+        if failures:
+            raise SystemExit(1)
+        print(f"✓ Backpressure: {results['server']['events_coalesced']} update digabung, "
+              f"{results['server']['slow_clients_dropped']} viewer diputus")
@@ -0,0 +1,147 @@
+import time
+from bisect import bisect_left
+from collections import deque
+
+
+# Batas bucket histogram (detik), gaya Prometheus
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class StageTimer:
+    """
+    Timer satu stage: histogram kumulatif (untuk Prometheus) + window bergulir
+    durasi terakhir (untuk quantile saat ini). Satu writer per stage, jadi
+    tidak perlu lock di hot path.
+    """
+
+    __slots__ = ("name", "buckets", "bucket_counts", "count", "total", "window", "last", "_start")
+
+    def __init__(self, name, buckets=DEFAULT_BUCKETS, window_size=300):
+        self.name = name
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # Bucket terakhir = +Inf
+        self.count = 0
+        self.total = 0.0
+        self.window = deque(maxlen=window_size)
+        self.last = 0.0
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.observe(time.perf_counter() - self._start)
+        return False
+
+    def observe(self, seconds):
+        """Catat satu durasi (detik)"""
+        self.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.window.append(seconds)
+        self.last = seconds
+
+    def quantiles(self, qs=(0.5, 0.95, 0.99)):
+        """Quantile dari window bergulir (detik)"""
+        values = sorted(self.window)
+        if not values:
+            return {q: 0.0 for q in qs}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in qs}
+
+
+class PipelineMetrics:
+    """Kumpulan timer per stage + FPS instan (jendela waktu bergulir)"""
+
+    def __init__(self, fps_window=2.0, window_size=300):
+        self.fps_window = fps_window
+        self.window_size = window_size
+        self.stages = {}
+        self.frame_times = deque()
+        self.frames_total = 0
+
+    def stage(self, name):
+        """Timer untuk stage (dibuat saat pertama dipakai): `with metrics.stage("face"): ...`"""
+        timer = self.stages.get(name)
+        if timer is None:
+            timer = self.stages[name] = StageTimer(name, window_size=self.window_size)
+        return timer
+
+    def mark_frame(self, now=None):
+        """Tandai satu frame selesai diproses"""
+        now = now if now is not None else time.perf_counter()
+        self.frames_total += 1
+        self.frame_times.append(now)
+        while self.frame_times and now - self.frame_times[0] > self.fps_window:
+            self.frame_times.popleft()
+
+    def instant_fps(self):
+        """FPS dari frame dalam fps_window detik terakhir (bukan rata-rata sejak awal session)"""
+        if len(self.frame_times) < 2:
+            return 0.0
+        span = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / span if span > 0 else 0.0
+
+    def snapshot(self):
+        """Ringkasan per stage dalam ms (untuk JSON / UI)"""
+        result = {}
+        for name, timer in list(self.stages.items()):
+            q = timer.quantiles()
+            result[name] = {
+                "count": timer.count,
+                "last_ms": round(timer.last * 1000, 3),
+                "p50_ms": round(q[0.5] * 1000, 3),
+                "p95_ms": round(q[0.95] * 1000, 3),
+                "p99_ms": round(q[0.99] * 1000, 3)
+            }
+        return result
+
+    def render_prometheus(self, gauges=None, labels=None):
+        """
+        Format teks Prometheus (exposition format 0.0.4).
+        gauges: dict nama -> (nilai, help) untuk metrik tambahan; nilai boleh
+                list (dict label, nilai) untuk satu seri per label (misal per zona)
+        labels: dict label yang ditempel ke semua metrik (misal camera)
+        """
+        def fmt(**extra):
+            pairs = dict(labels or {})
+            pairs.update(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{value}"' for key, value in pairs.items()) + "}"
+
+        lines = [
+            "# HELP people_counter_stage_seconds Durasi per stage pipeline",
+            "# TYPE people_counter_stage_seconds histogram"
+        ]
+        for name, timer in list(self.stages.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(timer.buckets, timer.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f"people_counter_stage_seconds_bucket{fmt(stage=name, le=bound)} {cumulative}")
+            lines.append(f"people_counter_stage_seconds_bucket{fmt(stage=name, le='+Inf')} {timer.count}")
+            lines.append(f"people_counter_stage_seconds_sum{fmt(stage=name)} {timer.total:.6f}")
+            lines.append(f"people_counter_stage_seconds_count{fmt(stage=name)} {timer.count}")
+
+        lines.append("# HELP people_counter_stage_window_seconds Quantile durasi stage pada window bergulir")
+        lines.append("# TYPE people_counter_stage_window_seconds summary")
+        for name, timer in list(self.stages.items()):
+            for q, value in timer.quantiles().items():
+                lines.append(f"people_counter_stage_window_seconds{fmt(stage=name, quantile=q)} {value:.6f}")
+
+        lines.append("# HELP people_counter_frames_total Frame yang selesai diproses")
+        lines.append("# TYPE people_counter_frames_total counter")
+        lines.append(f"people_counter_frames_total{fmt()} {self.frames_total}")
+        lines.append("# HELP people_counter_fps FPS instan (window bergulir)")
+        lines.append("# TYPE people_counter_fps gauge")
+        lines.append(f"people_counter_fps{fmt()} {self.instant_fps():.3f}")
+
+        for name, (value, help_text) in (gauges or {}).items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            if isinstance(value, list):
+                lines.extend(f"{name}{fmt(**series_labels)} {series_value}" for series_labels, series_value in value)
+            else:
+                lines.append(f"{name}{fmt()} {value}")
+
+        return "\n".join(lines) + "\n"
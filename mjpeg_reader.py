@@ -0,0 +1,485 @@
+import argparse
+import base64
+import socket
+import ssl
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+
+REDUCE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+
+class MJPEGError(Exception):
+    """Respon HTTP bukan stream MJPEG multipart yang bisa dibaca reader ini"""
+
+
+class MJPEGReader:
+    """
+    Reader MJPEG-over-HTTP pengganti cv2.VideoCapture untuk IP camera
+    (http://.../video). Thread jaringan mem-parse boundary multipart ke buffer
+    yang dipakai ulang dan hanya menyimpan JPEG terbaru (masih terkompresi);
+    cv2.imdecode baru dijalankan saat read() dipanggil, sehingga frame yang
+    tidak pernah diminta pipeline tidak pernah di-decode.
+
+    reduce: 1/2/4/8 -> decode langsung di skala 1/N (IMREAD_REDUCED_COLOR_N)
+    Koneksi memakai TCP keep-alive; saat stream putus reader langsung
+    reconnect, lalu backoff eksponensial bila kamera tetap tidak menjawab.
+    """
+
+    latest_only = True  # Sudah menyimpan frame terbaru saja -> tidak perlu LatestFrameCapture
+
+    def __init__(self, url, reduce=1, timeout=10.0, read_timeout=5.0,
+                 reconnect_delay=0.1, max_reconnect_delay=5.0, buffer_size=1 << 20):
+        if reduce not in REDUCE_FLAGS:
+            raise ValueError(f"reduce harus salah satu dari {sorted(REDUCE_FLAGS)}: {reduce}")
+        self.url = url
+        self.decode_flag = REDUCE_FLAGS[reduce]
+        self.timeout = timeout
+        self.read_timeout = read_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        # Buffer stream: dua bytearray bergantian supaya sisa data bisa dipindah tanpa overlap
+        self.stream_buffers = [bytearray(buffer_size), bytearray(buffer_size)]
+        self.stream_index = 0
+        self.stream_length = 0
+        self.boundary = None
+        self.sock = None
+
+        # JPEG terbaru: 3 slot (ditulis thread jaringan, terbaru, sedang di-decode)
+        self.condition = threading.Condition()
+        self.jpeg_slots = [bytearray(), bytearray(), bytearray()]
+        self.jpeg_lengths = [0, 0, 0]
+        self.latest_slot = None
+        self.held_slot = None
+        self.jpeg_seq = 0
+        self.decoded_seq = 0
+        self.frame_shape = None
+
+        # Thread state
+        self.thread = None
+        self.running = False
+        self.opened = False
+
+        # Statistik
+        self.jpegs_received = 0
+        self.jpegs_decoded = 0
+        self.decode_failures = 0
+        self.bytes_received = 0
+        self.reconnects = 0
+        self.last_error = None
+
+        try:
+            self._connect(timeout)
+        except (OSError, MJPEGError) as e:
+            self.last_error = str(e)
+            return
+        self.opened = True
+        self.running = True
+        self.thread = threading.Thread(target=self._stream_loop, name="mjpeg-reader", daemon=True)
+        self.thread.start()
+
+    # ===== Koneksi =====
+
+    def _connect(self, timeout):
+        """Buka socket (TCP keep-alive, tanpa Nagle) dan lakukan request stream"""
+        parts = urlsplit(self.url)
+        secure = parts.scheme == "https"
+        port = parts.port or (443 if secure else 80)
+        sock = socket.create_connection((parts.hostname, port), timeout=timeout)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            if secure:
+                sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+            self._handshake(sock, parts)
+        except (OSError, MJPEGError):
+            sock.close()
+            raise
+        sock.settimeout(self.read_timeout)
+        self.sock = sock
+
+    def _handshake(self, sock, parts):
+        """Kirim GET lalu baca header respon sampai boundary multipart diketahui"""
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        request = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc.rsplit('@', 1)[-1]}",
+                   "Connection: keep-alive", "Accept: multipart/x-mixed-replace, image/jpeg"]
+        if parts.username:
+            credentials = f"{parts.username}:{parts.password or ''}".encode()
+            request.append(f"Authorization: Basic {base64.b64encode(credentials).decode()}")
+        sock.sendall(("\r\n".join(request) + "\r\n\r\n").encode())
+
+        self.stream_length = 0
+        header_end = -1
+        while header_end < 0:
+            self._receive(sock)
+            header_end = self._buffer().find(b"\r\n\r\n", 0, self.stream_length)
+            if header_end < 0 and self.stream_length > 65536:
+                raise MJPEGError("Header HTTP terlalu panjang")
+
+        header = bytes(self._buffer()[:header_end]).decode("latin-1").split("\r\n")
+        status = header[0].split(" ", 2)
+        if len(status) < 2 or status[1] != "200":
+            raise MJPEGError(f"HTTP {header[0]}")
+        fields = {}
+        for line in header[1:]:
+            key, _, value = line.partition(":")
+            fields[key.strip().lower()] = value.strip()
+        content_type = fields.get("content-type", "")
+        if "multipart" not in content_type or "chunked" in fields.get("transfer-encoding", ""):
+            raise MJPEGError(f"Bukan stream MJPEG multipart: {content_type or 'tanpa content-type'}")
+        boundary = ""
+        for param in content_type.split(";")[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "boundary":
+                boundary = value.strip('"')
+        if not boundary:
+            raise MJPEGError("Content-Type multipart tanpa boundary")
+        # Sebagian kamera sudah menulis "--" di parameter boundary; cari "--<boundary>" tanpa dash tambahan
+        self.boundary = b"--" + boundary.lstrip("-").encode()
+        self._consume(header_end + 4)
+
+    def _buffer(self):
+        return self.stream_buffers[self.stream_index]
+
+    def _receive(self, sock):
+        """recv_into langsung ke buffer stream; buffer diperbesar hanya bila satu frame tidak muat"""
+        buffer = self._buffer()
+        if self.stream_length == len(buffer):
+            grown = bytearray(len(buffer) * 2)
+            grown[:self.stream_length] = memoryview(buffer)[:self.stream_length]
+            self.stream_buffers[self.stream_index] = buffer = grown
+            self.stream_buffers[1 - self.stream_index] = bytearray(len(grown))
+        received = sock.recv_into(memoryview(buffer)[self.stream_length:])
+        if not received:
+            raise ConnectionError("Stream ditutup oleh kamera")
+        self.stream_length += received
+        self.bytes_received += received
+
+    def _consume(self, position):
+        """Buang data sampai position: sisa dipindah ke buffer satunya (tidak overlap)"""
+        rest = self.stream_length - position
+        other = 1 - self.stream_index
+        if rest:
+            self.stream_buffers[other][:rest] = memoryview(self._buffer())[position:self.stream_length]
+        self.stream_index = other
+        self.stream_length = rest
+
+    # ===== Thread jaringan =====
+
+    def _stream_loop(self):
+        delay = 0.0
+        while self.running:
+            received_before = self.jpegs_received
+            try:
+                if self.sock is None:
+                    self._connect(self.timeout)
+                    self.reconnects += 1
+                self._read_parts()
+            except (OSError, MJPEGError) as e:
+                self.last_error = str(e)
+            if self.sock is not None:
+                self.sock.close()
+                self.sock = None
+            if not self.running:
+                break
+            if self.jpegs_received > received_before:
+                delay = 0.0  # Stream sempat jalan -> reconnect langsung, baru backoff bila gagal lagi
+            time.sleep(delay)
+            delay = min(max(delay * 2, self.reconnect_delay), self.max_reconnect_delay)
+        with self.condition:
+            self.condition.notify_all()
+
+    def _read_parts(self):
+        """Parse part multipart satu per satu dan simpan body JPEG sebagai frame terbaru"""
+        while self.running:
+            header_end = self._find(b"\r\n\r\n", 0)
+            header = bytes(self._buffer()[:header_end]).decode("latin-1").lower()
+            body_start = header_end + 4
+
+            content_length = None
+            for line in header.split("\r\n"):
+                key, _, value = line.partition(":")
+                if key.strip() == "content-length" and value.strip().isdigit():
+                    content_length = int(value.strip())
+            if content_length is not None:
+                while self.stream_length < body_start + content_length:
+                    self._receive(self.sock)
+                body_end = body_start + content_length
+                next_part = body_end
+            else:
+                # Tanpa Content-Length: body berakhir tepat sebelum boundary berikutnya
+                next_part = self._find(self.boundary, body_start)
+                body_end = next_part
+                while body_end > body_start and self._buffer()[body_end - 1] in b"\r\n":
+                    body_end -= 1
+
+            self._publish(body_start, body_end)
+            self._consume(next_part)
+
+    def _find(self, marker, start):
+        """Cari marker di buffer, terima data lagi sampai ketemu. Return index awal marker"""
+        while True:
+            index = self._buffer().find(marker, start, self.stream_length)
+            if index >= 0:
+                return index
+            start = max(start, self.stream_length - len(marker))
+            self._receive(self.sock)
+
+    def _publish(self, start, end):
+        """Salin body JPEG ke slot bebas lalu jadikan terbaru (JPEG lama yang belum di-decode dibuang)"""
+        length = end - start
+        if length <= 0:
+            return
+        with self.condition:
+            slot = next(index for index in range(3) if index not in (self.latest_slot, self.held_slot))
+        if len(self.jpeg_slots[slot]) < length:
+            self.jpeg_slots[slot] = bytearray(max(length, len(self.jpeg_slots[slot]) * 2))
+        self.jpeg_slots[slot][:length] = memoryview(self._buffer())[start:end]
+        with self.condition:
+            self.jpeg_lengths[slot] = length
+            self.latest_slot = slot
+            self.jpeg_seq += 1
+            self.jpegs_received += 1
+            self.condition.notify_all()
+
+    # ===== API seperti cv2.VideoCapture =====
+
+    def isOpened(self):
+        return self.opened
+
+    def read(self, image=None):
+        """
+        Decode JPEG terbaru yang belum pernah dibaca. image diabaikan (imdecode
+        selalu mengalokasikan hasil; FrameBufferPool menyalinnya ke slot).
+        """
+        deadline = time.perf_counter() + self.read_timeout
+        while True:
+            with self.condition:
+                has_new = self.condition.wait_for(
+                    lambda: self.jpeg_seq > self.decoded_seq or not self.running,
+                    max(0.0, deadline - time.perf_counter())
+                )
+                if not has_new or self.jpeg_seq == self.decoded_seq:
+                    return False, None
+                self.decoded_seq = self.jpeg_seq
+                self.held_slot = slot = self.latest_slot
+                length = self.jpeg_lengths[slot]
+            frame = cv2.imdecode(np.frombuffer(self.jpeg_slots[slot], dtype=np.uint8, count=length),
+                                 self.decode_flag)
+            if frame is not None:
+                self.jpegs_decoded += 1
+                self.frame_shape = frame.shape
+                return True, frame
+            self.decode_failures += 1
+
+    def get(self, prop):
+        if self.frame_shape is None:
+            return 0.0
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frame_shape[1])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frame_shape[0])
+        return 0.0
+
+    def set(self, prop, value):
+        # Resolusi MJPEG ditentukan kamera; pakai reduce untuk decode lebih kecil
+        return False
+
+    def release(self):
+        self.running = False
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+        self.opened = False
+
+    def get_stats(self):
+        with self.condition:
+            return {
+                "jpegs_received": self.jpegs_received,
+                "jpegs_decoded": self.jpegs_decoded,
+                "jpegs_skipped": self.jpegs_received - self.jpegs_decoded - self.decode_failures,
+                "decode_failures": self.decode_failures,
+                "bytes_received": self.bytes_received,
+                "reconnects": self.reconnects,
+                "last_error": self.last_error
+            }
+
+
+class MJPEGTestServer:
+    """
+    Server MJPEG lokal pengganti IP camera untuk pengujian reader: frame
+    di-encode JPEG sekali lalu dikirim berulang pada fps tertentu.
+    drop_after: tutup koneksi setelah N part (menguji reconnect)
+    content_length: False -> part tanpa Content-Length (seperti sebagian kamera murah)
+    """
+
+    def __init__(self, frames, fps=15.0, port=0, boundary="frame", content_length=True, drop_after=None):
+        self.jpegs = [cv2.imencode(".jpg", frame)[1].tobytes() for frame in frames]
+        if not self.jpegs:
+            raise ValueError("frames tidak boleh kosong")
+        self.fps = fps
+        self.boundary = boundary
+        self.content_length = content_length
+        self.drop_after = drop_after
+        self.connections = 0
+        self.parts_sent = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/video"
+
+    def _handler_class(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stand_in.connections += 1
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={stand_in.boundary}")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                sent = 0
+                try:
+                    while stand_in.drop_after is None or sent < stand_in.drop_after:
+                        jpeg = stand_in.jpegs[stand_in.parts_sent % len(stand_in.jpegs)]
+                        header = f"--{stand_in.boundary}\r\nContent-Type: image/jpeg\r\n"
+                        if stand_in.content_length:
+                            header += f"Content-Length: {len(jpeg)}\r\n"
+                        self.wfile.write(header.encode() + b"\r\n" + jpeg + b"\r\n")
+                        self.wfile.flush()
+                        stand_in.parts_sent += 1
+                        sent += 1
+                        time.sleep(1.0 / stand_in.fps)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="mjpeg-server", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def load_frames(video_path, max_frames=100):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise IOError(f"Tidak dapat membaca frame dari: {video_path}")
+    return frames
+
+
+def check_stream(url, seconds=5.0, consume_fps=5.0, reduce=1):
+    """Baca stream seperti pipeline yang lebih lambat dari kamera; return statistik reader"""
+    reader = MJPEGReader(url, reduce=reduce)
+    if not reader.isOpened():
+        print(f"Error: Tidak dapat membuka stream MJPEG: {reader.last_error}")
+        return None
+    decode_ms = []
+    started = time.time()
+    while time.time() - started < seconds:
+        decode_start = time.perf_counter()
+        ret, frame = reader.read()
+        if not ret:
+            break
+        decode_ms.append((time.perf_counter() - decode_start) * 1000)
+        time.sleep(1.0 / consume_fps)
+    reader.release()
+    stats = reader.get_stats()
+    stats["frame_shape"] = list(reader.frame_shape) if reader.frame_shape else None
+    stats["read_ms_p50"] = round(float(np.percentile(decode_ms, 50)), 2) if decode_ms else None
+    return stats
+
+
+def self_test():
+    """Reader vs server lokal: boundary dengan/tanpa Content-Length, reduce, dan reconnect"""
+    frames = []
+    for index in range(10):
+        frame = np.full((480, 640, 3), index * 20, dtype=np.uint8)
+        cv2.putText(frame, str(index), (200, 300), cv2.FONT_HERSHEY_SIMPLEX, 6, (0, 0, 255), 10)
+        frames.append(frame)
+
+    ok = True
+    for content_length in (True, False):
+        server = MJPEGTestServer(frames, fps=30, content_length=content_length, drop_after=40).start()
+        stats = check_stream(server.url, seconds=3.0, consume_fps=10, reduce=2)
+        server.stop()
+        passed = (stats is not None and stats["frame_shape"] == [240, 320, 3] and stats["reconnects"] >= 1
+                  and stats["jpegs_skipped"] > 0 and stats["decode_failures"] == 0)
+        ok = ok and passed
+        print(f"{'✓' if passed else '✗'} content_length={content_length}: {stats}")
+    return ok
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="Reader MJPEG-over-HTTP yang hanya men-decode JPEG terbaru")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Server MJPEG lokal dari file video (pengganti IP camera)")
+    serve_parser.add_argument("video")
+    serve_parser.add_argument("--port", type=int, default=8081)
+    serve_parser.add_argument("--fps", type=float, default=15.0)
+    serve_parser.add_argument("--no-content-length", action="store_true")
+
+    check_parser = subparsers.add_parser("check", help="Baca stream dan tampilkan statistik reader")
+    check_parser.add_argument("url")
+    check_parser.add_argument("--seconds", type=float, default=5.0)
+    check_parser.add_argument("--consume-fps", type=float, default=5.0, help="Kecepatan pipeline simulasi")
+    check_parser.add_argument("--reduce", type=int, default=1, choices=sorted(REDUCE_FLAGS))
+
+    subparsers.add_parser("selftest", help="Uji reader terhadap server lokal")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        server = MJPEGTestServer(load_frames(args.video), args.fps, args.port,
+                                 content_length=not args.no_content_length).start()
+        print(f"📡 MJPEG stand-in di {server.url} (Ctrl+C untuk berhenti)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+    elif args.command == "check":
+        print(json.dumps(check_stream(args.url, args.seconds, args.consume_fps, args.reduce), indent=2))
+    else:
+        sys.exit(0 if self_test() else 1)
@@ -0,0 +1,72 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """
+    Gate murah sebelum MediaPipe: bandingkan frame grayscale kecil dengan
+    background model (running average). Jika tidak ada perubahan, deteksi
+    dilewati dan hasil terakhir dipakai ulang. Setelah max_skip_interval
+    frame berturut-turut dilewati, deteksi tetap dipaksa jalan.
+    """
+
+    def __init__(self, motion_threshold=0.01, pixel_threshold=25, max_skip_interval=30,
+                 gate_width=160, background_alpha=0.05):
+        self.motion_threshold = motion_threshold  # Fraksi piksel berubah agar dianggap ada gerakan
+        self.pixel_threshold = pixel_threshold    # Selisih intensitas minimum per piksel
+        self.max_skip_interval = max_skip_interval
+        self.gate_width = gate_width
+        self.background_alpha = background_alpha
+
+        self.background = None
+        self.skipped_in_row = 0
+        self.last_motion = 0.0
+
+        # Statistik
+        self.frames_checked = 0
+        self.frames_skipped = 0
+
+    def _prepare_gray(self, frame):
+        """Downscale ke gate_width, grayscale, blur untuk meredam noise sensor"""
+        height, width = frame.shape[:2]
+        gate_height = max(1, int(height * self.gate_width / float(width)))
+        small = cv2.resize(frame, (self.gate_width, gate_height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def should_detect(self, frame):
+        """True jika detector perlu dijalankan untuk frame ini"""
+        gray = self._prepare_gray(frame)
+        self.frames_checked += 1
+
+        if self.background is None or self.background.shape != gray.shape:
+            self.background = gray.astype(np.float32)
+            self.skipped_in_row = 0
+            return True
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        self.last_motion = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+        cv2.accumulateWeighted(gray, self.background, self.background_alpha)
+
+        if self.last_motion >= self.motion_threshold or self.skipped_in_row >= self.max_skip_interval:
+            self.skipped_in_row = 0
+            return True
+
+        self.skipped_in_row += 1
+        self.frames_skipped += 1
+        return False
+
+    def reset(self):
+        """Buang background model (misal setelah kamera reconnect)"""
+        self.background = None
+        self.skipped_in_row = 0
+
+    def get_stats(self):
+        """Skip ratio dan gerakan terakhir"""
+        return {
+            "motion_threshold": self.motion_threshold,
+            "last_motion": round(self.last_motion, 4),
+            "frames_checked": self.frames_checked,
+            "frames_skipped": self.frames_skipped,
+            "skip_ratio": round(self.frames_skipped / self.frames_checked, 3) if self.frames_checked else 0.0
+        }
@@ -0,0 +1,309 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import cv2
+
+from people_counter_bckp import PeopleCounter
+
+
+def resolve_start_time(video_path, start_time=None):
+    """
+    Waktu mulai rekaman (epoch detik). Default: mtime file dikurangi durasi
+    video, karena file rekaman selesai ditulis di akhir rekaman.
+    """
+    if start_time is not None:
+        return datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S").timestamp()
+
+    cap = cv2.VideoCapture(video_path)
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+    frame_total = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+    cap.release()
+    duration = frame_total / video_fps if video_fps > 0 else 0
+    return int(os.path.getmtime(video_path) - duration)
+
+
+def frame_position_ms(cap, frame_index, video_fps):
+    """Posisi frame yang baru dibaca (ms dari awal video), bukan jam dinding"""
+    pos_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+    if pos_ms <= 0 and frame_index > 0 and video_fps > 0:
+        pos_ms = frame_index * 1000.0 / video_fps
+    return pos_ms
+
+
+def _create_counter(video_path, config):
+    """PeopleCounter headless untuk pemrosesan file"""
+    settings = dict(config or {})
+    settings.update({
+        "video_source": video_path,
+        "show_window": False,
+        "threaded_capture": False,  # File: setiap frame harus diproses, tidak boleh drop
+        "verbose": False
+    })
+    return PeopleCounter(settings)
+
+
+def _init_chunk_worker():
+    """Initializer proses pool: satu thread OpenCV per proses supaya tidak oversubscribe core"""
+    cv2.setNumThreads(1)
+
+
+def process_chunk(video_path, config, start_frame=0, end_frame=None, warmup_frames=30, progress_interval=None):
+    """
+    Proses frame [start_frame, end_frame) dengan detector milik chunk ini sendiri.
+    Chunk mulai decode warmup_frames lebih awal supaya state stabilisasi,
+    keyframe tracker, dan motion gate sudah "panas" di seam; frame warm-up
+    tidak ikut dikembalikan. Tracker juga berjalan di frame warm-up supaya
+    track di seam sudah terkonfirmasi dan sisi pitanya diketahui, tetapi hanya
+    crossing mulai start_frame yang dihitung. Return stable count + posisi (ms)
+    per frame, jumlah crossing masuk/keluar chunk (+ occupancy per zona per
+    frame bila zona dikonfigurasi).
+    """
+    counter = _create_counter(video_path, config)
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        counter.detector_cascade.close()
+        raise IOError(f"Tidak dapat membuka file video: {video_path}")
+
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+    frame_total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    frame_index = max(0, start_frame - warmup_frames)
+    if frame_index > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+
+    stable_counts = array('h')
+    positions_ms = array('d')
+    zone_counts = array('h')  # Occupancy per zona, rata (frame x zona)
+    crossed_in = 0
+    crossed_out = 0
+    wall_start = time.time()
+    last_progress = wall_start
+
+    while end_frame is None or frame_index < end_frame:
+        ret, frame = cap.read()
+        if not ret:
+            break
+
+        pos_ms = frame_position_ms(cap, frame_index, video_fps)
+        person_count, detected_faces, _, _ = counter.detect_people(frame)
+        stable_count = counter.stabilize_count(person_count)
+        events = counter.update_tracking(detected_faces, frame.shape[0])
+
+        if frame_index >= start_frame:
+            for _, direction in events:
+                if direction == "in":
+                    crossed_in += 1
+                else:
+                    crossed_out += 1
+            stable_counts.append(stable_count)
+            positions_ms.append(pos_ms)
+            if counter.zone_map is not None:
+                counter.update_zones(detected_faces, frame.shape, pos_ms / 1000.0)
+                zone_counts.extend(counter.zone_map.occupancy.tolist())
+        frame_index += 1
+
+        if progress_interval and time.time() - last_progress >= progress_interval:
+            elapsed = time.time() - wall_start
+            percent = frame_index * 100.0 / frame_total if frame_total else 0
+            print(f"⏳ {frame_index}/{frame_total} frame ({percent:.1f}%) | "
+                  f"{len(stable_counts) / elapsed:.1f} FPS | Count: {stable_count}")
+            last_progress = time.time()
+
+    cap.release()
+    counter.detector_cascade.close()
+
+    return {
+        "start_frame": start_frame,
+        "end_frame": start_frame + len(stable_counts),
+        "video_fps": video_fps,
+        "stable_counts": stable_counts,
+        "positions_ms": positions_ms,
+        "zone_counts": zone_counts,
+        "crossed_in": crossed_in,
+        "crossed_out": crossed_out,
+        "detector": counter.detector_cascade.get_stats()
+    }
+
+
+def plan_chunks(frame_total, workers, chunks_per_worker=4, min_chunk_frames=900):
+    """Bagi video menjadi range frame; chunk terakhir dibaca sampai EOF (frame count bisa tidak akurat)"""
+    chunk_count = max(1, min(workers * chunks_per_worker, frame_total // min_chunk_frames))
+    chunk_size = frame_total // chunk_count if chunk_count > 1 else frame_total
+    ranges = []
+    for index in range(chunk_count):
+        start = index * chunk_size
+        end = start + chunk_size if index < chunk_count - 1 else None
+        ranges.append((start, end))
+    return ranges
+
+
+def merge_chunks(chunks, video_path, config, base_time):
+    """
+    Gabungkan hasil chunk secara deterministik: stable count per frame diurutkan
+    berdasarkan start_frame lalu di-replay lewat log_data() yang sama seperti
+    run sekuensial, sehingga interval log, max count, dan data_log konsisten.
+    Occupancy per zona ikut di-replay; dwell time butuh kunjungan yang utuh
+    lintas chunk sehingga tidak tersedia di analisis offline.
+
+    Crossing masuk/keluar adalah jumlah crossing per chunk. Karena track tidak
+    diteruskan antar chunk, orang yang sedang berada di dalam pita entry/exit
+    tepat di awal warm-up sebuah seam belum punya sisi asal di chunk berikutnya
+    dan tidak terhitung: galat per seam paling banyak sebanyak orang di dalam
+    pita saat itu (selalu kurang hitung, tidak pernah ganda). Dengan workers=1
+    hasilnya sama dengan run live.
+    """
+    # Ring buffer data_log harus muat seluruh rekaman (default hanya 24 jam)
+    last_ms = max((c["positions_ms"][-1] for c in chunks if c["positions_ms"]), default=0)
+    settings = dict(config or {})
+    settings.setdefault("data_log_capacity",
+                        max(43200, int(last_ms / 1000.0 / settings.get("log_interval", 2)) + 2))
+
+    counter = _create_counter(video_path, settings)
+    counter.session_start_time = base_time
+    counter.last_log_time = base_time
+    media_time = base_time
+
+    zone_count = len(counter.zone_map.names) if counter.zone_map is not None else 0
+    for chunk in sorted(chunks, key=lambda c: c["start_frame"]):
+        for index, (stable_count, pos_ms) in enumerate(zip(chunk["stable_counts"], chunk["positions_ms"])):
+            media_time = base_time + pos_ms / 1000.0
+            if zone_count:
+                counter.zone_map.occupancy[:] = chunk["zone_counts"][index * zone_count:(index + 1) * zone_count]
+            counter.current_count = stable_count
+            counter.log_data(stable_count, timestamp=media_time)
+            counter.frame_count += 1
+        counter.people_crossed_in += chunk["crossed_in"]
+        counter.people_crossed_out += chunk["crossed_out"]
+
+    counter.detector_cascade.close()
+    return counter, media_time
+
+
+def analyze_video(video_path, config=None, start_time=None, workers=1, warmup_frames=30, progress_interval=5.0):
+    """
+    Jalankan pipeline deteksi + counting pada file video secepat CPU mampu:
+    tanpa flip, overlay, imshow, maupun waitKey. Timestamp log_data berasal
+    dari timestamp frame video sehingga hasil bisa direproduksi.
+
+    workers > 1: video dibagi menjadi range frame yang diproses paralel oleh
+    process pool (tiap proses punya FaceDetection/Pose sendiri), lalu digabung
+    dengan merge_chunks(). Toleransi terhadap run sekuensial: dengan default
+    (keyframe_mode dan motion gate mati) data_points identik, karena face
+    detection per frame tidak bergantung frame sebelumnya dan buffer
+    stabilisasi sudah terisi oleh frame warm-up. Perbedaan yang mungkin:
+    - Frame fallback pose di sekitar seam (smoothing landmark Pose berbeda)
+    - Dengan keyframe_mode/motion gate: fase K dan background model di
+      warmup_frames pertama setelah seam, sehingga count data point di
+      sekitar seam bisa berbeda +/-1 dan max count bisa bergeser
+    - Seek CAP_PROP_POS_FRAMES pada codec tertentu tidak frame-accurate
+    Gunakan --verify untuk mengukur selisih pada rekaman tertentu.
+
+    Return (counter, session_summary), atau (None, None) jika video gagal dibuka.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        print(f"Error: Tidak dapat membuka file video: {video_path}")
+        return None, None
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+    frame_total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    cap.release()
+
+    base_time = resolve_start_time(video_path, start_time)
+    print(f"🎞️ Analisis offline: {video_path} ({frame_total} frame @ {video_fps:.1f} FPS, {workers} worker)")
+    wall_start = time.time()
+
+    if workers <= 1 or frame_total <= 0:
+        chunks = [process_chunk(video_path, config, 0, None, warmup_frames, progress_interval)]
+    else:
+        ranges = plan_chunks(frame_total, workers)
+        chunks = []
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                 initializer=_init_chunk_worker) as pool:
+            futures = [pool.submit(process_chunk, video_path, config, start, end, warmup_frames)
+                       for start, end in ranges]
+            for future in as_completed(futures):
+                chunk = future.result()
+                chunks.append(chunk)
+                print(f"✓ Chunk frame {chunk['start_frame']}-{chunk['end_frame']} selesai "
+                      f"({len(chunks)}/{len(ranges)})")
+
+    counter, media_time = merge_chunks(chunks, video_path, config, base_time)
+
+    processing_seconds = time.time() - wall_start
+    counter.fps = counter.frame_count / processing_seconds if processing_seconds > 0 else 0
+    video_seconds = counter.frame_count / video_fps if video_fps > 0 else 0
+
+    session_summary = counter.build_session_summary(session_end=media_time)
+    session_summary["pipeline_stats"]["detector"].update({
+        "face_calls": sum(c["detector"]["face_calls"] for c in chunks),
+        "pose_calls": sum(c["detector"]["pose_calls"] for c in chunks),
+        "pose_skipped": sum(c["detector"]["pose_skipped"] for c in chunks)
+    })
+    session_summary["offline"] = {
+        "video_path": video_path,
+        "video_fps": round(video_fps, 2),
+        "video_seconds": round(video_seconds, 2),
+        "processing_seconds": round(processing_seconds, 2),
+        "realtime_factor": round(video_seconds / processing_seconds, 2) if processing_seconds > 0 else 0,
+        "workers": workers,
+        "chunks": len(chunks),
+        "warmup_frames": warmup_frames
+    }
+    return counter, session_summary
+
+
+def compare_data_points(reference, candidate):
+    """Selisih data_points dua run (misal paralel vs sekuensial)"""
+    pairs = list(zip(reference, candidate))
+    mismatches = [(a, b) for a, b in pairs if a["count"] != b["count"] or a["timestamp"] != b["timestamp"]]
+    return {
+        "points_reference": len(reference),
+        "points_candidate": len(candidate),
+        "mismatched_points": len(mismatches) + abs(len(reference) - len(candidate)),
+        "max_count_diff": max([abs(a["count"] - b["count"]) for a, b in pairs] or [0])
+    }
+
+
+def load_config_file(path):
+    """Config JSON (override atribut PeopleCounter)"""
+    if not path:
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analisis offline file video (headless, tanpa window)")
+    parser.add_argument("video", help="Path file video rekaman")
+    parser.add_argument("--config", help="File config JSON (override atribut PeopleCounter)")
+    parser.add_argument("--start-time", help="Waktu mulai rekaman 'YYYY-MM-DD HH:MM:SS' (default: dari mtime file)")
+    parser.add_argument("--output", help="File JSON hasil (default: people_counter_log_<nama video>.json)")
+    parser.add_argument("--workers", type=int, default=1, help="Jumlah proses paralel (0 = semua core)")
+    parser.add_argument("--warmup-frames", type=int, default=30, help="Frame warm-up sebelum tiap seam chunk")
+    parser.add_argument("--verify", action="store_true", help="Bandingkan hasil paralel dengan run sekuensial")
+    args = parser.parse_args()
+
+    workers = args.workers if args.workers > 0 else os.cpu_count()
+    config = load_config_file(args.config)
+    counter, summary = analyze_video(args.video, config, args.start_time, workers, args.warmup_frames)
+    if counter is not None:
+        output = args.output or f"people_counter_log_{os.path.splitext(os.path.basename(args.video))[0]}.json"
+        counter.save_session_data(output, summary)
+        print("\n=== OFFLINE SUMMARY ===")
+        print(f"Total frames: {counter.frame_count}")
+        print(f"Max count: {counter.max_count_today}")
+        print(f"Crossing: masuk {counter.people_crossed_in} | keluar {counter.people_crossed_out}")
+        print(f"Kecepatan: {counter.fps:.1f} FPS ({summary['offline']['realtime_factor']}x real-time)")
+
+        if args.verify and workers > 1:
+            reference, _ = analyze_video(args.video, config, args.start_time, 1, args.warmup_frames)
+            diff = compare_data_points(reference.data_log.to_list(), counter.data_log.to_list())
+            print(f"Verifikasi vs sekuensial: {diff['mismatched_points']} data point berbeda, "
+                  f"selisih count maks {diff['max_count_diff']}, crossing masuk/keluar "
+                  f"{reference.people_crossed_in}/{reference.people_crossed_out} vs "
+                  f"{counter.people_crossed_in}/{counter.people_crossed_out}")
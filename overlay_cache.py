@@ -0,0 +1,120 @@
+import cv2
+import numpy as np
+
+
+class OverlayCache:
+    """
+    Layer overlay yang di-render sekali lalu ditempel ke setiap frame.
+    Bagian statis (panel, border, petunjuk kontrol) digambar hanya saat ukuran
+    frame atau static_key berubah; teks dinamis disimpan per slot dan baru
+    di-render ulang saat isi/warnanya berubah. Setiap frame cukup satu
+    cv2.copyTo(layer, mask, frame).
+    """
+
+    def __init__(self):
+        self.key = None
+        self.layer = None  # BGR overlay
+        self.mask = None  # 255 = piksel overlay
+        self.base_layer = None  # Layer statis tanpa teks dinamis (untuk menghapus slot)
+        self.base_mask = None
+        self.slots = {}  # name -> (spec, rect)
+        self.touched = set()  # Slot yang dipakai di frame ini
+
+        # Statistik
+        self.rebuilds = 0
+        self.text_renders = 0
+        self.frames = 0
+
+    def prepare(self, shape, static_key, draw_static):
+        """
+        Bangun ulang layer statis bila ukuran frame atau static_key berubah.
+        draw_static(canvas) dipanggil dua kali (di atas kanvas hitam dan putih):
+        piksel yang sama di kedua kanvas adalah piksel overlay, jadi mask
+        diturunkan langsung dari fungsi gambar yang biasa.
+        """
+        key = (shape, static_key)
+        if key == self.key:
+            return False
+        on_black = np.zeros(shape, dtype=np.uint8)
+        on_white = np.full(shape, 255, dtype=np.uint8)
+        draw_static(on_black)
+        draw_static(on_white)
+        self.base_mask = np.where(np.all(on_black == on_white, axis=2), 255, 0).astype(np.uint8)
+        self.base_layer = on_black
+        self.layer = self.base_layer.copy()
+        self.mask = self.base_mask.copy()
+        self.slots = {}
+        self.touched = set()
+        self.key = key
+        self.rebuilds += 1
+        return True
+
+    def text(self, name, text, org, scale, color, thickness=1, font=cv2.FONT_HERSHEY_SIMPLEX):
+        """Teks dinamis di slot `name`; hanya di-render ulang bila berbeda dari frame sebelumnya"""
+        self.touched.add(name)
+        spec = (text, org, scale, color, thickness, font)
+        slot = self.slots.get(name)
+        if slot is not None and slot[0] == spec:
+            return
+        if slot is not None:
+            self._clear(name, slot[1])
+        self.slots[name] = (spec, self._render(spec))
+
+    def _render(self, spec):
+        text, org, scale, color, thickness, font = spec
+        cv2.putText(self.layer, text, org, font, scale, color, thickness)
+        cv2.putText(self.mask, text, org, font, scale, 255, thickness)
+        self.text_renders += 1
+        (width, height), baseline = cv2.getTextSize(text, font, scale, thickness)
+        # getTextSize sudah mencakup tebal garis; margin kecil supaya baris bertetangga tidak bersinggungan
+        frame_height, frame_width = self.mask.shape
+        x0, y0 = max(0, org[0] - 2), max(0, org[1] - height - 1)
+        x1, y1 = min(frame_width, org[0] + width + 2), min(frame_height, org[1] + baseline + 1)
+        # Tepi glyph yang di-blend putText ikut masuk mask; ambil hanya yang dominan supaya
+        # teks di luar panel tidak membawa fringe hitam dari background layer
+        region = self.mask[y0:y1, x0:x1]
+        cv2.threshold(region, 127, 255, cv2.THRESH_BINARY, dst=region)
+        return x0, y0, x1, y1
+
+    def _clear(self, name, rect):
+        """
+        Kembalikan area slot ke layer statis. Slot lain yang bersinggungan ikut
+        dihapus lalu di-render ulang (putText mem-blend tepi glyph, jadi teks
+        tidak boleh digambar dua kali di atas dirinya sendiri).
+        """
+        rects = [rect]
+        affected = []
+        changed = True
+        while changed:
+            changed = False
+            for other, (spec, other_rect) in self.slots.items():
+                if other == name or other in affected:
+                    continue
+                if any(other_rect[0] < x1 and x0 < other_rect[2] and other_rect[1] < y1 and y0 < other_rect[3]
+                       for x0, y0, x1, y1 in rects):
+                    affected.append(other)
+                    rects.append(other_rect)
+                    changed = True
+        for x0, y0, x1, y1 in rects:
+            self.layer[y0:y1, x0:x1] = self.base_layer[y0:y1, x0:x1]
+            self.mask[y0:y1, x0:x1] = self.base_mask[y0:y1, x0:x1]
+        for other in self.slots:
+            if other in affected:
+                self._render(self.slots[other][0])
+
+    def composite(self, frame):
+        """Tempel overlay ke frame (in-place). Slot yang tidak dipakai di frame ini dihapus"""
+        for name in [name for name in self.slots if name not in self.touched]:
+            _, rect = self.slots.pop(name)
+            self._clear(name, rect)
+        self.touched = set()
+        cv2.copyTo(self.layer, self.mask, frame)
+        self.frames += 1
+
+    def get_stats(self):
+        return {
+            "rebuilds": self.rebuilds,
+            "text_renders": self.text_renders,
+            "frames": self.frames,
+            "renders_per_frame": round(self.text_renders / self.frames, 2) if self.frames else 0.0
+        }
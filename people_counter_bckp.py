@@ -1,57 +1,185 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import time
 import json
+import sqlite3
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
+from types import SimpleNamespace
 import os
 import webbrowser
 import threading
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-import socketserver
+from frame_capture import LatestFrameCapture
+from frame_buffers import FrameBufferPool
+from frame_bus import BUS_PREFIX, BusCapture
+from mjpeg_reader import MJPEGReader
+from detectors import DetectorCascade
+from centroid_tracker import CentroidTracker
+from keyframe_tracker import KeyframeTracker
+from motion_gate import MotionGate
+from overlay_cache import OverlayCache
+from pipeline_executor import PipelinedExecutor, REUSE_LAST
+from quality_controller import QualityController, DEFAULT_LEVELS
+from inference_region import InferenceRegions, calibrate_inference_width, load_calibration_frames, merge_overlapping
+from metrics import PipelineMetrics
+from timeseries import CountTimeSeries
+from zone_map import ZoneMap
+from session_store import SessionStore
+from history_store import HistoryStore, parse_time
+from dashboard_server import DashboardHub, DashboardServer, STATIC_DIR
+
+_mediapipe = None
+
+
+def load_mediapipe():
+    """Import mediapipe saat model pertama kali dibutuhkan (~1 detik), bukan saat modul diimport"""
+    global _mediapipe
+    if _mediapipe is None:
+        import mediapipe
+        _mediapipe = mediapipe
+    return _mediapipe
+
 
 class PeopleCounter:
-    def __init__(self):
+    def __init__(self, config=None, detectors=None):
         """
-        Enhanced People Counter dengan fitur-fitur ringan tambahan
+        Enhanced People Counter dengan fitur-fitur ringan tambahan.
+        config: dict opsional untuk override atribut default (lihat apply_config)
+        detectors: tuple opsional (face_detector, pose_factory) pengganti model
+                   MediaPipe, misal StubFaceDetector untuk benchmark
         """
-        # MediaPipe initialization
-        self.mp_face_detection = mp.solutions.face_detection
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_pose = mp.solutions.pose
+        # Model MediaPipe dibuat lazy (mediapipe juga baru diimport saat itu);
+        # run() memuatnya di background sambil membuka kamera
+        if detectors is not None:
+            face_detector, pose_factory = detectors
+        else:
+            face_detector, pose_factory = None, self._create_pose_detector
+        
+        # Fase startup (ms): camera_open, first_frame, model_load, ..., first_count
+        self.startup_timings = {}
+        self.run_start = None  # perf_counter saat run() mulai (acuan first_count)
+        self.camera_ready_timeout = 10.0  # Detik menunggu frame pertama sebelum kamera dianggap gagal
+        self.warmup_pose = True  # Muat model pose juga saat warm-up (kecuali policy face_only)
+        
+        # Timer per stage (histogram bergulir + FPS instan), diekspos di /metrics
+        self.metrics = PipelineMetrics()
+        
+        # Cascade: pose hanya dijalankan saat face kosong, model pose dibuat lazy
+        self.cascade_policy = "lazy_fallback"  # lazy_fallback | fallback_every_n | face_only
+        self.pose_fallback_every_n = 5  # Dipakai oleh policy fallback_every_n
+        self.pose_model_complexity = 1
+        self.pose_static_image_mode = False  # True di pipeline >1 worker: tiap Pose hanya melihat sebagian frame
+        self.detector_cascade = DetectorCascade(
+            face_detector,
+            pose_factory,
+            policy=self.cascade_policy,
+            fallback_every_n=self.pose_fallback_every_n,
+            metrics=self.metrics,
+            face_factory=self._create_face_detector
+        )
         
-        self.face_detector = self.mp_face_detection.FaceDetection(
-            model_selection=0,
-            min_detection_confidence=0.4
+        # Keyframe mode: detector hanya tiap K frame, di antaranya box di-track optical flow
+        self.keyframe_mode = False
+        self.keyframe_min_interval = 1
+        self.keyframe_max_interval = 5  # K maksimum saat scene tenang
+        self.keyframe_tracker = KeyframeTracker(
+            min_interval=self.keyframe_min_interval,
+            max_interval=self.keyframe_max_interval
         )
         
-        self.pose_detector = self.mp_pose.Pose(
-            static_image_mode=False,
-            model_complexity=1,
-            smooth_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
+        # Motion gate: lewati deteksi bila scene tidak berubah, pakai ulang hasil terakhir
+        self.motion_gate_enabled = False
+        self.motion_threshold = 0.01  # Fraksi piksel berubah (frame 160px) untuk dianggap gerakan
+        self.max_skip_interval = 30  # Maksimum frame berturut-turut tanpa deteksi
+        self.motion_gate = MotionGate(
+            motion_threshold=self.motion_threshold,
+            max_skip_interval=self.max_skip_interval
         )
+        self.last_detection = (0, [], [], None)
+        
+        # Inference diperkecil / ROI: detector hanya melihat piksel yang dibutuhkan, box dipetakan ke frame penuh
+        self.inference_width = None  # None = resolusi asli | int (px) | "auto" = kalibrasi saat run()
+        self.inference_rois = []  # List [x, y, w, h] fraksi 0..1 (misal area pintu); kosong = seluruh frame
+        self.inference_calibration_clip = None  # Clip untuk mode "auto"; None -> frame awal dari kamera
+        self.inference_calibration_frames = 60
+        self.inference_recall_tolerance = 0.05  # Penurunan recall maksimum vs resolusi penuh
+        self.inference_regions = None  # Dibangun di akhir __init__ (butuh show_window untuk orientasi ROI)
+        
+        # Buffer pool: frame capture, flip, dan input RGB detector memakai buffer yang sama tiap frame
+        self.buffer_pool_enabled = True
+        self.frame_buffers = FrameBufferPool()
+        self.mirror_preview = True  # Preview dicerminkan; tanpa jendela preview frame tidak di-flip sama sekali
+        
+        # Adaptive quality: turunkan resolusi inference, stride deteksi, model pose, dan detail overlay
+        # bertahap saat frame time melewati target, pulihkan lagi saat ada headroom
+        self.quality_control_enabled = False
+        self.quality_target_frame_ms = 66.0  # Budget per frame (~15 FPS)
+        self.quality_levels = DEFAULT_LEVELS
+        self.quality_controller = None
+        self.quality_baseline = None  # Setting dari config, diambil saat level pertama kali turun
+        self.detection_stride = 1  # Detector tiap N frame, di antaranya hasil terakhir dipakai ulang
+        self.detection_frame_index = 0
+        self.overlay_detail = "full"  # full | minimal
+        
+        # Pipelined inference: frame berikutnya sudah dideteksi di worker thread (detector sendiri per
+        # worker) selagi frame sekarang digambar/di-log; hasil tetap diproses sesuai urutan frame
+        self.pipeline_workers = 0  # 0 = sekuensial seperti biasa
+        self.pipeline_depth = None  # Frame maksimum di antara capture dan draw (None = workers + 1)
+        self.pipeline = None
+        self.detector_generation = 0  # Naik saat setting detector berubah; worker pipeline menyusul
+        
+        # Overlay statis di-render sekali per resolusi, teks hanya saat nilainya berubah
+        self.overlay_cache_enabled = True
+        self.overlay_cache = OverlayCache()
         
         # ====== FITUR BARU: TRACKING & ANALYTICS ======
         self.detection_history = []  # Untuk smoothing
         self.max_count_today = 0
+        self.max_count_date = None  # Tanggal max_count_today, reset saat lewat tengah malam
         self.session_start_time = time.time()
         self.frame_count = 0
         self.fps = 0
         
-        # Counting zones (virtual lines)
+        # Counting zones (virtual lines): track yang pindah dari atas entry ke bawah exit (atau
+        # sebaliknya) dihitung masuk/keluar; pita di antara kedua garis meredam goyangan box
         self.entry_line_y = None
         self.exit_line_y = None
         self.people_crossed_in = 0
         self.people_crossed_out = 0
+        self.tracking_enabled = True
+        self.crossing_in_direction = "down"  # "down": atas -> bawah = masuk, "up": sebaliknya
+        self.track_max_distance = 1.5  # Gerak maksimum per frame, kelipatan ukuran box
+        self.track_max_age = 10  # Frame tanpa deteksi sebelum track dihapus
+        self.track_min_hits = 2  # Deteksi berturut-turut sebelum track dihitung
+        self.tracker = self.build_tracker()
+        self.track_ids = []  # ID track per box frame terakhir (0 = belum terkonfirmasi)
+        
+        # Zona poligon (antrian, kasir, pintu masuk): occupancy per zona + dwell time (dari ID track)
+        self.zones = []  # List {"name", "polygon": [[x, y], ...]} fraksi 0..1, koordinat preview
+        self.zone_exit_grace = 1.0  # Detik track boleh hilang dari zona sebelum kunjungan ditutup
+        self.zone_map = None
         
         # Data logging
-        self.data_log = []
+        self.data_log_capacity = 43200  # Ring buffer: 24 jam sampel @ 2 detik
+        self.data_log = CountTimeSeries(self.data_log_capacity)
         self.log_interval = 2  # DIPERKECIL: Log setiap 2 detik untuk update lebih cepat
         self.last_log_time = time.time()
         self.current_count = 0  # TAMBAHAN: Track current count
         
+        # Penyimpanan append-only (JSONL) selama run(), dipulihkan setelah crash/restart
+        self.storage_enabled = True
+        self.storage_dir = "sessions"
+        self.storage_max_segment_mb = 16  # Rotasi segmen per ukuran (juga per hari)
+        self.storage_resume_gap = 600  # Detik: restart dalam jeda ini melanjutkan session lama
+        self.storage_retention_days = None  # None -> segmen lama tidak dihapus
+        self.session_store = None
+        
+        # Riwayat lintas session (SQLite, bucket menit/jam/hari), di-update oleh writer session
+        self.history_enabled = True
+        self.history_path = None  # None -> <storage_dir>/history.db
+        self.history_store = None
+        self.history_recorded = False  # True bila sampel session ini sudah masuk riwayat secara live
+        
         # Alert system
         self.max_capacity = 10  # Bisa disesuaikan
         self.alert_triggered = False
@@ -63,11 +191,268 @@ class PeopleCounter:
         # Web server
         self.web_server = None
         self.web_port = 8080
+        self.web_host = 'localhost'  # Bind address; '0.0.0.0' supaya dashboard bisa dibuka dari LAN
+        self.web_max_clients = 500  # Koneksi simultan (termasuk stream SSE) sebelum dibalas 503
+        self.web_write_buffer_limit = 64 * 1024  # Buffer tulis per client sebelum update digabung (bytes)
+        self.web_send_timeout = 10.0  # Client yang tidak menguras buffer selama ini (detik) diputus
         self.web_running = False
 
-        self.web_update_interval = 2  # Update file HTML setiap 2 detik
+        self.web_update_interval = 0.5  # Publish snapshot JSON/SSE ke dashboard setiap 0.5 detik
         self.last_web_update_time = 0
+        self.dashboard_hub = DashboardHub()  # Snapshot dashboard terbaru di memori
+        self.web_autostart = False  # True -> web server (termasuk /metrics) langsung jalan saat run()
+
+        # Threaded capture: decode di thread terpisah, hanya frame terbaru yang diproses
+        self.threaded_capture = True
+        self.capture_timeout = 5.0  # Detik menunggu frame baru sebelum dianggap terputus
+        self.frame_capture = None
+        self.mjpeg_reader_enabled = True  # URL http(s) MJPEG dibaca MJPEGReader (decode hanya JPEG terbaru)
+        self.mjpeg_reduce = 1  # 2/4/8 -> JPEG di-decode langsung di skala 1/N
+        self.mjpeg_reader = None
+        self.latency_ms = 0.0  # Capture-to-result latency frame terakhir
+        self.avg_latency_ms = 0.0  # Rata-rata bergerak (EMA)
+        self.max_latency_ms = 0.0
+
+        # Mode non-interaktif (supervisor multi-kamera)
+        self.camera_id = None  # Dipakai untuk nama file session
+        self.video_source = None  # None -> pilih lewat menu _get_video_source(); "bus://<nama>" -> frame bus
+        self.show_window = True  # False -> tanpa cv2.imshow / keyboard control
+        self.verbose = True  # False -> tanpa debug print per log
+        self.stop_requested = False
+        
+        self.inference_regions = self.build_inference_regions()
+        self.zone_map = self.build_zone_map()
+        if config:
+            self.apply_config(config)
+        
+    def apply_config(self, config):
+        """Override atribut default dari dict config, lalu bangun ulang komponen terkait"""
+        for key, value in config.items():
+            if not hasattr(self, key) or callable(getattr(self, key)):
+                print(f"⚠️ Config tidak dikenal diabaikan: {key}")
+                continue
+            setattr(self, key, value)
+        
+        self.detector_cascade.set_policy(self.cascade_policy, self.pose_fallback_every_n)
+        self.keyframe_tracker = KeyframeTracker(
+            min_interval=self.keyframe_min_interval,
+            max_interval=self.keyframe_max_interval
+        )
+        self.motion_gate = MotionGate(
+            motion_threshold=self.motion_threshold,
+            max_skip_interval=self.max_skip_interval
+        )
+        self.inference_regions = self.build_inference_regions(
+            None if self.inference_width == "auto" else self.inference_width
+        )
+        self.quality_controller = QualityController(
+            self.quality_target_frame_ms, self.quality_levels
+        ) if self.quality_control_enabled else None
+        self.quality_baseline = None
+        self.tracker = self.build_tracker()
+        self.detector_generation += 1
+        if self.data_log_capacity != self.data_log.capacity and not self.data_log:
+            self.data_log = CountTimeSeries(self.data_log_capacity)
+        self.zone_map = self.build_zone_map()
+    
+    def stop(self):
+        """Minta main loop berhenti (aman dipanggil dari thread lain)"""
+        self.stop_requested = True
         
+    def _create_face_detector(self):
+        """Factory face detector (dipanggil lazy oleh DetectorCascade)"""
+        return load_mediapipe().solutions.face_detection.FaceDetection(
+            model_selection=0,
+            min_detection_confidence=0.4
+        )
+    
+    def _create_pose_detector(self):
+        """Factory pose detector (dipanggil lazy oleh DetectorCascade)"""
+        print("⏳ Memuat model pose...")
+        return load_mediapipe().solutions.pose.Pose(
+            static_image_mode=self.pose_static_image_mode,
+            model_complexity=self.pose_model_complexity,
+            smooth_landmarks=not self.pose_static_image_mode,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+
+    @contextmanager
+    def startup_phase(self, name):
+        """Catat durasi satu fase startup (ms) ke startup_timings"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    
+    def warm_up_detectors(self):
+        """
+        Muat face detector (termasuk import mediapipe) dan jalankan satu inference
+        dummy supaya frame pertama tidak menanggung inisialisasi graph. Pose ikut
+        dimuat kecuali policy face_only. Dipanggil di thread terpisah oleh run().
+        """
+        dummy = np.zeros((240, 320, 3), dtype=np.uint8)
+        try:
+            with self.startup_phase("model_load"):
+                face_detector = self.detector_cascade.get_face_detector()
+            with self.startup_phase("model_warmup"):
+                face_detector.process(dummy)
+            if self.warmup_pose and self.cascade_policy != "face_only":
+                with self.startup_phase("pose_load"):
+                    self.detector_cascade.get_pose_detector().process(dummy)
+        except Exception as e:
+            # Model akan dicoba dimuat ulang saat frame pertama diproses
+            print(f"⚠️ Warm-up model gagal: {e}")
+    
+    def wait_for_first_frame(self, cap, timeout):
+        """Polling sampai frame pertama ter-decode atau timeout (detik). Return True bila kamera siap"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            if self.buffer_pool_enabled:
+                ret, _ = self.frame_buffers.read(cap)
+            else:
+                ret, _ = cap.read()
+            if ret:
+                return True
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(0.05)
+    
+    def print_startup_summary(self):
+        """Ringkasan fase startup; model dimuat paralel dengan camera_open + first_frame"""
+        phases = " | ".join(f"{name} {ms:.0f}ms" for name, ms in self.startup_timings.items())
+        print(f"⏱️ Startup: {phases}")
+    
+    def open_video_source(self, video_source):
+        """
+        cv2.VideoCapture, BusCapture untuk "bus://<nama>" (frame dari proses
+        capture bersama), atau MJPEGReader untuk URL MJPEG IP camera.
+        """
+        if isinstance(video_source, str) and video_source.startswith(BUS_PREFIX):
+            return BusCapture(video_source, timeout=self.camera_ready_timeout, read_timeout=self.capture_timeout)
+        if self.mjpeg_reader_enabled and isinstance(video_source, str) and video_source.startswith(("http://", "https://")):
+            reader = MJPEGReader(video_source, reduce=self.mjpeg_reduce,
+                                 timeout=self.camera_ready_timeout, read_timeout=self.capture_timeout)
+            if reader.isOpened():
+                self.mjpeg_reader = reader
+                return reader
+            # Bukan MJPEG multipart (RTSP-over-HTTP, HLS, ...) -> serahkan ke FFmpeg
+            print(f"ℹ️ MJPEG reader tidak dipakai ({reader.last_error}), fallback ke cv2.VideoCapture")
+        cap = cv2.VideoCapture(video_source)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        return cap
+    
+    def should_mirror(self):
+        """Frame hanya perlu di-flip bila ada preview yang dicerminkan"""
+        return self.show_window and self.mirror_preview
+    
+    def build_inference_regions(self, inference_width=None):
+        """
+        InferenceRegions dari config. inference_rois selalu dalam koordinat
+        preview (tercermin); bila frame tidak di-flip, ROI ikut dicerminkan.
+        """
+        rois = self.inference_rois
+        if not self.should_mirror():
+            rois = [[1.0 - x - w, y, w, h] for x, y, w, h in rois]
+        return InferenceRegions(inference_width, rois, reuse_buffers=self.buffer_pool_enabled)
+    
+    def build_zone_map(self):
+        """
+        ZoneMap dari config (None tanpa zona). Seperti inference_rois, polygon
+        dalam koordinat preview; bila frame tidak di-flip, polygon ikut dicerminkan.
+        """
+        zones = self.zones
+        if not self.should_mirror():
+            zones = [dict(zone, polygon=[[1.0 - x, y] for x, y in zone["polygon"]]) for zone in zones]
+        zone_map = ZoneMap(zones, exit_grace=self.zone_exit_grace) if zones else None
+        self.data_log.set_zones(zone_map.names if zone_map is not None else ())
+        return zone_map
+    
+    def apply_quality_level(self, level):
+        """
+        Terapkan level kualitas dari quality_controller. Setting level adalah batas
+        atas: nilai config yang lebih hemat tetap dipakai, dan level 0 kembali
+        tepat ke setting config (quality_baseline).
+        """
+        if self.quality_baseline is None:
+            self.quality_baseline = {
+                "inference_width": self.inference_regions.inference_width,
+                "detection_stride": self.detection_stride,
+                "pose_model_complexity": self.pose_model_complexity,
+                "overlay_detail": self.overlay_detail
+            }
+        base = self.quality_baseline
+        settings = self.quality_controller.settings(level)
+        
+        widths = [w for w in (base["inference_width"], settings["inference_width"]) if w]
+        inference_width = min(widths) if widths else None
+        if inference_width != self.inference_regions.inference_width:
+            self.inference_regions = self.build_inference_regions(inference_width)
+        self.detection_stride = max(base["detection_stride"], settings["detection_stride"])
+        pose_model_complexity = min(base["pose_model_complexity"], settings["pose_model_complexity"])
+        if pose_model_complexity != self.pose_model_complexity:
+            self.pose_model_complexity = pose_model_complexity
+            if self.pipeline is None:
+                self.detector_cascade.reset_pose()  # Dibuat ulang lazy dengan complexity baru
+        self.detector_generation += 1  # Worker pipeline memperbarui detector/ROI miliknya sendiri
+        self.overlay_detail = "minimal" if "minimal" in (base["overlay_detail"], settings["overlay_detail"]) else "full"
+        
+        stats = self.quality_controller.get_stats()
+        print(f"🎚️ Kualitas level {level}/{stats['max_level']} (frame {stats['window_frame_ms']:.0f}ms, "
+              f"target {stats['target_frame_ms']:.0f}ms): inference {inference_width or 'penuh'}, "
+              f"stride {self.detection_stride}, pose {self.pose_model_complexity}, overlay {self.overlay_detail}")
+    
+    def set_cascade_policy(self, policy, fallback_every_n=None):
+        """Ganti policy cascade detector saat runtime"""
+        self.detector_cascade.set_policy(policy, fallback_every_n)
+        self.cascade_policy = policy
+        self.pose_fallback_every_n = self.detector_cascade.fallback_every_n
+        self.detector_generation += 1
+
+    def build_tracker(self):
+        """CentroidTracker sesuai setting tracking, None bila tracking dimatikan"""
+        if not self.tracking_enabled:
+            return None
+        return CentroidTracker(
+            max_distance=self.track_max_distance,
+            max_age=self.track_max_age,
+            min_hits=self.track_min_hits,
+            in_direction=self.crossing_in_direction
+        )
+
+    def update_tracking(self, detected_faces, frame_height):
+        """
+        Asosiasikan box frame ini ke track (harus dipanggil sesuai urutan frame)
+        lalu hitung event crossing garis entry/exit. Return list (track_id, "in"|"out").
+        """
+        if self.tracker is None:
+            return []
+        self.setup_counting_zones(frame_height)
+        self.tracker.set_lines(self.entry_line_y, self.exit_line_y)
+        self.track_ids, events = self.tracker.update(detected_faces)
+        for track_id, direction in events:
+            if direction == "in":
+                self.people_crossed_in += 1
+            else:
+                self.people_crossed_out += 1
+            if self.verbose:
+                print(f"🚶 Track #{track_id} {'masuk' if direction == 'in' else 'keluar'} "
+                      f"(Masuk={self.people_crossed_in}, Keluar={self.people_crossed_out})")
+        return events
+
+    def update_zones(self, detected_faces, frame_shape, timestamp=None):
+        """
+        Occupancy per zona (satu lookup label image untuk semua centroid) dan
+        dwell time dari ID track frame ini. Dipanggil setelah update_tracking().
+        """
+        if self.zone_map is None:
+            return None
+        timestamp = timestamp if timestamp is not None else time.time()
+        track_ids = self.track_ids if self.tracker is not None else None
+        return self.zone_map.update(detected_faces, frame_shape, timestamp, track_ids)
+
     def setup_counting_zones(self, frame_height):
         """Setup virtual entry/exit lines"""
         if self.entry_line_y is None:
@@ -122,45 +507,256 @@ class PeopleCounter:
         if self.frame_count % 30 == 0:  # Update setiap 30 frame
             elapsed = current_time - self.session_start_time
             self.fps = self.frame_count / elapsed if elapsed > 0 else 0
+
+    def update_latency(self, capture_time):
+        """Hitung latency dari frame di-capture sampai hasil count tersedia"""
+        self.latency_ms = (time.time() - capture_time) * 1000
+        if self.avg_latency_ms == 0:
+            self.avg_latency_ms = self.latency_ms
+        else:
+            self.avg_latency_ms = 0.9 * self.avg_latency_ms + 0.1 * self.latency_ms
+        self.max_latency_ms = max(self.max_latency_ms, self.latency_ms)
+
+    def render_metrics(self):
+        """Semua metrik dalam format teks Prometheus"""
+        stats = self.get_pipeline_stats()
+        gauges = {
+            "people_counter_current_count": (self.current_count, "Jumlah orang (stabil) saat ini"),
+            "people_counter_max_count_today": (self.max_count_today, "Jumlah orang maksimum hari ini"),
+            "people_counter_fps_average": (round(self.fps, 3), "FPS rata-rata sejak awal session"),
+            "people_counter_frames_captured": (stats["frames_captured"], "Frame yang di-decode thread capture"),
+            "people_counter_frames_dropped": (stats["frames_dropped"], "Frame yang dibuang karena ada frame lebih baru"),
+            "people_counter_latency_seconds": (round(self.latency_ms / 1000, 4), "Latency capture ke hasil count, frame terakhir"),
+            "people_counter_face_calls": (stats["detector"]["face_calls"], "Jumlah pemanggilan face detector"),
+            "people_counter_pose_calls": (stats["detector"]["pose_calls"], "Jumlah pemanggilan pose detector"),
+            "people_counter_crossed_in": (self.people_crossed_in, "Orang yang melintasi garis ke arah masuk"),
+            "people_counter_crossed_out": (self.people_crossed_out, "Orang yang melintasi garis ke arah keluar")
+        }
+        if self.tracker is not None:
+            gauges["people_counter_active_tracks"] = (stats["tracking"]["active_tracks"], "Track terkonfirmasi saat ini")
+        if self.zone_map is not None:
+            zones = self.zone_map.get_stats(time.time())
+            gauges.update({
+                "people_counter_zone_occupancy": (
+                    [({"zone": zone["name"]}, zone["occupancy"]) for zone in zones], "Jumlah orang per zona saat ini"),
+                "people_counter_zone_visits": (
+                    [({"zone": zone["name"]}, zone["visits"]) for zone in zones], "Kunjungan zona yang sudah selesai"),
+                "people_counter_zone_dwell_avg_seconds": (
+                    [({"zone": zone["name"]}, zone["avg_dwell"]) for zone in zones], "Rata-rata dwell time per kunjungan")
+            })
+        if "first_count" in self.startup_timings:
+            gauges["people_counter_time_to_first_count_seconds"] = (
+                round(self.startup_timings["first_count"] / 1000, 3), "Waktu dari start run() sampai count pertama")
+        if self.quality_controller is not None:
+            quality = self.quality_controller.get_stats()
+            gauges.update({
+                "people_counter_quality_level": (quality["level"], "Level adaptive quality (0 = kualitas penuh)"),
+                "people_counter_quality_frame_seconds": (round(quality["window_frame_ms"] / 1000, 4), "Rata-rata frame time window terakhir"),
+                "people_counter_quality_target_seconds": (round(quality["target_frame_ms"] / 1000, 4), "Target frame time adaptive quality")
+            })
+        if self.web_running:
+            web_stats = self.web_server.get_stats()
+            gauges.update({
+                "people_counter_dashboard_clients": (web_stats["clients"], "Koneksi dashboard aktif"),
+                "people_counter_dashboard_stream_clients": (web_stats["stream_clients"], "Stream SSE aktif"),
+                "people_counter_dashboard_events_coalesced": (web_stats["events_coalesced"], "Update yang digabung untuk client lambat"),
+                "people_counter_dashboard_slow_clients_dropped": (web_stats["slow_clients_dropped"], "Client diputus karena tidak menguras buffer")
+            })
+        labels = {"camera": self.camera_id} if self.camera_id else None
+        return self.metrics.render_prometheus(gauges, labels)
     
-    def log_data(self, count):
-        """Log data untuk analytics - DIPERBAIKI"""
-        current_time = time.time()
+    def get_pipeline_stats(self):
+        """Counter per-stage: capture, drop, dan latency"""
+        stats = {
+            "frames_captured": self.frame_count,
+            "frames_dropped": 0,
+            "frames_delivered": self.frame_count,
+            "read_failures": 0
+        }
+        if self.frame_capture is not None:
+            stats.update(self.frame_capture.get_stats())
+        if self.mjpeg_reader is not None:
+            stats["mjpeg"] = self.mjpeg_reader.get_stats()
+        stats.update({
+            "frames_processed": self.frame_count,
+            "latency_ms": round(self.latency_ms, 1),
+            "avg_latency_ms": round(self.avg_latency_ms, 1),
+            "max_latency_ms": round(self.max_latency_ms, 1)
+        })
+        stats["detector"] = self.detector_cascade.get_stats()
+        if self.pipeline is not None:
+            stats["pipeline"] = self.pipeline.get_stats()
+            # Worker 0 memakai detector_cascade utama; worker lain punya cascade sendiri
+            for context in self.pipeline.contexts[1:]:
+                if context is not None:
+                    for key, value in context.cascade.get_stats().items():
+                        if key.endswith(("_calls", "_skipped")):
+                            stats["detector"][key] += value
+        stats["startup"] = dict(self.startup_timings)
+        stats["inference"] = {
+            "width": self.inference_regions.inference_width,
+            "rois": len(self.inference_regions.rois)
+        }
+        if self.tracker is not None:
+            stats["tracking"] = self.tracker.get_stats()
+        if self.zone_map is not None:
+            stats["zone_map"] = {"zones": len(self.zone_map.names), "rasterizations": self.zone_map.rasterizations}
+        stats["instant_fps"] = round(self.metrics.instant_fps(), 2)
+        stats["stages"] = self.metrics.snapshot()
+        if self.keyframe_mode:
+            stats["keyframe"] = self.keyframe_tracker.get_stats()
+        if self.motion_gate_enabled:
+            stats["motion_gate"] = self.motion_gate.get_stats()
+        if self.session_store is not None:
+            stats["storage"] = self.session_store.get_stats()
+        if self.quality_controller is not None:
+            stats["quality"] = self.quality_controller.get_stats()
+        if self.overlay_cache_enabled:
+            stats["overlay_cache"] = self.overlay_cache.get_stats()
+        if self.buffer_pool_enabled:
+            stats["frame_buffers"] = self.frame_buffers.get_stats()
+        return stats
+    
+    def log_data(self, count, timestamp=None):
+        """
+        Log data untuk analytics - DIPERBAIKI.
+        timestamp: epoch detik dari sumber (misal timestamp frame video), default waktu sekarang
+        """
+        current_time = timestamp if timestamp is not None else time.time()
         
         if current_time - self.last_log_time >= self.log_interval:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            log_datetime = datetime.fromtimestamp(current_time)
+            timestamp = log_datetime.strftime("%Y-%m-%d %H:%M:%S")
+            
+            # Max hari ini di-reset saat tanggal berganti (tengah malam)
+            if self.max_count_date != log_datetime.date():
+                if self.max_count_date is not None and self.verbose:
+                    print(f"🌙 Hari baru, reset max count (kemarin: {self.max_count_today})")
+                self.max_count_date = log_datetime.date()
+                self.max_count_today = 0
             
             # Update max count SEBELUM logging
             if count > self.max_count_today:
                 self.max_count_today = count
-                print(f"🔥 New max count: {self.max_count_today}")  # Debug info
+                if self.verbose:
+                    print(f"🔥 New max count: {self.max_count_today}")  # Debug info
             
-            data_point = {
-                "timestamp": timestamp,
-                "count": count,
-                "max_today": self.max_count_today,
-                "session_duration": int(current_time - self.session_start_time)
-            }
-            self.data_log.append(data_point)
+            session_duration = int(current_time - self.session_start_time)
+            zones = self.zone_map.occupancy_by_name() if self.zone_map is not None else None
+            self.data_log.append(current_time, count, self.max_count_today, session_duration, zones)
+            if self.session_store is not None:
+                self.session_store.append(current_time, count, self.max_count_today, session_duration, zones)
             self.last_log_time = current_time
             
             # Debug output
-            print(f"📊 Logged: Count={count}, Max={self.max_count_today}, Time={timestamp}")
+            if self.verbose:
+                print(f"📊 Logged: Count={count}, Max={self.max_count_today}, Time={timestamp}")
+    
+    def open_session_store(self):
+        """
+        Buka penyimpanan append-only. Bila session terakhir (kamera yang sama)
+        berhenti kurang dari storage_resume_gap detik lalu, data_log, max hari
+        ini, dan waktu mulai session dipulihkan dari segmen di disk.
+        """
+        store = SessionStore(
+            self.storage_dir,
+            self.camera_id,
+            max_segment_bytes=int(self.storage_max_segment_mb * 1024 * 1024),
+            retention_days=self.storage_retention_days,
+            history=self.get_history_store()
+        )
+        try:
+            recovered = store.recover(resume_gap=self.storage_resume_gap)
+        except OSError as e:
+            print(f"⚠️ Gagal membaca session sebelumnya: {e}")
+            recovered = None
+        
+        if recovered:
+            self.session_start_time = recovered["session_start"]
+            for sample in recovered["samples"]:
+                self.data_log.append(sample["ts"], sample["count"], sample["max_today"], sample["session_duration"],
+                                     sample.get("zones"))
+            last = recovered["samples"][-1]
+            last_date = datetime.fromtimestamp(last["ts"]).date()
+            if last_date == datetime.now().date():
+                self.max_count_today = last["max_today"]
+                self.max_count_date = last_date
+            print(f"♻️ Session dipulihkan: {len(recovered['samples'])} sampel sejak "
+                  f"{datetime.fromtimestamp(self.session_start_time).strftime('%Y-%m-%d %H:%M:%S')}")
+        
+        try:
+            self.session_store = store.start(self.session_start_time)
+            self.history_recorded = store.history is not None
+        except OSError as e:
+            print(f"⚠️ Penyimpanan session tidak aktif: {e}")
+            self.session_store = None
+    
+    def get_history_store(self):
+        """HistoryStore (dibuat saat pertama dipakai), None bila riwayat dimatikan atau gagal dibuka"""
+        if self.history_store is None and self.history_enabled:
+            path = self.history_path or os.path.join(self.storage_dir, "history.db")
+            try:
+                self.history_store = HistoryStore(path)
+            except sqlite3.Error as e:
+                print(f"⚠️ Riwayat tidak aktif: {e}")
+                self.history_enabled = False
+        return self.history_store
+    
+    def query_history(self, endpoint, params):
+        """
+        Handler /api/history (agregat rentang) dan /api/history/cameras.
+        params: dict query string (camera, resolution, start, end)
+        """
+        store = self.get_history_store()
+        if store is None:
+            raise LookupError("Riwayat tidak aktif")
+        if endpoint == "cameras":
+            return {"cameras": store.cameras()}
+        return store.query(
+            params.get("camera") or self.camera_id,
+            params.get("resolution", "hour"),
+            parse_time(params.get("start")),
+            parse_time(params.get("end"))
+        )
+    
+    def close_session_store(self):
+        """Flush sampel yang masih di antrean lalu tutup segmen"""
+        if self.session_store is not None:
+            self.session_store.close()
+            stats = self.session_store.get_stats()
+            print(f"💾 Session tersimpan di {stats['segment']} ({stats['samples_written']} sampel ditulis, "
+                  f"{stats['samples_dropped']} drop)")
+            self.session_store = None
+    
+    def build_session_summary(self, session_end=None):
+        """Ringkasan session (session_end: epoch detik, default waktu sekarang)"""
+        session_end = session_end if session_end is not None else time.time()
+        return {
+            "session_start": datetime.fromtimestamp(self.session_start_time).strftime("%Y-%m-%d %H:%M:%S"),
+            "session_end": datetime.fromtimestamp(session_end).strftime("%Y-%m-%d %H:%M:%S"),
+            "max_count": self.max_count_today,
+            "current_count": self.current_count,
+            "crossed_in": self.people_crossed_in,
+            "crossed_out": self.people_crossed_out,
+            "zones": self.zone_map.get_stats(session_end) if self.zone_map is not None else [],
+            "total_frames": self.frame_count,
+            "average_fps": round(self.fps, 2),
+            "pipeline_stats": self.get_pipeline_stats(),
+            "average_count": round(self.data_log.average(), 2),
+            "rollups": self.data_log.rollups(),
+            "history_recorded": self.history_recorded,
+            "data_points": self.data_log.to_list()
+        }
     
-    def save_session_data(self):
+    def save_session_data(self, filename=None, session_summary=None):
         """Simpan data session ke file JSON - METHOD DIPERBAIKI"""
         try:
-            filename = f"people_counter_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            
-            session_summary = {
-                "session_start": datetime.fromtimestamp(self.session_start_time).strftime("%Y-%m-%d %H:%M:%S"),
-                "session_end": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "max_count": self.max_count_today,
-                "current_count": self.current_count,
-                "total_frames": self.frame_count,
-                "average_fps": round(self.fps, 2),
-                "data_points": self.data_log
-            }
+            if filename is None:
+                camera_prefix = f"{self.camera_id}_" if self.camera_id else ""
+                filename = f"people_counter_log_{camera_prefix}{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            
+            if session_summary is None:
+                session_summary = self.build_session_summary()
             
             with open(filename, 'w') as f:
                 json.dump(session_summary, f, indent=2)
@@ -171,31 +767,64 @@ class PeopleCounter:
             print(f"Error menyimpan data: {e}")
             return None
     
+    def build_dashboard_snapshot(self):
+        """
+        State live untuk dashboard (/api/snapshot dan /api/stream), tanpa render HTML.
+        Data log tidak ikut; browser mengambil sampel baru lewat /api/samples?since=seq
+        """
+        now = time.time()
+        return {
+            "seq": len(self.data_log),
+            "timestamp": datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"),
+            "camera_id": self.camera_id,
+            "session_start": datetime.fromtimestamp(self.session_start_time).strftime("%Y-%m-%d %H:%M:%S"),
+            "session_duration": int(now - self.session_start_time),
+            "current_count": self.current_count,
+            "max_count_today": self.max_count_today,
+            "average_count": round(self.data_log.average(), 2),
+            "max_capacity": self.max_capacity,
+            "alert": self.current_count >= self.max_capacity,
+            "fps": round(self.metrics.instant_fps(), 2),
+            "fps_average": round(self.fps, 2),
+            "quality_level": self.quality_controller.level if self.quality_controller is not None else None,
+            "crossed_in": self.people_crossed_in,
+            "crossed_out": self.people_crossed_out,
+            "active_tracks": self.tracker.get_stats()["active_tracks"] if self.tracker is not None else None,
+            "zones": self.zone_map.get_stats(now) if self.zone_map is not None else [],
+            "data_points": len(self.data_log)
+        }
+    
+    def get_samples(self, since=0, limit=None):
+        """Sampel data_log dengan seq > since (untuk /api/samples)"""
+        return self.data_log.since(since, limit)
+    
+    def publish_dashboard(self):
+        """Kirim snapshot terbaru ke hub (dibaca handler HTTP, tanpa tulis file)"""
+        self.dashboard_hub.publish(self.build_dashboard_snapshot())
+    
     def generate_web_report(self):
         """Generate HTML report untuk web view - DIPERBAIKI"""
         try:
             # Pastikan ada data
             if not self.data_log:
                 # Buat dummy data jika belum ada
-                dummy_data = {
-                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "count": self.current_count,
-                    "max_today": self.max_count_today,
-                    "session_duration": int(time.time() - self.session_start_time)
-                }
-                self.data_log.append(dummy_data)
-            
-            # Hitung statistik
-            total_data_points = len(self.data_log)
+                now = time.time()
+                self.data_log.append(now, self.current_count, self.max_count_today,
+                                     int(now - self.session_start_time))
+            
+            # Hitung statistik (agregat berjalan, O(1))
             session_duration = int(time.time() - self.session_start_time)
-            avg_count = sum([d['count'] for d in self.data_log]) / total_data_points if total_data_points > 0 else 0
+            avg_count = self.data_log.average()
             
             # PERBAIKAN: Ambil count terbaru dengan benar
-            latest_count = self.current_count if hasattr(self, 'current_count') else (self.data_log[-1]['count'] if self.data_log else 0)
+            latest_count = self.current_count
             
             # Prepare data untuk chart
-            timestamps = [d['timestamp'].split(' ')[1][:5] for d in self.data_log[-20:]]  # Last 20 points, time only
-            counts = [d['count'] for d in self.data_log[-20:]]
+            timestamps, counts = self.data_log.chart_series(20)  # Last 20 points, time only
+            
+            # Script chart di-inline supaya laporan bisa dibuka offline tanpa CDN
+            with open(os.path.join(STATIC_DIR, "chart-lite.js"), 'r', encoding='utf-8') as f:
+                chart_script = f.read()
             
             html_content = f"""
 <!DOCTYPE html>
@@ -204,7 +833,7 @@ class PeopleCounter:
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>People Counter Dashboard</title>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/Chart.js/3.9.1/chart.min.js"></script>
+    <script>{chart_script}</script>
     <style>
         * {{
             margin: 0;
@@ -462,7 +1091,7 @@ class PeopleCounter:
 """
             
             # Add last 10 data points to table
-            for data_point in self.data_log[-10:][::-1]:  # Reverse untuk yang terbaru di atas
+            for data_point in self.data_log.latest(10)[::-1]:  # Reverse untuk yang terbaru di atas
                 duration_formatted = f"{data_point['session_duration']//60}:{data_point['session_duration']%60:02d}"
                 html_content += f"""
                         <tr>
@@ -488,75 +1117,13 @@ class PeopleCounter:
     <button class="refresh-btn" onclick="location.reload()">🔄 Refresh</button>
     
     <script>
-        // Chart.js configuration
-        const ctx = document.getElementById('peopleChart').getContext('2d');
-        const chart = new Chart(ctx, {{
-            type: 'line',
-            data: {{
-                labels: {timestamps},
-                datasets: [{{
-                    label: 'Jumlah Orang',
-                    data: {counts},
-                    borderColor: '#4CAF50',
-                    backgroundColor: 'rgba(76, 175, 80, 0.1)',
-                    borderWidth: 3,
-                    fill: true,
-                    tension: 0.4,
-                    pointBackgroundColor: '#4CAF50',
-                    pointBorderColor: '#ffffff',
-                    pointBorderWidth: 2,
-                    pointRadius: 6,
-                    pointHoverRadius: 8
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {{
-                    legend: {{
-                        display: true,
-                        position: 'top',
-                        labels: {{
-                            font: {{
-                                size: 14
-                            }}
-                        }}
-                    }}
-                }},
-                scales: {{
-                    y: {{
-                        beginAtZero: true,
-                        grid: {{
-                            color: 'rgba(0,0,0,0.1)'
-                        }},
-                        ticks: {{
-                            font: {{
-                                size: 12
-                            }}
-                        }}
-                    }},
-                    x: {{
-                        grid: {{
-                            color: 'rgba(0,0,0,0.1)'
-                        }},
-                        ticks: {{
-                            font: {{
-                                size: 12
-                            }}
-                        }}
-                    }}
-                }},
-                animation: {{
-                    duration: 1000,
-                    easing: 'easeInOutQuart'
-                }}
-            }}
+        // Chart lokal (static/chart-lite.js)
+        const chart = new LineChart(document.getElementById('peopleChart'), {{
+            label: 'Jumlah Orang',
+            color: '#4CAF50',
+            fillColor: 'rgba(76, 175, 80, 0.1)'
         }});
-        
-        // Auto refresh setiap 5 detik (diperkecil dari 10 detik)
-        setTimeout(function() {{
-            location.reload();
-        }}, 5000);
+        chart.setData({timestamps}, {counts});
         
         // Add some interactivity
         document.addEventListener('DOMContentLoaded', function() {{
@@ -581,12 +1148,14 @@ class PeopleCounter:
 """
             
             # Save HTML file
-            html_filename = "people_counter_dashboard.html"
+            camera_prefix = f"_{self.camera_id}" if self.camera_id else ""
+            html_filename = f"people_counter_dashboard{camera_prefix}.html"
             with open(html_filename, 'w', encoding='utf-8') as f:
                 f.write(html_content)
             
-            print(f"✅ Web report generated: {html_filename}")
-            print(f"📊 Latest count in report: {latest_count}")
+            if self.verbose:
+                print(f"✅ Web report generated: {html_filename}")
+                print(f"📊 Latest count in report: {latest_count}")
             
             return html_filename
             
@@ -597,27 +1166,32 @@ class PeopleCounter:
             return None
     
     def start_web_server(self):
-        """Start simple HTTP server untuk web dashboard"""
+        """Start HTTP server untuk web dashboard (halaman statis + JSON/SSE + /metrics)"""
         try:
-            class CustomHandler(SimpleHTTPRequestHandler):
-                def log_message(self, format, *args):
-                    pass  # Suppress server logs
-            
-            self.web_server = HTTPServer(('localhost', self.web_port), CustomHandler)
+            self.publish_dashboard()
+            self.web_server = DashboardServer(
+                self.dashboard_hub,
+                host=self.web_host,
+                port=self.web_port,
+                metrics_source=self.render_metrics,
+                samples_source=self.get_samples,
+                history_source=self.query_history,
+                max_clients=self.web_max_clients,
+                send_timeout=self.web_send_timeout,
+                write_buffer_limit=self.web_write_buffer_limit
+            ).start()
             self.web_running = True
-            
-            def serve_forever():
-                print(f"🌐 Web server started at http://localhost:{self.web_port}")
-                self.web_server.serve_forever()
-            
-            server_thread = threading.Thread(target=serve_forever, daemon=True)
-            server_thread.start()
-            
+            print(f"🌐 Web server started at {self.dashboard_url()}")
             return True
         except Exception as e:
             print(f"Error starting web server: {e}")
             return False
     
+    def dashboard_url(self):
+        """URL dashboard untuk dibuka di browser lokal"""
+        host = 'localhost' if self.web_host in ('', '0.0.0.0', '::') else self.web_host
+        return f'http://{host}:{self.web_port}/'
+    
     def stop_web_server(self):
         """Stop web server"""
         if self.web_server and self.web_running:
@@ -626,24 +1200,17 @@ class PeopleCounter:
             print("🌐 Web server stopped")
     
     def open_web_dashboard(self):
-        """Generate and open web dashboard"""
-        print("🔄 Generating fresh web report...")
-        html_file = self.generate_web_report()
-        if html_file:
-            try:
-                # Start web server if not running
-                if not self.web_running:
-                    self.start_web_server()
-                    time.sleep(1)  # Wait for server to start
-                
-                # Open browser
-                webbrowser.open(f'http://localhost:{self.web_port}/{html_file}')
-                print(f"🌐 Dashboard dibuka di browser: http://localhost:{self.web_port}/{html_file}")
-                return True
-            except Exception as e:
-                print(f"Error opening web dashboard: {e}")
-                return False
-        return False
+        """Buka web dashboard live (server di-start bila belum jalan)"""
+        if not self.web_running and not self.start_web_server():
+            return False
+        try:
+            url = self.dashboard_url()
+            webbrowser.open(url)
+            print(f"🌐 Dashboard dibuka di browser: {url}")
+            return True
+        except Exception as e:
+            print(f"Error opening web dashboard: {e}")
+            return False
     
     def check_capacity_alert(self, count):
         """Cek dan trigger alert jika melebihi kapasitas"""
@@ -654,115 +1221,529 @@ class PeopleCounter:
             self.alert_triggered = False
         return False
     
-    def draw_enhanced_ui(self, frame, person_count, detected_faces):
-        """Gambar UI yang lebih informatif"""
+    def run_detectors(self, frame, rgb_frame=None, context=None):
+        """
+        Jalankan cascade detector pada frame BGR (rgb_frame opsional jika sudah
+        dikonversi dan inference memakai frame penuh). Dengan inference_width /
+        inference_rois, detector dijalankan per ROI yang sudah diperkecil dan
+        box dipetakan kembali ke koordinat frame penuh.
+        context: detector + regions milik worker pipeline (tanpa timer stage,
+        timer hanya ditulis loop utama).
+        Return (person_count, detected_faces, face_scores, pose_landmarks)
+        """
         height, width = frame.shape[:2]
+        cascade = self.detector_cascade if context is None else context.cascade
+        regions = self.inference_regions if context is None else context.regions
+        stage = "cvtColor" if regions.is_identity else "preprocess"
+        with self.metrics.stage(stage) if context is None else nullcontext():
+            inputs = regions.prepare(frame, rgb_frame)
+        
+        detected_faces = []
+        face_scores = []
+        pose_hits = []
+        
+        for rgb_input, rect in inputs:
+            face_results, pose_results = cascade.process(rgb_input)
+            
+            if face_results.detections:
+                for detection in face_results.detections:
+                    bbox = detection.location_data.relative_bounding_box
+                    detected_faces.append(InferenceRegions.map_box(bbox, rect, width, height))
+                    face_scores.append(detection.score[0] if detection.score else 0.0)
+            
+            elif pose_results is not None and pose_results.pose_landmarks:
+                pose_hits.append((pose_results.pose_landmarks, rect))
+        
+        if len(inputs) > 1 and detected_faces:
+            # ROI yang tumpang tindih bisa melihat wajah yang sama
+            detected_faces, face_scores = merge_overlapping(detected_faces, face_scores)
+        
+        # Pose hanya dihitung bila tidak ada wajah sama sekali (satu orang per ROI)
+        person_count = len(detected_faces)
+        pose_landmarks = None
+        if not detected_faces and pose_hits:
+            person_count = len(pose_hits)
+            landmarks, rect = pose_hits[0]
+            pose_landmarks = InferenceRegions.map_landmarks(landmarks, rect, width, height)
+        
+        return person_count, detected_faces, face_scores, pose_landmarks
+    
+    def calibrate_inference(self, cap=None):
+        """
+        Mode inference_width="auto": pilih lebar inference terkecil yang recall
+        wajahnya masih dalam inference_recall_tolerance dibanding resolusi penuh,
+        diukur pada inference_calibration_clip (atau frame awal dari cap).
+        """
+        try:
+            if self.inference_calibration_clip:
+                frames = load_calibration_frames(self.inference_calibration_clip)
+            else:
+                frames = []
+                while cap is not None and len(frames) < self.inference_calibration_frames:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    frames.append(frame.copy())
+                if not frames:
+                    raise IOError("tidak ada frame kalibrasi dari kamera")
+        except IOError as e:
+            print(f"⚠️ Kalibrasi inference dilewati ({e}), memakai resolusi penuh")
+            return None
         
-        # Setup counting zones
-        self.setup_counting_zones(height)
+        if self.should_mirror():
+            frames = [cv2.flip(frame, 1) for frame in frames]
+        print(f"🔧 Kalibrasi resolusi inference dengan {len(frames)} frame...")
+        chosen, report = calibrate_inference_width(
+            self.detector_cascade.get_face_detector(), frames, self.build_inference_regions().rois, tolerance=self.inference_recall_tolerance)
+        if not report["reference_boxes"]:
+            print("⚠️ Tidak ada wajah di frame kalibrasi, memakai resolusi penuh")
+        for candidate in report["candidates"]:
+            print(f"   {candidate['width']}px: recall {candidate['recall'] * 100:.1f}% | {candidate['ms_per_frame']}ms/frame")
+        print(f"✓ Resolusi inference: {str(chosen) + 'px' if chosen else 'penuh'} "
+              f"({report['reference_boxes']} wajah referensi)")
+        self.inference_regions = self.build_inference_regions(chosen)
+        return chosen
+    
+    def detect_people(self, frame, rgb_frame=None):
+        """
+        Deteksi orang pada frame. Dengan keyframe mode, detector hanya dijalankan
+        di keyframe dan box di frame lain berasal dari tracker (face_scores None).
+        Dengan motion gate, frame tanpa gerakan memakai ulang hasil terakhir.
+        Dengan detection_stride > 1 (adaptive quality), detector hanya jalan tiap N frame.
+        """
+        if not self.detection_due(frame):
+            return self.last_detection
+        
+        if not self.keyframe_mode:
+            self.last_detection = self.run_detectors(frame, rgb_frame)
+        elif self.keyframe_tracker.needs_detection():
+            self.last_detection = self.run_detectors(frame, rgb_frame)
+            self.keyframe_tracker.update_detections(frame, self.last_detection[1], self.last_detection[0])
+        else:
+            # Count tetap sama dengan keyframe terakhir supaya stabilize_count/log_data konsisten
+            person_count, detected_faces = self.keyframe_tracker.track(frame)
+            self.last_detection = (person_count, detected_faces, None, None)
+        
+        return self.last_detection
+    
+    def detection_due(self, frame):
+        """Stride deteksi (adaptive quality) dan motion gate: perlukah detector jalan di frame ini"""
+        self.detection_frame_index += 1
+        if self.detection_stride > 1 and self.detection_frame_index % self.detection_stride != 0:
+            return False
+        if self.motion_gate_enabled and not self.motion_gate.should_detect(frame):
+            return False
+        return True
+    
+    def _create_pipeline_context(self, index):
+        """
+        Detector + InferenceRegions milik satu worker pipeline. Worker 0 memakai
+        cascade utama (sudah di-warm-up saat startup), worker lain membuat
+        cascade sendiri lewat factory yang sama.
+        """
+        if index == 0:
+            cascade = self.detector_cascade
+        else:
+            cascade = DetectorCascade(
+                None,
+                self.detector_cascade.pose_factory,
+                policy=self.cascade_policy,
+                fallback_every_n=self.pose_fallback_every_n,
+                face_factory=self.detector_cascade.face_factory
+            )
+        return SimpleNamespace(
+            cascade=cascade,
+            regions=self.build_inference_regions(self.inference_regions.inference_width),
+            generation=self.detector_generation,
+            pose_model_complexity=self.pose_model_complexity,
+            close=cascade.close
+        )
+    
+    def _pipeline_infer(self, context, frame):
+        """Inference satu frame di worker pipeline"""
+        if context.generation != self.detector_generation:
+            # Setting berubah (adaptive quality / config): ROI, lebar inference, dan model pose menyusul
+            context.regions = self.build_inference_regions(self.inference_regions.inference_width)
+            context.cascade.set_policy(self.cascade_policy, self.pose_fallback_every_n)
+            if context.pose_model_complexity != self.pose_model_complexity:
+                context.cascade.reset_pose()
+                context.pose_model_complexity = self.pose_model_complexity
+            context.generation = self.detector_generation
+        return self.run_detectors(frame, context=context)
+    
+    def start_pipeline(self):
+        """
+        Mulai worker pipeline (keyframe mode butuh deteksi berurutan -> tetap sekuensial).
+        Dengan >1 worker frame dibagi bergiliran, jadi Pose tiap worker hanya
+        melihat tiap N frame dan tracking/smoothing landmark antar frame tidak
+        bermakna: Pose dibuat ulang dalam static image mode tanpa smoothing
+        (deteksi penuh setiap panggilan, lebih mahal dan landmark lebih jitter).
+        """
+        self.pipeline = None
+        if self.pipeline_workers <= 0:
+            return
+        if self.keyframe_mode:
+            print("ℹ️ Pipelined inference tidak dipakai: keyframe_mode butuh deteksi berurutan")
+            return
+        if self.pipeline_workers > 1 and not self.pose_static_image_mode:
+            self.pose_static_image_mode = True
+            self.detector_cascade.reset_pose()  # Pose hasil warm-up masih mode video
+        self.pipeline = PipelinedExecutor(
+            self._pipeline_infer, self._create_pipeline_context,
+            workers=self.pipeline_workers, depth=self.pipeline_depth
+        ).start()
+        print(f"⚙️ Pipelined inference: {self.pipeline.workers} worker, {self.pipeline.depth} frame in-flight")
+    
+    def stop_pipeline(self):
+        """
+        Selesaikan frame yang masih in-flight (sudah di-capture, sebagian sudah
+        dideteksi) lewat finish_frame supaya deteksi terakhir tetap di-log,
+        di-track, dan masuk hitungan garis/zona, lalu hentikan worker (objeknya
+        disimpan untuk statistik ringkasan session). Hanya bila worker gagal
+        sisa frame dibatalkan.
+        """
+        pipeline = self.pipeline
+        if pipeline is None:
+            return
+        while pipeline.pending:
+            try:
+                item = pipeline.pop()
+            except Exception as e:
+                print(f"⚠️ Inference pipeline gagal, {len(pipeline.pending)} frame in-flight dibatalkan: {e!r}")
+                break
+            self.finish_pipelined(*item)
+        pipeline.shutdown()
+    
+    def submit_pipelined(self, frame, capture_time):
+        """
+        Mode pipeline: salin (dan flip) frame ke slot in-flight, antrikan
+        inference, lalu selesaikan frame lama yang hasilnya sudah siap (sesuai
+        urutan). Menunggu hanya bila antrian penuh. Return False bila loop harus berhenti.
+        """
+        pipeline = self.pipeline
+        if pipeline.full:
+            with self.metrics.stage("pipeline_wait"):
+                item = pipeline.pop()
+            if not self.finish_pipelined(*item):
+                return False
         
-        # ====== MAIN COUNTER PANEL ======
+        # Slot ke-(n mod depth): frame yang dulu memakainya sudah selesai digambar
+        slot = self.frame_buffers.buffer(f"pipeline{pipeline.sequence % pipeline.depth}", frame.shape, frame.dtype)
+        with self.metrics.stage("flip" if self.should_mirror() else "capture_copy"):
+            if self.should_mirror():
+                cv2.flip(frame, 1, dst=slot)
+            else:
+                np.copyto(slot, frame)
+        # ROI di-prepare oleh regions milik worker; regions utama cukup direncanakan
+        # supaya draw_detections tetap punya rect ROI untuk digambar
+        self.inference_regions.plan(slot.shape)
+        # Stride dan motion gate diputuskan di sini supaya tetap berurutan
+        if self.detection_due(slot):
+            pipeline.submit(slot, payload=(slot, capture_time))
+        else:
+            pipeline.submit_reuse(payload=(slot, capture_time))
+        
+        while pipeline.ready():
+            if not self.finish_pipelined(*pipeline.pop()):
+                return False
+        return True
+    
+    def finish_pipelined(self, payload, detection, inference_seconds):
+        """Hasil inference satu frame (urut) -> draw, overlay, log"""
+        frame, capture_time = payload
+        if detection is REUSE_LAST:
+            detection = self.last_detection
+        else:
+            self.last_detection = detection
+            self.metrics.stage("inference").observe(inference_seconds)
+        # Throughput pipeline dibatasi stage paling lambat: inference dibagi worker vs loop utama
+        return self.finish_frame(frame, detection, capture_time, time.perf_counter(),
+                                 inference_seconds * 1000 / self.pipeline.workers)
+    
+    def set_motion_threshold(self, threshold):
+        """Tuning sensitivitas motion gate saat runtime"""
+        self.motion_threshold = threshold
+        self.motion_gate.motion_threshold = threshold
+    
+    def draw_detections(self, frame, detected_faces, face_scores, pose_landmarks):
+        """Visualisasi box wajah (atau landmark pose) dan area ROI inference"""
+        for x, y, w, h in self.inference_regions.pixel_rects():
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 255, 0), 1)
+        
+        track_ids = self.track_ids if len(self.track_ids) == len(detected_faces) else [0] * len(detected_faces)
+        for idx, (x, y, w, h) in enumerate(detected_faces):
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 0, 0), 2)
+            name = f"ID {track_ids[idx]}" if track_ids[idx] else f"#{idx + 1}"
+            if face_scores is not None:
+                label = f"{name} ({face_scores[idx]:.2f})"
+            else:
+                label = f"{name} (track)"
+            cv2.putText(frame, label, (x, y - 10), 
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
+            
+            # Center point
+            center_x = x + w // 2
+            center_y = y + h // 2
+            cv2.circle(frame, (center_x, center_y), 3, (0, 255, 0), -1)
+        
+        if pose_landmarks is not None:
+            solutions = load_mediapipe().solutions
+            solutions.drawing_utils.draw_landmarks(
+                frame, pose_landmarks, solutions.pose.POSE_CONNECTIONS,
+                solutions.drawing_utils.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
+                solutions.drawing_utils.DrawingSpec(color=(0, 255, 255), thickness=2)
+            )
+    
+    def draw_static_overlay(self, canvas):
+        """Bagian overlay yang tidak berubah antar frame: panel counter, garis entry/exit, petunjuk kontrol"""
+        height, width = canvas.shape[:2]
         panel_height = 180  # Diperbesar sedikit
-        cv2.rectangle(frame, (10, 10), (450, panel_height), (0, 0, 0), -1)
-        cv2.rectangle(frame, (10, 10), (450, panel_height), (255, 255, 255), 2)
+        cv2.rectangle(canvas, (10, 10), (450, panel_height), (0, 0, 0), -1)
+        cv2.rectangle(canvas, (10, 10), (450, panel_height), (255, 255, 255), 2)
         
+        # ====== VIRTUAL COUNTING ZONES ======
+        if self.tracker is not None and self.entry_line_y is not None:
+            # Entry line (hijau)
+            cv2.line(canvas, (0, self.entry_line_y), (width, self.entry_line_y), (0, 255, 0), 2)
+            cv2.putText(canvas, "ENTRY ZONE", (width - 150, self.entry_line_y - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+            # Exit line (merah)
+            cv2.line(canvas, (0, self.exit_line_y), (width, self.exit_line_y), (0, 0, 255), 2)
+            cv2.putText(canvas, "EXIT ZONE", (width - 150, self.exit_line_y + 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+        
+        # Zona poligon (kuning)
+        if self.zone_map is not None:
+            self.zone_map.prepare(canvas.shape)
+            cv2.polylines(canvas, self.zone_map.pixel_polygons, True, (0, 200, 255), 2)
+        
+        # Controls info (disembunyikan saat overlay minimal)
+        if self.overlay_detail == "minimal":
+            return
+        controls = [
+            "Q: Keluar & Simpan",
+            "R: Reset Counter", 
+            "S: Simpan Data",
+            "C: Set Kapasitas",
+            "W: Web Dashboard"
+        ]
+        
+        for i, control in enumerate(controls):
+            cv2.putText(canvas, control, (width - 200, height - 140 + i*20), 
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
+    
+    def draw_enhanced_ui(self, frame, person_count, detected_faces):
+        """
+        Gambar UI yang lebih informatif. Dengan overlay_cache, bagian statis
+        di-render sekali per resolusi dan teks hanya di-render ulang saat
+        nilainya berubah, lalu ditempel ke frame dengan satu masked copy.
+        """
+        height, width = frame.shape[:2]
+        # Setup counting zones (garis ikut layer statis)
+        self.setup_counting_zones(height)
+        
+        cache = self.overlay_cache if self.overlay_cache_enabled else None
+        if cache is not None:
+            static_key = (self.overlay_detail, self.tracker is not None, self.entry_line_y, self.exit_line_y,
+                          self.zone_map)
+            cache.prepare(frame.shape, static_key, self.draw_static_overlay)
+            text = cache.text
+        else:
+            self.draw_static_overlay(frame)
+            def text(name, value, org, scale, color, thickness):
+                cv2.putText(frame, value, org, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness)
+        
+        # ====== MAIN COUNTER PANEL ======
         # Stabilized count
         stable_count = self.stabilize_count(person_count)
         
         # Main counter dengan warna dinamis
         color = (0, 255, 0) if stable_count < self.max_capacity else (0, 0, 255)
-        counter_text = f"Jumlah Orang: {stable_count}"
-        cv2.putText(frame, counter_text, (20, 50), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 1.3, color, 3)
+        text("counter", f"Jumlah Orang: {stable_count}", (20, 50), 1.3, color, 3)
         
         # Raw vs Stable count (debugging)
-        debug_text = f"Raw: {person_count} | Stable: {stable_count}"
-        cv2.putText(frame, debug_text, (20, 75), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+        minimal = self.overlay_detail == "minimal"
+        if not minimal:
+            text("debug", f"Raw: {person_count} | Stable: {stable_count}", (20, 75), 0.5, (0, 255, 255), 1)
         
         # Capacity indicator
-        capacity_text = f"Kapasitas: {stable_count}/{self.max_capacity}"
         capacity_color = (0, 255, 0) if stable_count < self.max_capacity else (0, 165, 255)
-        cv2.putText(frame, capacity_text, (20, 100), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, capacity_color, 2)
+        text("capacity", f"Kapasitas: {stable_count}/{self.max_capacity}", (20, 100), 0.7, capacity_color, 2)
+        
+        # Crossing garis entry/exit
+        if self.tracker is not None:
+            text("crossing", f"Masuk: {self.people_crossed_in} | Keluar: {self.people_crossed_out}", (240, 100),
+                 0.5, (255, 255, 255), 1)
         
         # Session info
         session_duration = int(time.time() - self.session_start_time)
-        duration_text = f"Durasi: {session_duration//60:02d}:{session_duration%60:02d}"
-        cv2.putText(frame, duration_text, (20, 125), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-        
-        # Max count today
-        max_text = f"Max Hari Ini: {self.max_count_today}"
-        cv2.putText(frame, max_text, (20, 145), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+        text("duration", f"Durasi: {session_duration//60:02d}:{session_duration%60:02d}", (20, 125),
+             0.6, (255, 255, 255), 1)
         
-        # FPS info
-        fps_text = f"FPS: {self.fps:.1f} | Logged: {len(self.data_log)}"
-        cv2.putText(frame, fps_text, (20, 165), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+        # Latency & frame drop dari thread capture
+        if not minimal:
+            dropped = self.frame_capture.frames_dropped if self.frame_capture is not None else 0
+            text("latency", f"Latency: {self.avg_latency_ms:.0f}ms | Drop: {dropped}", (240, 125),
+                 0.5, (200, 200, 200), 1)
         
-        # ====== VIRTUAL COUNTING ZONES ======
-        # Entry line (hijau)
-        # cv2.line(frame, (0, self.entry_line_y), (width, self.entry_line_y), (0, 255, 0), 2)
-        # cv2.putText(frame, "ENTRY ZONE", (width - 150, self.entry_line_y - 10), 
-        #            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+        # Max count today
+        text("max", f"Max Hari Ini: {self.max_count_today}", (20, 145), 0.6, (255, 255, 255), 1)
+        
+        # Level adaptive quality (0 = penuh), oranye saat diturunkan
+        if self.quality_controller is not None:
+            level = self.quality_controller.level
+            quality_color = (200, 200, 200) if level == 0 else (0, 165, 255)
+            text("quality", f"Kualitas: L{level}/{len(self.quality_controller.levels) - 1}", (240, 145),
+                 0.5, quality_color, 1)
+        
+        # FPS instan (window 2 detik) + rata-rata session
+        text("fps", f"FPS: {self.metrics.instant_fps():.1f} (avg {self.fps:.1f}) | Logged: {len(self.data_log)}",
+             (20, 165), 0.5, (200, 200, 200), 1)
+        
+        # Occupancy per zona, di pojok kiri atas polygon
+        if self.zone_map is not None:
+            self.zone_map.prepare(frame.shape)
+            for index, (name, points) in enumerate(zip(self.zone_map.names, self.zone_map.pixel_polygons)):
+                left, top = points.min(axis=0)
+                text(f"zone_{index}", f"{name}: {self.zone_map.occupancy[index]}",
+                     (int(left) + 5, int(top) + 20), 0.5, (0, 200, 255), 1)
+        
+        # ====== STATUS ======
+        # Status di pojok kanan bawah
+        status_text = f"AKTIF ({stable_count})" if stable_count > 0 else "MENUNGGU"
+        status_color = (0, 255, 0) if stable_count > 0 else (0, 255, 255)
+        text("status", f"Status: {status_text}", (width - 200, height - 40), 0.6, status_color, 2)
         
-        # # Exit line (merah)
-        # cv2.line(frame, (0, self.exit_line_y), (width, self.exit_line_y), (0, 0, 255), 2)
-        # cv2.putText(frame, "EXIT ZONE", (width - 150, self.exit_line_y + 20), 
-        #            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+        if cache is not None:
+            cache.composite(frame)
         
         # ====== ALERTS ======
+        # Digambar langsung (jarang aktif), di atas panel seperti sebelumnya
         if self.check_capacity_alert(stable_count):
             # Alert visual
             cv2.rectangle(frame, (0, 0), (width, 60), (0, 0, 255), -1)
             cv2.putText(frame, "⚠️ KAPASITAS PENUH!", (width//2 - 150, 35), 
                        cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3)
         
-        # ====== STATUS & CONTROLS ======
-        # Status di pojok kanan bawah
-        status_text = f"AKTIF ({stable_count})" if stable_count > 0 else "MENUNGGU"
-        status_color = (0, 255, 0) if stable_count > 0 else (0, 255, 255)
-        cv2.putText(frame, f"Status: {status_text}", (width - 200, height - 40), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
+        return stable_count
+    
+    def finish_frame(self, frame, detection, capture_time, frame_start, parallel_ms=0.0):
+        """
+        Bagian loop setelah deteksi: gambar hasil, overlay, log, publish
+        dashboard, adaptive quality, tampilan dan kontrol keyboard.
+        parallel_ms: biaya inference per frame yang berjalan paralel (mode pipeline).
+        Return False bila user meminta keluar.
+        """
+        person_count, detected_faces, face_scores, pose_landmarks = detection
         
-        # Controls info
-        controls = [
-            "Q: Keluar & Simpan",
-            "R: Reset Counter", 
-            "S: Simpan Data",
-            "C: Set Kapasitas",
-            "W: Web Dashboard"
-        ]
+        # Calculate FPS
+        self.calculate_fps()
         
-        for i, control in enumerate(controls):
-            cv2.putText(frame, control, (width - 200, height - 140 + i*20), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
+        # Tracking & crossing garis (urutan frame terjaga juga di mode pipeline)
+        with self.metrics.stage("tracking"):
+            self.update_tracking(detected_faces, frame.shape[0])
+        if self.zone_map is not None:
+            with self.metrics.stage("zones"):
+                self.update_zones(detected_faces, frame.shape)
         
-        return stable_count
+        with self.metrics.stage("draw_detections"):
+            self.draw_detections(frame, detected_faces, face_scores, pose_landmarks)
+        
+        # Enhanced UI
+        with self.metrics.stage("overlay"):
+            stable_count = self.draw_enhanced_ui(frame, person_count, detected_faces)
+        
+        # Log data
+        with self.metrics.stage("log_data"):
+            self.log_data(stable_count)
+        self.update_latency(capture_time)
+        self.metrics.mark_frame()
+        if "first_count" not in self.startup_timings:
+            self.startup_timings["first_count"] = round((time.perf_counter() - self.run_start) * 1000, 1)
+            self.print_startup_summary()
+
+        # Publish snapshot ke dashboard (di memori, tanpa render HTML / tulis file)
+        current_time = time.time()
+        if self.web_running and (current_time - self.last_web_update_time > self.web_update_interval):
+            with self.metrics.stage("web_publish"):
+                self.publish_dashboard()
+            self.last_web_update_time = current_time
+        
+        # Adaptive quality: frame time (tanpa menunggu frame) dibandingkan dengan target
+        if self.quality_controller is not None:
+            frame_ms = max((time.perf_counter() - frame_start) * 1000, parallel_ms)
+            level = self.quality_controller.observe(frame_ms)
+            if level is not None:
+                self.apply_quality_level(level)
+        
+        # Display
+        if not self.show_window:
+            return True
+        cv2.imshow('People Counter - Enhanced Edition', frame)
+        
+        # Controls
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('q') or key == ord('Q'):
+            print("Menyimpan data dan keluar...")
+            self.save_session_data()
+            return False
+        elif key == ord('r') or key == ord('R'):
+            print("Reset counter...")
+            self.stability_buffer.clear()
+            self.max_count_today = 0
+            self.people_crossed_in = 0
+            self.people_crossed_out = 0
+        elif key == ord('s') or key == ord('S'):
+            filename = self.save_session_data()
+            if filename:
+                print(f"Data disimpan ke {filename}")
+        elif key == ord('c') or key == ord('C'):
+            try:
+                new_capacity = int(input("Masukkan kapasitas maksimum baru: "))
+                self.max_capacity = new_capacity
+                print(f"Kapasitas diubah ke: {new_capacity}")
+            except:
+                print("Input tidak valid!")
+        elif key == ord('w') or key == ord('W'):
+            print("Membuka web dashboard...")
+            self.open_web_dashboard()
+        elif key == 27:  # ESC
+            return False
+        return True
     
     def run(self):
         """Main loop aplikasi"""
         # ====== PERUBAHAN DIMULAI DI SINI ======
 
-        # Panggil fungsi untuk memilih sumber video
-        video_source = self._get_video_source()
+        # Panggil fungsi untuk memilih sumber video (kecuali sudah diset lewat config)
+        video_source = self.video_source if self.video_source is not None else self._get_video_source()
+
+        # Model dimuat (import mediapipe + warm-up) di background selagi kamera dibuka
+        self.run_start = time.perf_counter()
+        self.startup_timings = {}
+        warmup_thread = threading.Thread(target=self.warm_up_detectors, name="model-warmup", daemon=True)
+        warmup_thread.start()
 
         print(f"\nMenginisialisasi sumber video dari: '{'Webcam Lokal' if video_source == 0 else video_source}'...")
-        cap = cv2.VideoCapture(video_source)
-        
-        # Beri sedikit waktu untuk kamera (terutama IP camera) untuk terhubung
-        time.sleep(2.0)
+        with self.startup_phase("camera_open"):
+            cap = self.open_video_source(video_source)
 
         if not cap.isOpened():
             print(f"Error: Tidak dapat membuka sumber video! Pastikan webcam terhubung atau URL IP Camera sudah benar.")
             return
         
+        # Readiness probe (pengganti sleep tetap): tunggu frame pertama benar-benar ter-decode
+        with self.startup_phase("first_frame"):
+            ready = self.wait_for_first_frame(cap, self.camera_ready_timeout)
+        if not ready:
+            print(f"Error: Tidak ada frame dari sumber video dalam {self.camera_ready_timeout:.0f} detik!")
+            cap.release()
+            return
+        
         # ====== AKHIR DARI PERUBAHAN UTAMA ======
         
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        with self.startup_phase("model_wait"):
+            warmup_thread.join()
         
         print("\n=== PEOPLE COUNTER ENHANCED ===")
         print("Fitur baru:")
@@ -774,113 +1755,70 @@ class PeopleCounter:
         print("• Web dashboard (tekan W)")
         print("-" * 40)
         
-        while True:
-            ret, frame = cap.read()
+        if self.inference_width == "auto":
+            self.calibrate_inference(cap)
+        
+        if self.storage_enabled:
+            self.open_session_store()
+        
+        # Thread capture terpisah supaya buffer OpenCV/FFmpeg tidak menumpuk saat inference
+        # MJPEGReader sudah hanya menyimpan JPEG terbaru (dan decode sesuai permintaan)
+        if self.threaded_capture and not getattr(cap, "latest_only", False):
+            self.frame_capture = LatestFrameCapture(
+                cap, self.metrics, self.frame_buffers if self.buffer_pool_enabled else None).start()
+        
+        if self.web_autostart and not self.web_running:
+            self.start_web_server()
+        
+        self.start_pipeline()
+        
+        while not self.stop_requested:
+            if self.frame_capture is not None:
+                # frame_wait: berapa lama loop proses menunggu frame baru dari thread capture
+                with self.metrics.stage("frame_wait"):
+                    ret, frame, capture_time = self.frame_capture.read(timeout=self.capture_timeout)
+            else:
+                with self.metrics.stage("capture"):
+                    if self.buffer_pool_enabled:
+                        ret, frame = self.frame_buffers.read(cap)
+                    else:
+                        ret, frame = cap.read()
+                capture_time = time.time()
             if not ret:
                 print("Error: Gagal membaca frame! Mungkin koneksi ke kamera terputus.")
                 break
             
-            # Sisa dari kode Anda sama persis seperti sebelumnya...
-            frame = cv2.flip(frame, 1)
-            height, width, _ = frame.shape
+            frame_start = time.perf_counter()
+            if self.pipeline is not None:
+                # Inference frame ini jalan di worker; yang digambar di sini frame sebelumnya yang sudah selesai
+                if not self.submit_pipelined(frame, capture_time):
+                    break
+                continue
             
-            # Calculate FPS
-            self.calculate_fps()
-            
-            # Process detection
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            face_results = self.face_detector.process(rgb_frame)
-            pose_results = self.pose_detector.process(rgb_frame)
-            
-            # Count people
-            person_count = 0
-            detected_faces = []
-            
-            if face_results.detections:
-                person_count = len(face_results.detections)
-                
-                for idx, detection in enumerate(face_results.detections):
-                    bbox = detection.location_data.relative_bounding_box
-                    x = int(bbox.xmin * width)
-                    y = int(bbox.ymin * height)
-                    w = int(bbox.width * width)
-                    h = int(bbox.height * height)
-                    
-                    x = max(0, x)
-                    y = max(0, y)
-                    w = min(width - x, w)
-                    h = min(height - y, h)
-                    
-                    detected_faces.append((x, y, w, h))
-                    
-                    # Visualisasi deteksi
-                    cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 0, 0), 2)
-                    confidence = detection.score[0] if detection.score else 0.0
-                    label = f"#{idx + 1} ({confidence:.2f})"
-                    cv2.putText(frame, label, (x, y - 10), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 2)
-                    
-                    # Center point
-                    center_x = x + w // 2
-                    center_y = y + h // 2
-                    cv2.circle(frame, (center_x, center_y), 3, (0, 255, 0), -1)
-            
-            elif pose_results.pose_landmarks:
-                person_count = 1
-                self.mp_drawing.draw_landmarks(
-                    frame, pose_results.pose_landmarks, self.mp_pose.POSE_CONNECTIONS,
-                    self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                    self.mp_drawing.DrawingSpec(color=(0, 255, 255), thickness=2)
-                )
-            
-            # Enhanced UI
-            stable_count = self.draw_enhanced_ui(frame, person_count, detected_faces)
+            # Sisa dari kode Anda sama persis seperti sebelumnya...
+            if self.should_mirror():
+                with self.metrics.stage("flip"):
+                    frame = self.frame_buffers.flip(frame) if self.buffer_pool_enabled else cv2.flip(frame, 1)
             
-            # Log data
-            self.log_data(stable_count)
-
-            # BLOK KODE BARU UNTUK UPDATE WEB SECARA OTOMATIS
-            current_time = time.time()
-            if self.web_running and (current_time - self.last_web_update_time > self.web_update_interval):
-                self.generate_web_report()
-                self.last_web_update_time = current_time
-            
-            # Display
-            cv2.imshow('People Counter - Enhanced Edition', frame)
-            
-            # Controls
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q') or key == ord('Q'):
-                print("Menyimpan data dan keluar...")
-                self.save_session_data()
-                break
-            elif key == ord('r') or key == ord('R'):
-                print("Reset counter...")
-                self.stability_buffer.clear()
-                self.max_count_today = 0
-            elif key == ord('s') or key == ord('S'):
-                filename = self.save_session_data()
-                if filename:
-                    print(f"Data disimpan ke {filename}")
-            elif key == ord('c') or key == ord('C'):
-                try:
-                    new_capacity = int(input("Masukkan kapasitas maksimum baru: "))
-                    self.max_capacity = new_capacity
-                    print(f"Kapasitas diubah ke: {new_capacity}")
-                except:
-                    print("Input tidak valid!")
-            elif key == ord('w') or key == ord('W'):
-                print("Membuka web dashboard...")
-                self.open_web_dashboard()
-            elif key == 27:  # ESC
+            # Process detection (keyframe mode: detector hanya jalan di keyframe)
+            with self.metrics.stage("detect"):
+                detection = self.detect_people(frame)
+            if not self.finish_frame(frame, detection, capture_time, frame_start):
                 break
         
         # Cleanup
+        self.stop_pipeline()
+        if self.frame_capture is not None:
+            self.frame_capture.stop()
         cap.release()
-        cv2.destroyAllWindows()
-        self.face_detector.close()
-        self.pose_detector.close()
+        if self.show_window:
+            cv2.destroyAllWindows()
+        self.detector_cascade.close()
         self.stop_web_server()
+        self.close_session_store()
+        if self.history_store is not None:
+            self.history_store.close()
+            self.history_store = None
         
         # Final summary
         print("\n=== SESSION SUMMARY ===")
@@ -889,6 +1827,22 @@ class PeopleCounter:
         print(f"Total frames: {self.frame_count}")
         print(f"Average FPS: {self.fps:.2f}")
         print(f"Data points logged: {len(self.data_log)}")
+        stats = self.get_pipeline_stats()
+        print(f"Frames captured: {stats['frames_captured']} | Dropped: {stats['frames_dropped']}")
+        if "mjpeg" in stats:
+            print(f"MJPEG: {stats['mjpeg']['jpegs_received']} JPEG diterima | {stats['mjpeg']['jpegs_decoded']} di-decode | "
+                  f"reconnect {stats['mjpeg']['reconnects']}x")
+        print(f"Latency capture->hasil: avg {stats['avg_latency_ms']}ms | max {stats['max_latency_ms']}ms")
+        print(f"Detector ({stats['detector']['policy']}): face {stats['detector']['face_calls']}x | pose {stats['detector']['pose_calls']}x")
+        if self.motion_gate_enabled:
+            print(f"Motion gate skip ratio: {stats['motion_gate']['skip_ratio'] * 100:.1f}%")
+        if "tracking" in stats:
+            print(f"Crossing: masuk {self.people_crossed_in} | keluar {self.people_crossed_out} | "
+                  f"{stats['tracking']['tracks_created']} track")
+        if self.zone_map is not None:
+            for zone in self.zone_map.get_stats(time.time()):
+                print(f"Zona {zone['name']}: {zone['visits']} kunjungan | dwell avg {zone['avg_dwell']}s | "
+                      f"max {zone['max_dwell']}s")
         
         # Generate final web report
         if self.data_log:
@@ -0,0 +1,139 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+# Hasil untuk frame yang tidak perlu dideteksi (stride/motion gate): pakai ulang deteksi frame sebelumnya
+REUSE_LAST = object()
+
+
+class PipelinedExecutor:
+    """
+    Inference bertahap lintas frame: sementara loop utama menggambar dan
+    me-log frame N, worker inference sudah memproses frame N+1 (dan
+    seterusnya), dan thread capture men-decode frame berikutnya. Setiap worker
+    punya context sendiri (detector + buffer preprocessing) dari
+    context_factory(index), jadi tidak ada detector yang dipakai dua thread.
+
+    Hasil selalu dikembalikan sesuai urutan submit. depth membatasi jumlah
+    frame di antara capture dan draw: depth besar = throughput lebih tinggi
+    tetapi latency capture->hasil bertambah ~depth frame.
+    """
+
+    def __init__(self, process, context_factory, workers=2, depth=None):
+        if workers < 1:
+            raise ValueError("workers minimal 1")
+        self.process = process  # process(context, *args) -> hasil
+        self.context_factory = context_factory
+        self.workers = workers
+        self.depth = max(2, depth if depth else workers + 1)
+        self.tasks = queue.Queue()
+        self.pending = deque()  # (future, payload) sesuai urutan frame
+        self.contexts = [None] * workers
+        self.threads = []
+        self.sequence = 0  # Nomor urut frame berikutnya (termasuk frame tanpa inference)
+
+        # Statistik
+        self.submitted = 0
+        self.reused = 0
+        self.completed = 0
+        self.wait_time = 0.0  # Detik loop utama menunggu hasil inference
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(index,), name=f"inference-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def _worker(self, index):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                break
+            future, args = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if self.contexts[index] is None:
+                    self.contexts[index] = self.context_factory(index)
+                start = time.perf_counter()
+                result = self.process(self.contexts[index], *args)
+                future.set_result((result, time.perf_counter() - start))
+            except BaseException as e:
+                future.set_exception(e)
+
+    @property
+    def full(self):
+        return len(self.pending) >= self.depth
+
+    def submit(self, *args, payload=None):
+        """Antrikan inference untuk satu frame; payload ikut dikembalikan pop() apa adanya"""
+        future = Future()
+        self.pending.append((future, payload))
+        self.tasks.put((future, args))
+        self.sequence += 1
+        self.submitted += 1
+
+    def submit_reuse(self, payload=None):
+        """Frame tanpa inference: tetap masuk antrian supaya urutan hasil terjaga"""
+        future = Future()
+        future.set_result((REUSE_LAST, 0.0))
+        self.pending.append((future, payload))
+        self.sequence += 1
+        self.reused += 1
+
+    def ready(self):
+        """True bila hasil frame tertua sudah selesai (pop() tidak akan menunggu)"""
+        return bool(self.pending) and self.pending[0][0].done()
+
+    def pop(self, timeout=None):
+        """
+        Hasil frame tertua: (payload, hasil, detik inference). Menunggu bila
+        belum selesai; exception dari worker dilempar ulang di sini.
+        """
+        future, payload = self.pending[0]
+        start = time.perf_counter()
+        result, seconds = future.result(timeout)
+        self.wait_time += time.perf_counter() - start
+        self.pending.popleft()
+        self.completed += 1
+        return payload, result, seconds
+
+    def shutdown(self):
+        """
+        Hentikan worker lalu tutup context. Frame yang masih pending dibatalkan:
+        pada exit normal caller sudah menguras pending lewat pop(), jadi yang
+        tersisa di sini hanya frame dari jalur error/abort. Context worker yang
+        belum keluar dalam batas join tidak ditutup (detector-nya mungkin masih
+        berjalan); thread daemon itu berakhir bersama proses.
+        """
+        for future, _ in self.pending:
+            future.cancel()
+        self.pending.clear()
+        for _ in self.threads:
+            self.tasks.put(None)
+        for thread in self.threads:
+            thread.join(timeout=5.0)
+        for index, context in enumerate(self.contexts):
+            if context is None or not hasattr(context, "close"):
+                continue
+            if self.threads[index].is_alive():
+                print(f"⚠️ Worker inference-{index} belum berhenti, detector-nya tidak ditutup")
+                continue
+            context.close()
+            self.contexts[index] = None
+        self.threads = []
+
+    def get_stats(self):
+        return {
+            "workers": self.workers,
+            "depth": self.depth,
+            "in_flight": len(self.pending),
+            "submitted": self.submitted,
+            "reused": self.reused,
+            "completed": self.completed,
+            "wait_ms": round(self.wait_time * 1000, 1)
+        }
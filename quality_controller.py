@@ -0,0 +1,112 @@
+from collections import deque
+
+
+# Tangga kualitas, level 0 = kualitas penuh. Setiap level hanya batas atas:
+# nilai yang lebih hemat dari config user tetap dipakai (lihat PeopleCounter.apply_quality_level)
+DEFAULT_LEVELS = (
+    {"inference_width": None, "detection_stride": 1, "pose_model_complexity": 1, "overlay_detail": "full"},
+    {"inference_width": 480, "detection_stride": 1, "pose_model_complexity": 1, "overlay_detail": "full"},
+    {"inference_width": 320, "detection_stride": 1, "pose_model_complexity": 0, "overlay_detail": "full"},
+    {"inference_width": 320, "detection_stride": 2, "pose_model_complexity": 0, "overlay_detail": "minimal"},
+    {"inference_width": 256, "detection_stride": 3, "pose_model_complexity": 0, "overlay_detail": "minimal"},
+    {"inference_width": 192, "detection_stride": 4, "pose_model_complexity": 0, "overlay_detail": "minimal"},
+)
+
+
+class QualityController:
+    """
+    Feedback controller untuk menahan frame time di bawah target saat host
+    kelebihan beban. Frame time dirata-rata per window; window di atas budget
+    menurunkan kualitas satu level, sedangkan kualitas baru dinaikkan lagi
+    setelah beberapa window berturut-turut jauh di bawah budget (hysteresis).
+    Bila level yang baru dipulihkan langsung turun lagi, jeda pemulihan
+    berikutnya digandakan supaya tidak berosilasi di batas kemampuan host.
+    """
+
+    def __init__(self, target_frame_ms=66.0, levels=DEFAULT_LEVELS, window=30,
+                 degrade_windows=1, restore_windows=3, restore_ratio=0.6, max_restore_windows=48):
+        if not levels:
+            raise ValueError("levels tidak boleh kosong")
+        self.target_frame_ms = float(target_frame_ms)
+        self.levels = list(levels)
+        self.window = window  # Frame per window pengukuran
+        self.degrade_windows = degrade_windows  # Window di atas budget sebelum turun level
+        self.restore_ratio = restore_ratio  # Naik level hanya bila rata-rata < budget * ratio
+        self.base_restore_windows = restore_windows
+        self.restore_windows = restore_windows
+        self.max_restore_windows = max_restore_windows
+
+        self.level = 0
+        self.samples = deque(maxlen=window)
+        self.over_windows = 0
+        self.under_windows = 0
+        self.skip_window = False  # Window pertama setelah ganti level diabaikan (reload model, cache)
+        self.last_change = None  # "degrade" | "restore"
+
+        # Statistik
+        self.last_window_ms = 0.0
+        self.degrades = 0
+        self.restores = 0
+
+    def observe(self, frame_ms):
+        """
+        Catat frame time satu frame (ms). Return level baru bila level berubah,
+        selain itu None.
+        """
+        self.samples.append(frame_ms)
+        if len(self.samples) < self.window:
+            return None
+        window_ms = sum(self.samples) / len(self.samples)
+        self.samples.clear()
+        self.last_window_ms = window_ms
+        if self.skip_window:
+            self.skip_window = False
+            return None
+
+        if window_ms > self.target_frame_ms:
+            self.over_windows += 1
+            self.under_windows = 0
+        elif window_ms < self.target_frame_ms * self.restore_ratio:
+            self.under_windows += 1
+            self.over_windows = 0
+        else:
+            # Di zona hysteresis: level sekarang pas, tidak ada perubahan
+            self.over_windows = 0
+            self.under_windows = 0
+            self.restore_windows = max(self.base_restore_windows, self.restore_windows // 2)
+
+        if self.over_windows >= self.degrade_windows and self.level < len(self.levels) - 1:
+            if self.last_change == "restore":
+                # Level yang baru dipulihkan ternyata tidak sanggup: tunggu lebih lama sebelum mencoba lagi
+                self.restore_windows = min(self.max_restore_windows, self.restore_windows * 2)
+            return self._set_level(self.level + 1, "degrade")
+        if self.under_windows >= self.restore_windows and self.level > 0:
+            return self._set_level(self.level - 1, "restore")
+        return None
+
+    def _set_level(self, level, change):
+        self.level = level
+        self.last_change = change
+        self.over_windows = 0
+        self.under_windows = 0
+        self.skip_window = True
+        if change == "degrade":
+            self.degrades += 1
+        else:
+            self.restores += 1
+        return level
+
+    def settings(self, level=None):
+        """Setting untuk level (default: level saat ini)"""
+        return self.levels[self.level if level is None else level]
+
+    def get_stats(self):
+        return {
+            "level": self.level,
+            "max_level": len(self.levels) - 1,
+            "target_frame_ms": self.target_frame_ms,
+            "window_frame_ms": round(self.last_window_ms, 2),
+            "degrades": self.degrades,
+            "restores": self.restores,
+            "restore_windows": self.restore_windows
+        }
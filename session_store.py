@@ -0,0 +1,265 @@
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+class SessionStore:
+    """
+    Penyimpanan sampel append-only yang tahan crash: segmen JSONL per hari
+    (dirotasi juga berdasarkan ukuran), ditulis batch oleh thread writer.
+    Loop frame hanya memasukkan tuple ke antrean (tanpa I/O). Setiap batch
+    di-flush + fsync, sehingga saat listrik mati yang hilang paling banyak
+    satu flush_interval terakhir.
+
+    Baris pertama tiap segmen adalah header {"type": "header", "session_start", ...};
+    baris berikutnya satu sampel {"ts", "count", "max_today", "session_duration"}
+    (+ "zones": {nama: occupancy} bila zona dikonfigurasi).
+    """
+
+    def __init__(self, directory="sessions", camera_id=None, max_segment_bytes=16 * 1024 * 1024,
+                 flush_interval=1.0, fsync=True, queue_size=100000, retention_days=None, history=None):
+        self.directory = directory
+        self.camera_id = camera_id
+        self.prefix = f"{camera_id}_" if camera_id else ""
+        self.max_segment_bytes = max_segment_bytes
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.retention_days = retention_days  # None -> segmen lama tidak dihapus
+        self.history = history  # HistoryStore opsional: bucket menit/jam/hari di-update per batch
+        self.pattern = re.compile(r"^" + re.escape(self.prefix) + r"(\d{8})_(\d{3})\.jsonl$")
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.session_start = None
+        self.segment_file = None
+        self.segment_path = None
+        self.segment_date = None
+        self.segment_bytes = 0
+
+        self.thread = None
+        self.stop_event = threading.Event()
+
+        # Statistik
+        self.samples_written = 0
+        self.samples_dropped = 0  # Antrean penuh (disk macet), sampel tidak menunggu
+        self.segments_opened = 0
+        self.write_errors = 0
+        self.history_errors = 0
+        self.last_flush_ms = 0.0
+
+    def _segments(self):
+        """Segmen milik kamera ini, urut (tanggal, index)"""
+        if not os.path.isdir(self.directory):
+            return []
+        segments = []
+        for name in os.listdir(self.directory):
+            match = self.pattern.match(name)
+            if match:
+                segments.append((match.group(1), int(match.group(2)), os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    @staticmethod
+    def read_segment(path, repair=False):
+        """
+        (header, samples) dari satu segmen. Baris terakhir yang terpotong
+        (crash saat menulis) diabaikan; repair=True sekaligus memotong file
+        ke baris utuh terakhir supaya append berikutnya tetap valid.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if repair and complete < len(data):
+            with open(path, 'r+b') as f:
+                f.truncate(complete)
+
+        header = None
+        samples = []
+        for line in data[:complete].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Baris rusak dilewati, sisanya tetap dibaca
+            if record.get("type") == "header":
+                header = header or record
+            elif "ts" in record:
+                samples.append(record)
+        return header, samples
+
+    def recover(self, now=None, resume_gap=600):
+        """
+        Pulihkan session terakhir bila sampel terakhirnya belum lebih dari
+        resume_gap detik yang lalu (restart / crash, bukan session baru).
+        Return {"session_start", "samples"} atau None.
+        """
+        now = now if now is not None else time.time()
+        session_start = None
+        samples = []
+        for _, _, path in reversed(self._segments()):
+            header, rows = self.read_segment(path, repair=True)
+            if header is None:
+                continue
+            if session_start is None:
+                session_start = header["session_start"]
+            elif header["session_start"] != session_start:
+                break
+            samples[:0] = rows
+
+        if not samples or now - samples[-1]["ts"] > resume_gap:
+            return None
+        return {"session_start": session_start, "samples": samples}
+
+    def _apply_retention(self, now):
+        if not self.retention_days:
+            return
+        cutoff = datetime.fromtimestamp(now - self.retention_days * 86400).strftime("%Y%m%d")
+        for date, _, path in self._segments():
+            if date < cutoff:
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"⚠️ Gagal menghapus segmen lama {path}: {e}")
+
+    def _open_segment(self, timestamp):
+        """Tutup segmen aktif lalu buka segmen baru untuk tanggal timestamp"""
+        self._close_segment()
+        date = datetime.fromtimestamp(timestamp).strftime("%Y%m%d")
+        indices = [index for seg_date, index, _ in self._segments() if seg_date == date]
+        index = max(indices) + 1 if indices else 0
+        self.segment_path = os.path.join(self.directory, f"{self.prefix}{date}_{index:03d}.jsonl")
+        self.segment_file = open(self.segment_path, 'ab')
+        self.segment_date = date
+        header = {
+            "type": "header",
+            "session_start": self.session_start,
+            "camera_id": self.camera_id,
+            "created": timestamp,
+            "history_recorded": self.history is not None  # Import riwayat melewati segmen ini
+        }
+        line = json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n"
+        self.segment_file.write(line)
+        self.segment_bytes = len(line)
+        self.segments_opened += 1
+
+    def _close_segment(self):
+        if self.segment_file is not None:
+            self.segment_file.flush()
+            if self.fsync:
+                os.fsync(self.segment_file.fileno())
+            self.segment_file.close()
+            self.segment_file = None
+
+    def start(self, session_start):
+        """Mulai thread writer untuk session (baru atau hasil recover)"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.session_start = session_start
+        self._apply_retention(time.time())
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def append(self, timestamp, count, max_today, session_duration, zones=None):
+        """
+        Dipanggil dari loop frame: hanya masuk antrean, tidak pernah menunggu disk.
+        zones: dict nama zona -> occupancy (opsional, ikut ditulis ke baris sampel)
+        """
+        try:
+            self.queue.put_nowait((timestamp, count, max_today, session_duration, zones))
+        except queue.Full:
+            self.samples_dropped += 1
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _write_batch(self, batch):
+        """Tulis batch sebagai baris JSONL, rotasi per hari / ukuran, lalu flush + fsync"""
+        started = time.perf_counter()
+        lines = []
+        for timestamp, count, max_today, session_duration, zones in batch:
+            date = datetime.fromtimestamp(timestamp).strftime("%Y%m%d")
+            if (self.segment_file is None or date != self.segment_date
+                    or self.segment_bytes >= self.max_segment_bytes):
+                self._write_lines(lines)
+                lines = []
+                self._open_segment(timestamp)
+            record = {
+                "ts": round(timestamp, 3),
+                "count": count,
+                "max_today": max_today,
+                "session_duration": session_duration
+            }
+            if zones:
+                record["zones"] = zones
+            line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+            lines.append(line)
+            self.segment_bytes += len(line)
+        self._write_lines(lines)
+
+        self.segment_file.flush()
+        if self.fsync:
+            os.fsync(self.segment_file.fileno())
+        self.samples_written += len(batch)
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    def _write_lines(self, lines):
+        if lines:
+            self.segment_file.write(b"".join(lines))
+
+    def _writer_loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self._flush_pending()
+        self._flush_pending()
+        self._close_segment_quietly()
+
+    def _flush_pending(self):
+        batch = self._drain()
+        if not batch:
+            return
+        try:
+            self._write_batch(batch)
+        except OSError as e:
+            # Disk penuh / dicabut: catat dan lanjut, loop frame tidak ikut berhenti
+            self.write_errors += 1
+            print(f"⚠️ Gagal menulis session ke {self.segment_path}: {e}")
+            self._close_segment_quietly()
+
+        if self.history is not None:
+            try:
+                self.history.add_samples(self.camera_id, [(sample[0], sample[1]) for sample in batch])
+            except sqlite3.Error as e:
+                self.history_errors += 1
+                print(f"⚠️ Gagal update riwayat: {e}")
+
+    def _close_segment_quietly(self):
+        try:
+            self._close_segment()
+        except OSError:
+            self.segment_file = None
+
+    def close(self):
+        """Flush sisa antrean dan tutup segmen aktif"""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join(timeout=10.0)
+            self.thread = None
+
+    def get_stats(self):
+        return {
+            "segment": self.segment_path,
+            "samples_written": self.samples_written,
+            "samples_pending": self.queue.qsize(),
+            "samples_dropped": self.samples_dropped,
+            "segments_opened": self.segments_opened,
+            "write_errors": self.write_errors,
+            "history_errors": self.history_errors,
+            "last_flush_ms": round(self.last_flush_ms, 2)
+        }
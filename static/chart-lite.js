@@ -0,0 +1,123 @@
+// Line chart canvas ringan untuk dashboard (pengganti Chart.js, tanpa CDN / dependency eksternal)
+(function (global) {
+    function LineChart(canvas, options) {
+        options = options || {};
+        this.canvas = canvas;
+        this.label = options.label || '';
+        this.color = options.color || '#4CAF50';
+        this.fillColor = options.fillColor || 'rgba(76, 175, 80, 0.1)';
+        this.gridColor = options.gridColor || 'rgba(0,0,0,0.1)';
+        this.font = options.font || '12px "Segoe UI", Tahoma, sans-serif';
+        this.labels = [];
+        this.values = [];
+
+        const chart = this;
+        global.addEventListener('resize', function () { chart.draw(); });
+    }
+
+    LineChart.prototype.setData = function (labels, values) {
+        this.labels = labels;
+        this.values = values;
+        this.draw();
+    };
+
+    // Batas atas sumbu Y: bilangan bulat "rapi" dengan maksimal ~5 tick
+    function niceScale(maxValue) {
+        const top = Math.max(1, maxValue);
+        const rawStep = top / 5;
+        const magnitude = Math.pow(10, Math.floor(Math.log10(rawStep)));
+        const step = Math.max(1, Math.ceil(Math.ceil(rawStep / magnitude) * magnitude));
+        return { step: step, max: Math.ceil(top / step) * step };
+    }
+
+    LineChart.prototype.draw = function () {
+        const canvas = this.canvas;
+        const ratio = global.devicePixelRatio || 1;
+        const width = canvas.parentNode.clientWidth;
+        const height = canvas.parentNode.clientHeight;
+        canvas.width = width * ratio;
+        canvas.height = height * ratio;
+        canvas.style.width = width + 'px';
+        canvas.style.height = height + 'px';
+
+        const ctx = canvas.getContext('2d');
+        ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+        ctx.clearRect(0, 0, width, height);
+        ctx.font = this.font;
+
+        // Legend
+        const legendTop = 8;
+        const legendWidth = 40 + ctx.measureText(this.label).width;
+        ctx.fillStyle = this.fillColor;
+        ctx.strokeStyle = this.color;
+        ctx.lineWidth = 3;
+        ctx.fillRect((width - legendWidth) / 2, legendTop, 30, 12);
+        ctx.strokeRect((width - legendWidth) / 2, legendTop, 30, 12);
+        ctx.fillStyle = '#666';
+        ctx.textBaseline = 'middle';
+        ctx.fillText(this.label, (width - legendWidth) / 2 + 40, legendTop + 6);
+
+        const plot = { left: 40, right: width - 16, top: 36, bottom: height - 28 };
+        const scale = niceScale(Math.max.apply(null, this.values.concat([0])));
+        const y = function (value) {
+            return plot.bottom - (value / scale.max) * (plot.bottom - plot.top);
+        };
+        const count = this.values.length;
+        const x = function (index) {
+            return count > 1 ? plot.left + index * (plot.right - plot.left) / (count - 1) : (plot.left + plot.right) / 2;
+        };
+
+        // Grid + label sumbu Y
+        ctx.lineWidth = 1;
+        ctx.strokeStyle = this.gridColor;
+        ctx.fillStyle = '#666';
+        ctx.textAlign = 'right';
+        for (let tick = 0; tick <= scale.max; tick += scale.step) {
+            ctx.beginPath();
+            ctx.moveTo(plot.left, y(tick));
+            ctx.lineTo(plot.right, y(tick));
+            ctx.stroke();
+            ctx.fillText(String(tick), plot.left - 8, y(tick));
+        }
+
+        // Label sumbu X (dilewati sebagian bila terlalu rapat)
+        ctx.textAlign = 'center';
+        ctx.textBaseline = 'top';
+        const every = Math.max(1, Math.ceil(count * 48 / Math.max(1, plot.right - plot.left)));
+        for (let i = 0; i < count; i += every) {
+            ctx.fillText(this.labels[i], x(i), plot.bottom + 8);
+        }
+        if (!count) {
+            return;
+        }
+
+        // Area + garis
+        ctx.beginPath();
+        ctx.moveTo(x(0), y(this.values[0]));
+        for (let i = 1; i < count; i++) {
+            ctx.lineTo(x(i), y(this.values[i]));
+        }
+        ctx.strokeStyle = this.color;
+        ctx.lineWidth = 3;
+        ctx.lineJoin = 'round';
+        ctx.stroke();
+        ctx.lineTo(x(count - 1), plot.bottom);
+        ctx.lineTo(x(0), plot.bottom);
+        ctx.closePath();
+        ctx.fillStyle = this.fillColor;
+        ctx.fill();
+
+        // Titik data
+        for (let i = 0; i < count; i++) {
+            ctx.beginPath();
+            ctx.arc(x(i), y(this.values[i]), 5, 0, 2 * Math.PI);
+            ctx.fillStyle = this.color;
+            ctx.fill();
+            ctx.lineWidth = 2;
+            ctx.strokeStyle = '#ffffff';
+            ctx.stroke();
+        }
+    };
+
+    global.LineChart = LineChart;
+})(window);
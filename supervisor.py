@@ -0,0 +1,310 @@
+import argparse
+import json
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+import time
+from datetime import datetime
+
+from frame_bus import BUS_PREFIX, bus_name, capture_worker
+
+
+# Key kamera untuk supervisor, tidak diteruskan ke PeopleCounter
+SUPERVISOR_KEYS = ("id", "source", "shared_capture", "bus_slots")
+
+
+def load_site_config(path):
+    """Baca config site (JSON) berisi daftar kamera"""
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    cameras = config.get("cameras", [])
+    if not cameras:
+        raise ValueError(f"Tidak ada kamera di config: {path}")
+
+    seen_ids = set()
+    for index, camera in enumerate(cameras):
+        if "source" not in camera:
+            raise ValueError(f"Kamera #{index + 1} tidak punya 'source'")
+        camera.setdefault("id", f"cam{index + 1}")
+        if camera["id"] in seen_ids:
+            raise ValueError(f"ID kamera duplikat: {camera['id']}")
+        seen_ids.add(camera["id"])
+
+        # "0" dari config -> index webcam 0
+        if isinstance(camera["source"], str) and camera["source"].isdigit():
+            camera["source"] = int(camera["source"])
+
+    return config
+
+
+def camera_worker(camera, defaults, status_queue, stop_event, report_interval, opencv_threads):
+    """Entry point proses worker: satu PeopleCounter (dengan detector sendiri) per kamera"""
+    # Ctrl+C ditangani supervisor, worker berhenti lewat stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    import cv2
+    from people_counter_bckp import PeopleCounter
+
+    # Banyak proses dalam satu host -> jangan biarkan OpenCV membuat thread pool per proses
+    cv2.setNumThreads(opencv_threads)
+
+    camera_id = camera["id"]
+    config = dict(defaults)
+    config.update({key: value for key, value in camera.items() if key not in SUPERVISOR_KEYS})
+    config.update({
+        "camera_id": camera_id,
+        # shared_capture: frame dibaca dari frame bus proses capture, bukan decode sendiri
+        "video_source": f"{BUS_PREFIX}{bus_name(camera_id)}" if camera.get("shared_capture") else camera["source"],
+        "show_window": False
+    })
+
+    counter = PeopleCounter(config)
+
+    def report_status():
+        """Kirim status berkala ke supervisor, dan hentikan counter saat diminta"""
+        # Polling is_set() (bukan stop_event.wait) supaya worker yang exit tidak
+        # meninggalkan "sleeper" yang membuat stop_event.set() di supervisor hang
+        while not stop_event.is_set():
+            time.sleep(report_interval)
+            status_queue.put({
+                "camera_id": camera_id,
+                "pid": os.getpid(),
+                "count": counter.current_count,
+                "max_count": counter.max_count_today,
+                "fps": round(counter.fps, 2),
+                "frames": counter.frame_count,
+                "startup_ms": counter.startup_timings.get("first_count"),
+                "timestamp": time.time()
+            })
+        counter.stop()
+
+    threading.Thread(target=report_status, daemon=True).start()
+
+    try:
+        counter.run()
+    finally:
+        if counter.data_log:
+            counter.save_session_data()
+
+
+class CameraSupervisor:
+    """
+    Supervisor multi-kamera: satu proses worker per kamera, restart otomatis
+    worker yang crash/terputus (dengan backoff), dan gabungkan count, max
+    count, dan FPS semua kamera menjadi satu site view.
+
+    Kamera dengan "shared_capture": true mendapat proses capture sendiri yang
+    men-decode ke frame bus (shared memory) bernama pc_<id>; worker, recorder,
+    dan preview (python frame_bus.py record/preview pc_<id>) membaca dari bus
+    yang sama tanpa decode ulang.
+    """
+
+    def __init__(self, config):
+        self.cameras = config["cameras"]
+        self.defaults = config.get("defaults", {})
+        self.report_interval = config.get("report_interval", 1.0)
+        self.status_interval = config.get("status_interval", 5.0)
+        self.status_file = config.get("status_file", "site_status.json")
+        self.opencv_threads = config.get("opencv_threads", 1)
+        self.restart_delay = config.get("restart_delay", 2.0)
+        self.max_restart_delay = config.get("max_restart_delay", 60.0)
+        self.stale_after = config.get("stale_after", 10.0)  # Detik tanpa laporan -> status stale
+        self.bus_slots = config.get("bus_slots", 8)  # Slot ring frame bus (default untuk shared_capture)
+
+        self.ctx = mp.get_context("spawn")
+        self.status_queue = self.ctx.Queue()
+        self.stop_event = self.ctx.Event()
+
+        self.workers = {}  # camera_id -> state worker
+        self.camera_status = {}  # camera_id -> laporan terakhir
+        self.site_max_count = 0
+        self.last_status_time = 0
+
+    def _start_capture(self, camera):
+        """Spawn proses capture (frame bus) untuk kamera dengan shared_capture"""
+        process = self.ctx.Process(
+            target=capture_worker,
+            args=(camera["source"], bus_name(camera["id"]), camera.get("bus_slots", self.bus_slots),
+                  self.stop_event, self.opencv_threads),
+            name=f"capture-{camera['id']}",
+            daemon=True
+        )
+        process.start()
+        print(f"🚌 Capture {camera['id']} dimulai (pid {process.pid})")
+        return process
+
+    def _start_worker(self, camera):
+        """Spawn proses worker untuk satu kamera (plus proses capture bila shared_capture)"""
+        state = self.workers.get(camera["id"])
+        capture = state.get("capture") if state else None
+        if camera.get("shared_capture") and (capture is None or not capture.is_alive()):
+            capture = self._start_capture(camera)
+
+        process = self.ctx.Process(
+            target=camera_worker,
+            args=(camera, self.defaults, self.status_queue, self.stop_event,
+                  self.report_interval, self.opencv_threads),
+            name=f"camera-{camera['id']}",
+            daemon=True
+        )
+        process.start()
+
+        state = self.workers.setdefault(camera["id"], {
+            "camera": camera,
+            "restarts": 0,
+            "backoff": self.restart_delay
+        })
+        state["process"] = process
+        state["capture"] = capture
+        state["started_at"] = time.time()
+        state["restart_at"] = None
+        print(f"▶️ Worker {camera['id']} dimulai (pid {process.pid})")
+
+    def _check_workers(self):
+        """Restart worker yang mati, dengan exponential backoff jika crash berulang"""
+        now = time.time()
+        for camera_id, state in self.workers.items():
+            process = state["process"]
+            capture = state["capture"]
+            if capture is not None and not capture.is_alive() and process.is_alive():
+                # Bus mati -> worker ikut dihentikan lalu di-restart bersama proses capture baru
+                print(f"⚠️ Capture {camera_id} berhenti (exit code {capture.exitcode}), worker dihentikan")
+                process.terminate()
+                process.join(timeout=2.0)
+            if process.is_alive():
+                # Worker stabil cukup lama -> reset backoff
+                if now - state["started_at"] > self.max_restart_delay:
+                    state["backoff"] = self.restart_delay
+                continue
+
+            if state["restart_at"] is None:
+                state["restart_at"] = now + state["backoff"]
+                print(f"⚠️ Worker {camera_id} berhenti (exit code {process.exitcode}), "
+                      f"restart dalam {state['backoff']:.0f} detik")
+                state["backoff"] = min(state["backoff"] * 2, self.max_restart_delay)
+            elif now >= state["restart_at"]:
+                state["restarts"] += 1
+                self._start_worker(state["camera"])
+
+    def _drain_status(self):
+        """Ambil semua laporan status dari worker"""
+        while True:
+            try:
+                status = self.status_queue.get_nowait()
+            except queue.Empty:
+                break
+            self.camera_status[status["camera_id"]] = status
+
+    def get_site_view(self):
+        """Gabungkan status per kamera menjadi satu site view"""
+        now = time.time()
+        cameras = {}
+        total_count = 0
+        total_fps = 0.0
+
+        for camera_id, state in self.workers.items():
+            status = self.camera_status.get(camera_id, {})
+            alive = state["process"].is_alive()
+            age = now - status["timestamp"] if status else None
+
+            if not alive:
+                health = "restarting"
+            elif age is None or age > self.stale_after:
+                health = "stale"
+            else:
+                health = "ok"
+                total_count += status["count"]
+                total_fps += status["fps"]
+
+            cameras[camera_id] = {
+                "source": str(state["camera"]["source"]),
+                "status": health,
+                "count": status.get("count", 0),
+                "max_count": status.get("max_count", 0),
+                "fps": status.get("fps", 0.0),
+                "frames": status.get("frames", 0),
+                "startup_ms": status.get("startup_ms"),
+                "restarts": state["restarts"],
+                "pid": state["process"].pid,
+                "shared_capture": state["capture"] is not None
+            }
+
+        self.site_max_count = max(self.site_max_count, total_count)
+        return {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "total_count": total_count,
+            "site_max_count": self.site_max_count,
+            "max_count_per_camera": max([c["max_count"] for c in cameras.values()] or [0]),
+            "total_fps": round(total_fps, 2),
+            "cameras_ok": sum(1 for c in cameras.values() if c["status"] == "ok"),
+            "cameras_total": len(cameras),
+            "cameras": cameras
+        }
+
+    def _write_site_view(self, site_view):
+        """Tulis site view ke file JSON secara atomik"""
+        tmp_file = f"{self.status_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(site_view, f, indent=2)
+        os.replace(tmp_file, self.status_file)
+
+    def _print_site_view(self, site_view):
+        """Ringkasan site view di terminal"""
+        print(f"\n=== SITE VIEW {site_view['timestamp']} ===")
+        print(f"Total orang: {site_view['total_count']} | Max site: {site_view['site_max_count']} | "
+              f"Kamera OK: {site_view['cameras_ok']}/{site_view['cameras_total']}")
+        for camera_id, camera in site_view["cameras"].items():
+            print(f"  {camera_id:<15} {camera['status']:<10} count={camera['count']:<3} "
+                  f"max={camera['max_count']:<3} fps={camera['fps']:<6} restarts={camera['restarts']}")
+
+    def run(self):
+        """Jalankan semua worker dan monitor sampai Ctrl+C"""
+        print(f"🎥 Menjalankan {len(self.cameras)} kamera...")
+        for camera in self.cameras:
+            self._start_worker(camera)
+
+        try:
+            while True:
+                time.sleep(0.5)
+                self._drain_status()
+                self._check_workers()
+
+                if time.time() - self.last_status_time >= self.status_interval:
+                    site_view = self.get_site_view()
+                    self._write_site_view(site_view)
+                    self._print_site_view(site_view)
+                    self.last_status_time = time.time()
+        except KeyboardInterrupt:
+            print("\n⚠️ Menghentikan semua worker...")
+        finally:
+            self.shutdown()
+
+    def shutdown(self, timeout=10.0):
+        """Hentikan worker dengan rapi (session data disimpan oleh worker)"""
+        self.stop_event.set()
+        deadline = time.time() + timeout
+        for state in self.workers.values():
+            state["process"].join(timeout=max(0.1, deadline - time.time()))
+        for camera_id, state in self.workers.items():
+            if state["process"].is_alive():
+                print(f"Worker {camera_id} tidak merespon, terminate...")
+                state["process"].terminate()
+            # Proses capture juga berhenti lewat stop_event
+            if state["capture"] is not None:
+                state["capture"].join(timeout=max(0.1, deadline - time.time()))
+                if state["capture"].is_alive():
+                    state["capture"].terminate()
+        self._drain_status()
+        self._write_site_view(self.get_site_view())
+        print("🔚 Supervisor selesai")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Supervisor multi-kamera People Counter")
+    parser.add_argument("config", help="File config JSON berisi daftar kamera")
+    args = parser.parse_args()
+
+    CameraSupervisor(load_site_config(args.config)).run()
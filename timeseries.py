@@ -0,0 +1,154 @@
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+
+class RollupBuckets:
+    """Agregat per bucket waktu (menit/jam) yang di-update saat sampel masuk"""
+
+    def __init__(self, bucket_seconds, max_buckets):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = deque(maxlen=max_buckets)  # [start, sum, count, max, min]
+
+    def add(self, timestamp, value):
+        """Tambah satu sampel ke bucket aktif (atau buka bucket baru)"""
+        start = int(timestamp // self.bucket_seconds) * self.bucket_seconds
+        if self.buckets and self.buckets[-1][0] >= start:
+            bucket = self.buckets[-1]
+            bucket[1] += value
+            bucket[2] += 1
+            bucket[3] = max(bucket[3], value)
+            bucket[4] = min(bucket[4], value)
+        else:
+            self.buckets.append([start, value, 1, value, value])
+
+    def to_list(self, last=None):
+        """Bucket sebagai list dict (opsional hanya `last` bucket terakhir)"""
+        buckets = list(self.buckets)
+        if last is not None:
+            buckets = buckets[-last:]
+        return [{
+            "start": datetime.fromtimestamp(start).strftime("%Y-%m-%d %H:%M:%S"),
+            "avg": round(total / count, 2),
+            "max": maximum,
+            "min": minimum,
+            "samples": count
+        } for start, total, count, maximum, minimum in buckets]
+
+
+class CountTimeSeries:
+    """
+    Pengganti list data_log: ring buffer berbasis array NumPy dengan kapasitas
+    tetap, plus agregat berjalan (sum, count, max) dan rollup menit/jam.
+    Rata-rata dan max dibaca O(1), data chart/tabel O(window).
+    """
+
+    def __init__(self, capacity=43200, minute_buckets=1440, hour_buckets=24 * 31):
+        # Default kapasitas: 24 jam sampel dengan log_interval 2 detik
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.counts = np.zeros(capacity, dtype=np.int32)
+        self.max_today = np.zeros(capacity, dtype=np.int32)
+        self.durations = np.zeros(capacity, dtype=np.int64)
+        self.zone_names = ()  # Nama zona (kolom zone_counts), kosong = tanpa occupancy per zona
+        self.zone_counts = None
+        self.head = 0       # Slot tulis berikutnya
+        self.retained = 0   # Jumlah sampel yang masih tersimpan di ring
+
+        # Agregat berjalan sejak awal session (termasuk sampel yang sudah tergeser)
+        self.total_samples = 0
+        self.total_sum = 0
+        self.max_count = 0
+
+        self.minutes = RollupBuckets(60, minute_buckets)
+        self.hours = RollupBuckets(3600, hour_buckets)
+
+    def __len__(self):
+        return self.total_samples
+
+    def set_zones(self, names):
+        """Aktifkan kolom occupancy per zona; kolom dikosongkan bila daftar zona berubah"""
+        names = tuple(names)
+        if names != self.zone_names:
+            self.zone_names = names
+            self.zone_counts = np.zeros((self.capacity, len(names)), dtype=np.int32) if names else None
+
+    def append(self, timestamp, count, max_today, session_duration, zones=None):
+        """Tambah satu sampel, O(1). zones: dict nama zona -> occupancy (opsional)"""
+        slot = self.head
+        self.timestamps[slot] = timestamp
+        self.counts[slot] = count
+        self.max_today[slot] = max_today
+        self.durations[slot] = session_duration
+        if self.zone_counts is not None:
+            zones = zones or {}
+            self.zone_counts[slot] = [zones.get(name, 0) for name in self.zone_names]
+        self.head = (slot + 1) % self.capacity
+        self.retained = min(self.retained + 1, self.capacity)
+
+        self.total_samples += 1
+        self.total_sum += count
+        self.max_count = max(self.max_count, count)
+        self.minutes.add(timestamp, count)
+        self.hours.add(timestamp, count)
+
+    def average(self):
+        """Rata-rata count sejak awal session, O(1)"""
+        return self.total_sum / self.total_samples if self.total_samples else 0.0
+
+    def _sample(self, i):
+        """Satu slot sebagai dict dengan format data_log lama (+ zones bila aktif)"""
+        sample = {
+            "timestamp": datetime.fromtimestamp(self.timestamps[i]).strftime("%Y-%m-%d %H:%M:%S"),
+            "count": int(self.counts[i]),
+            "max_today": int(self.max_today[i]),
+            "session_duration": int(self.durations[i])
+        }
+        if self.zone_counts is not None:
+            sample["zones"] = dict(zip(self.zone_names, self.zone_counts[i].tolist()))
+        return sample
+
+    def _indices(self, last=None):
+        """Index slot untuk `last` sampel terakhir, urut dari terlama"""
+        n = self.retained if last is None else min(last, self.retained)
+        return (np.arange(self.head - n, self.head) % self.capacity) if n else np.empty(0, dtype=np.int64)
+
+    def latest(self, last=None):
+        """Sampel terakhir sebagai list dict dengan format data_log lama"""
+        return [self._sample(i) for i in self._indices(last)]
+
+    def chart_series(self, last=20):
+        """(label jam:menit, count) untuk chart, O(last)"""
+        indices = self._indices(last)
+        labels = [datetime.fromtimestamp(self.timestamps[i]).strftime("%H:%M") for i in indices]
+        return labels, self.counts[indices].tolist()
+
+    def since(self, seq=0, limit=None):
+        """
+        Sampel dengan nomor urut > seq (urutan sejak awal session, mulai 1),
+        urut dari terlama. limit: hanya `limit` sampel terbaru. Dipakai
+        dashboard untuk query inkremental, jadi tiap poll hanya berisi
+        sampel baru.
+        """
+        total = self.total_samples
+        first = max(seq + 1, total - self.retained + 1)
+        if limit is not None:
+            first = max(first, total - limit + 1)
+        samples = []
+        for sample_seq in range(first, total + 1):
+            sample = {"seq": sample_seq}
+            sample.update(self._sample((sample_seq - 1) % self.capacity))
+            samples.append(sample)
+        return {"latest_seq": total, "samples": samples}
+
+    def to_list(self):
+        """Semua sampel yang masih tersimpan (untuk JSON session)"""
+        return self.latest()
+
+    def rollups(self, last_minutes=None, last_hours=None):
+        """Rollup menit dan jam"""
+        return {
+            "minute": self.minutes.to_list(last_minutes),
+            "hour": self.hours.to_list(last_hours)
+        }
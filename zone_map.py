@@ -0,0 +1,150 @@
+import threading
+
+import cv2
+import numpy as np
+
+
+class ZoneMap:
+    """
+    Zona poligon (antrian, kasir, pintu masuk, ...) di-rasterisasi sekali per
+    resolusi menjadi label image uint8 (0 = di luar zona, i + 1 = zona ke-i),
+    sehingga zona semua centroid cukup satu index NumPy labels[cy, cx], tanpa
+    tes point-in-polygon per deteksi. Zona yang tumpang tindih: zona yang
+    didefinisikan belakangan menang.
+
+    Occupancy dihitung ulang tiap frame (bincount label). Dwell time butuh ID
+    track: kunjungan dibuka saat track pertama terlihat di zona dan ditutup
+    saat track pindah zona atau tidak terlihat di zona selama exit_grace
+    detik (deteksi yang hilang sesaat tidak memecah kunjungan).
+
+    update() dipanggil dari loop frame, get_stats() juga dari thread web
+    (/metrics, snapshot); state kunjungan dijaga satu lock.
+
+    zones: list {"name": str, "polygon": [[x, y], ...]} dengan titik dalam fraksi 0..1 dari frame
+    """
+
+    def __init__(self, zones, exit_grace=1.0):
+        if not zones or len(zones) > 255:
+            raise ValueError("Jumlah zona harus 1..255")
+        self.names = []
+        self.polygons = []
+        for zone in zones:
+            name = str(zone.get("name", "")).strip()
+            polygon = np.asarray(zone.get("polygon", []), dtype=np.float64)
+            if not name or name in self.names:
+                raise ValueError(f"Nama zona kosong atau duplikat: {zone.get('name')!r}")
+            if polygon.ndim != 2 or polygon.shape[0] < 3 or polygon.shape[1] != 2:
+                raise ValueError(f"Polygon zona '{name}' harus berupa minimal 3 titik [x, y]")
+            if polygon.min() < 0 or polygon.max() > 1.0001:
+                raise ValueError(f"Titik polygon zona '{name}' harus fraksi 0..1 dari frame")
+            self.names.append(name)
+            self.polygons.append(polygon)
+        self.exit_grace = exit_grace
+        self.frame_size = None
+        self.labels = None  # Label image (tinggi x lebar) untuk frame_size
+        self.pixel_polygons = []  # Polygon dalam piksel untuk frame_size (dipakai overlay)
+
+        # Statistik per zona (index sama dengan names)
+        zone_count = len(self.names)
+        self.occupancy = np.zeros(zone_count, dtype=np.int64)
+        self.visits = np.zeros(zone_count, dtype=np.int64)  # Kunjungan yang sudah selesai
+        self.dwell_total = np.zeros(zone_count, dtype=np.float64)
+        self.dwell_max = np.zeros(zone_count, dtype=np.float64)
+        self.active = {}  # track_id -> [index zona, waktu masuk, terakhir terlihat]
+        self.lock = threading.Lock()  # Menjaga active/visits/dwell antara loop frame dan thread web
+        self.rasterizations = 0
+
+    def _rasterize(self, width, height):
+        """Gambar semua polygon ke label image untuk ukuran frame ini"""
+        labels = np.zeros((height, width), dtype=np.uint8)
+        scale = np.array([width - 1, height - 1], dtype=np.float64)
+        self.pixel_polygons = [np.round(polygon * scale).astype(np.int32) for polygon in self.polygons]
+        for index, points in enumerate(self.pixel_polygons):
+            cv2.fillPoly(labels, [points], index + 1)
+        self.labels = labels
+        self.frame_size = (width, height)
+        self.rasterizations += 1
+
+    def prepare(self, frame_shape):
+        """Pastikan label image (dan polygon piksel) sesuai ukuran frame; rasterisasi hanya saat ukuran berubah"""
+        height, width = frame_shape[:2]
+        if self.frame_size != (width, height):
+            self._rasterize(width, height)
+
+    def lookup(self, boxes, frame_shape):
+        """Label zona (0 = di luar zona, i + 1) untuk centroid setiap box (x, y, w, h)"""
+        self.prepare(frame_shape)
+        height, width = frame_shape[:2]
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        center_x = np.clip(boxes[:, 0] + boxes[:, 2] // 2, 0, width - 1)
+        center_y = np.clip(boxes[:, 1] + boxes[:, 3] // 2, 0, height - 1)
+        return self.labels[center_y, center_x]
+
+    def update(self, boxes, frame_shape, timestamp, track_ids=None):
+        """
+        Satu frame deteksi: perbarui occupancy per zona dan, bila track_ids
+        (sejajar dengan boxes, 0 = belum terkonfirmasi) tersedia, kunjungan
+        untuk dwell time. Return label zona per box.
+        """
+        labels = self.lookup(boxes, frame_shape)
+        occupancy = np.bincount(labels, minlength=len(self.names) + 1)[1:]
+        with self.lock:
+            self.occupancy = occupancy
+            if track_ids is not None and len(track_ids) == len(labels):
+                self._update_visits(track_ids, labels, timestamp)
+        return labels
+
+    def _update_visits(self, track_ids, labels, timestamp):
+        """Buka/perpanjang/tutup kunjungan per track (dipanggil dengan lock dipegang)"""
+        for track_id, label in zip(track_ids, labels.tolist()):
+            if not track_id or not label:
+                continue  # Di luar zona: kunjungan (bila ada) ditutup lewat exit_grace
+            zone = label - 1
+            visit = self.active.get(track_id)
+            if visit is not None and visit[0] != zone:
+                self._close_visit(track_id)
+                visit = None
+            if visit is None:
+                self.active[track_id] = [zone, timestamp, timestamp]
+            else:
+                visit[2] = timestamp
+
+        expired = [track_id for track_id, visit in self.active.items() if timestamp - visit[2] > self.exit_grace]
+        for track_id in expired:
+            self._close_visit(track_id)
+
+    def _close_visit(self, track_id):
+        zone, entered, last_seen = self.active.pop(track_id)
+        dwell = last_seen - entered
+        self.visits[zone] += 1
+        self.dwell_total[zone] += dwell
+        self.dwell_max[zone] = max(self.dwell_max[zone], dwell)
+
+    def occupancy_by_name(self):
+        with self.lock:
+            occupancy = self.occupancy
+        return dict(zip(self.names, occupancy.tolist()))
+
+    def get_stats(self, now=None):
+        """
+        Statistik per zona (detik). avg_dwell dari kunjungan selesai, max_dwell
+        termasuk kunjungan berjalan; current_dwell: rata-rata lama orang yang
+        saat ini masih di zona (butuh now).
+        """
+        current = [[] for _ in self.names]
+        with self.lock:
+            if now is not None:
+                for zone, entered, _ in self.active.values():
+                    current[zone].append(max(0.0, now - entered))
+            occupancy = self.occupancy
+            visits = self.visits.copy()
+            dwell_total = self.dwell_total.copy()
+            dwell_max = self.dwell_max.copy()
+        return [{
+            "name": name,
+            "occupancy": int(occupancy[index]),
+            "visits": int(visits[index]),
+            "avg_dwell": round(float(dwell_total[index] / visits[index]), 1) if visits[index] else 0.0,
+            "max_dwell": round(float(max([dwell_max[index]] + current[index])), 1),
+            "current_dwell": round(sum(current[index]) / len(current[index]), 1) if current[index] else 0.0
+        } for index, name in enumerate(self.names)]